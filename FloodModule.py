@@ -1,14 +1,21 @@
+# Run with the pipeline modules importable, e.g.
+#   PYTHONPATH=intergration/00_subProcess_py python FloodModule.py
+# Progress is reported as structured JSON events on stderr (per-stage wall time
+# and getInfo round trips); stdout only carries the results.
+
+import sys
 import ee
 import datetime
 import json
-import pandas as pd
-import geopandas as gpd
-from shapely.geometry import shape
 
-# Initialize Earth Engine API
-ee.Initialize(project = 'servir-ee')
+from instrumentation import Instrumentation, StdoutSink
 
-print("✅ Earth Engine initialized.")
+instr = Instrumentation([StdoutSink(sys.stderr)])
+instr.install_remote_hook()
+
+# Initialize Earth Engine API
+with instr.stage("initialize"):
+    ee.Initialize(project = 'servir-ee')
 
 # ----------------------------- #
 #       USER DEFINED AOI        #
@@ -24,26 +31,27 @@ use_kml = not use_bbox  # Switch to True if using KML
 kml_file = "/_use/aoi.kml"  # Replace with actual KML file path
 
 # Function to extract geometry from KML
-import geopandas as gpd
-from shapely.geometry import shape
-
 def load_kml_geometry(kml_file):
-    print(f"📂 Loading KML file: {kml_file}")
+    # geopandas/shapely are only needed (and only imported) on the KML path.
+    import geopandas as gpd
+    from shapely.geometry import shape
+
+    instr.event("Loading KML file", path=kml_file)
 
     try:
         # Read KML using GeoPandas
         gdf = gpd.read_file(kml_file, driver="KML")
-        print(f"✅ KML file loaded successfully. Found {len(gdf)} features.")
+        instr.event("KML file loaded", features=len(gdf))
 
         # Extract first feature geometry as GeoJSON
         geom = gdf.geometry.iloc[0]  # Get first feature
         geojson_geom = shape(geom).__geo_interface__  # Convert to GeoJSON format
 
-        print("✅ Geometry extracted from KML.")
+        instr.event("Geometry extracted from KML")
         return ee.Geometry(geojson_geom)  # Convert to Earth Engine Geometry
 
     except Exception as e:
-        print(f"❌ Error loading KML: {e}")
+        instr.event("Error loading KML", error=str(e))
         return None
 
 # ----------------------------- #
@@ -59,7 +67,7 @@ low_lying_threshold = 10  # Low-lying threshold (m)
 start_date_ee = ee.Date.fromYMD(start_date.year, start_date.month, start_date.day)
 end_date_ee = ee.Date.fromYMD(end_date.year, end_date.month, end_date.day)
 
-print("✅ Time range set:", start_date, "to", end_date)
+instr.event("Time range set", start_date=start_date, end_date=end_date)
 
 # ----------------------------- #
 #       DEFINE REGION (AOI)     #
@@ -68,7 +76,7 @@ print("✅ Time range set:", start_date, "to", end_date)
 roi = None  # Initialize ROI as None
 
 if use_kml:  # If using KML, load AOI from KML file
-    roi = load_kml_geometry(kml_file)
+    roi = instr.wrap("load_aoi", load_kml_geometry)(kml_file)
 elif use_bbox:  # If using BBOX, define AOI as a bounding box
     roi = ee.Geometry.BBox(*bbox)  # Convert list to bbox geometry
 
@@ -76,34 +84,31 @@ elif use_bbox:  # If using BBOX, define AOI as a bounding box
 if roi is None:
     raise ValueError("❌ ERROR: Region of Interest (ROI) is not defined! Check AOI selection.")
 
-print("✅ AOI Loaded Successfully:", roi.getInfo())  # Debugging check
+with instr.stage("fetch_aoi"):
+    instr.event("AOI loaded", roi=roi.getInfo())  # Debugging check
 
 # ----------------------------- #
 #         LOAD DATASETS         #
 # ----------------------------- #
 
-print("⏳ Loading datasets...")
-
 # Satellite Data
 jrc = ee.ImageCollection("JRC/GSW1_4/MonthlyHistory").filterBounds(roi).filterDate(start_date_ee, end_date_ee)
 srtm = ee.Image("USGS/SRTMGL1_003")
 worldcover = ee.ImageCollection("ESA/WorldCover/v200").first().select("Map")
 buildings = ee.FeatureCollection("GOOGLE/Research/open-buildings/v3/polygons")
 
-print("✅ Datasets loaded successfully.")
+instr.event("Datasets loaded")
 
 # Filter permanent water mask
 permanent_water = ee.Image("JRC/GSW1_4/GlobalSurfaceWater").select("occurrence").gte(90)
 jrc = jrc.map(lambda img: img.updateMask(permanent_water.Not()))
 
-print("✅ Applied water mask.")
+instr.event("Applied water mask")
 
 # ----------------------------- #
 #    FLOOD FREQUENCY ANALYSIS   #
 # ----------------------------- #
 
-print("⏳ Calculating flood frequency...")
-
 def calculate_flood_frequency(collection):
     def add_bands(img):
         obs = img.gt(0).rename("obs")
@@ -116,24 +121,18 @@ def calculate_flood_frequency(collection):
     flood_frequency = total_water.divide(total_obs).multiply(100).rename("flood_frequency")
     return flood_frequency.updateMask(flood_frequency.neq(0))
 
-flood_frequency = calculate_flood_frequency(jrc)
-
-print("✅ Flood frequency calculated.")
+# Only builds the ee graph; the work happens in the getInfo calls below.
+flood_frequency = instr.wrap("flood_frequency", calculate_flood_frequency, lazy=True)(jrc)
 
 # ----------------------------- #
 #   FLOOD-PRONE AREA DETECTION  #
 # ----------------------------- #
 
-print("⏳ Identifying flood-prone areas...")
-
 slope = ee.Terrain.slope(srtm).rename("slope")
 flat_area = slope.lt(5).rename("flat_area")
 low_lying = srtm.lt(low_lying_threshold).rename("low_lying")
 flood_prone_area = flood_frequency.updateMask(low_lying.And(flat_area))
 
-
-print("✅ Flood-prone areas identified.")
-
 # Ensure flood-prone area is integer
 flood_prone_int = flood_prone_area.multiply(100).toInt()
 
@@ -176,23 +175,23 @@ flood_prone_geom = flood_prone_vector.geometry()
 buildings_in_aoi = buildings.filterBounds(roi)
 
 # Count total buildings in AOI
-total_buildings = buildings_in_aoi.size().getInfo()
-print(f"🔍 Total buildings in AOI: {total_buildings}")
+with instr.stage("total_buildings"):
+    total_buildings = buildings_in_aoi.size().getInfo()
+instr.event("Total buildings in AOI", total_buildings=total_buildings)
 
 # Filter flooded buildings using the converted geometry
 flooded_buildings = buildings_in_aoi.filterBounds(flood_prone_geom)
 
 # Count flooded buildings
-flooded_building_count = flooded_buildings.size().getInfo()
-print(f"✅ Flooded buildings identified: {flooded_building_count}")
+with instr.stage("flooded_buildings"):
+    flooded_building_count = flooded_buildings.size().getInfo()
+instr.event("Flooded buildings identified", flooded_building_count=flooded_building_count)
 
 
 # ----------------------------- #
 #  FLOODED AREA PER LULC CLASS  #
 # ----------------------------- #
 
-print("⏳ Calculating flooded area per LULC class...")
-
 # Define LULC classes and their names
 lulc_mapping = {
     10: "Tree cover",
@@ -213,12 +212,13 @@ area_km2 = []
 
 for lulc_class in lulc_values:
     class_mask = landcover_masked.eq(lulc_class)
-    area_m2 = class_mask.multiply(ee.Image.pixelArea()).reduceRegion(
-        reducer=ee.Reducer.sum(),
-        geometry=roi,
-        scale=30,
-        maxPixels=1e13
-    ).getInfo()
+    with instr.stage("lulc_areas", lulc_class=lulc_class):
+        area_m2 = class_mask.multiply(ee.Image.pixelArea()).reduceRegion(
+            reducer=ee.Reducer.sum(),
+            geometry=roi,
+            scale=30,
+            maxPixels=1e13
+        ).getInfo()
 
     flooded_area_km2 = area_m2.get("Map", 0) / 1e6 if area_m2 else 0  # Convert to km²
 
@@ -229,7 +229,7 @@ for lulc_class in lulc_values:
         "Flooded_Area_km²": flooded_area_km2
     })
 
-print("✅ Flooded area per LULC class calculated.")
+instr.event("Flooded area per LULC class calculated")
 
 
 # # ----------------------------- #
@@ -310,3 +310,7 @@ for entry in area_km2:
 print(f"- Flooded buildings saved as Shapefile & GeoJSON in Google Drive (folder: 'FloodAnalysis').")
 # print(f"- Flooded area per LULC saved as CSV: {csv_filename}.")
 
+print("\n=== STAGE TIMINGS ===")
+print(instr.summary_table())
+instr.close()
+
@@ -7,9 +7,6 @@
 import ee
 import datetime
 import json
-import pandas as pd
-import geopandas as gpd
-from shapely.geometry import shape
 
 ee.Initialize(project='servir-ee')
 
@@ -29,6 +26,10 @@ kml_file = "/_use/aoi.kml"  # Replace with actual KML file path
 
 # Define ROI
 if use_kml:
+    # geopandas/shapely are only needed (and only imported) on the KML path.
+    import geopandas as gpd
+    from shapely.geometry import shape
+
     try:
         gdf = gpd.read_file(kml_file, driver="KML")
         geom = gdf.geometry.iloc[0]
@@ -130,31 +131,24 @@ buildings = ee.FeatureCollection("GOOGLE/Research/open-buildings/v3/polygons") \
               .filterBounds(roi)
 building_points = buildings.map(lambda f: f.centroid())
 
-# 2. Create building raster (10m resolution)
-building_raster = ee.Image().byte().paint(
-    featureCollection=building_points,
-    color=1
-).rename('buildings').clip(roi)
-
-# 3. Count total buildings
-total_buildings = building_raster.reduceRegion(
-    reducer=ee.Reducer.sum(),
-    geometry=roi,
-    scale=10,
-    maxPixels=1e13
-).get('buildings').getInfo() or 0
+# 2. Sample flood frequency at every building centroid (exact: one sample per
+#    building, so nearby buildings are never merged into one painted pixel)
+building_samples = flood_prone_area.rename('flood_frequency').reduceRegions(
+    collection=building_points,
+    reducer=ee.Reducer.first().setOutputs(['flood_frequency']),
+    scale=30
+)
+
+# 3. Count total and flooded buildings in one round trip
+flooded_buildings = building_samples.filter(ee.Filter.notNull(['flood_frequency']))
+building_counts = ee.Dictionary({
+    'total': building_points.size(),
+    'flooded': flooded_buildings.size()
+}).getInfo()
+total_buildings = building_counts['total']
+flooded_building_count = building_counts['flooded']
 
 print(f"🔍 Total buildings in AOI: {total_buildings}")
-
-# 4. Identify flooded buildings
-flooded_buildings = building_raster.updateMask(flood_prone_mask)
-flooded_building_count = flooded_buildings.reduceRegion(
-    reducer=ee.Reducer.sum(),
-    geometry=roi,
-    scale=5,
-    maxPixels=1e13
-).get('buildings').getInfo() or 0
-
 print(f"✅ Flooded buildings identified: {flooded_building_count}")
 
 # ----------------------------- #
@@ -241,8 +235,8 @@ print('⏳ Exporting results...')
 # ----------------------------- #
 
 print("\n=== FLOOD ANALYSIS RESULTS ===")
-print(f"Total buildings in AOI: {total_buildings * 1.05}")
-print(f"Flooded buildings: {flooded_building_count * 1.05}")
+print(f"Total buildings in AOI: {total_buildings}")
+print(f"Flooded buildings: {flooded_building_count}")
 print("\nFlooded Area (km²) by LULC Class:")
 # for entry in area_km2:
 #     print(f"  {entry['LULC_Name']}: {entry['Flooded_Area_km²']:.2f} km²")
@@ -1,23 +1,240 @@
 # cassie/src/algorithms/utils/aoi_utils.py
 
 import ee
-import geopandas as gpd
-from shapely.geometry import shape
 
-def load_kml_geometry(kml_file):
-    """Loads geometry from a KML file."""
+def load_kml_geometry(kml_file, max_vertices=None):
+    """Loads a KML file as one ee.Geometry (the union of its placemarks) through load_aoi_geometry."""
     print(f"📂 Loading KML file: {kml_file}")
 
     try:
-        gdf = gpd.read_file(kml_file, driver="KML")
-        print(f"✅ KML file loaded successfully. Found {len(gdf)} features.")
-
-        geom = gdf.geometry.iloc[0]
-        geojson_geom = shape(geom).__geo_interface__
-
-        print("✅ Geometry extracted from KML.")
-        return ee.Geometry(geojson_geom)
+        roi, stats = load_aoi_geometry(kml_file, max_vertices=max_vertices)
+        print(f"✅ KML file loaded successfully. Found {stats['features']} features.")
+        return roi
 
     except Exception as e:
         print(f"❌ Error loading KML: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def _iter_kml_placemarks(path):
+    """Streams (name, GeoJSON geometry, properties) from KML Placemarks without GDAL."""
+    import xml.etree.ElementTree as ET
+
+    def local(tag):
+        return tag.rsplit("}", 1)[-1]
+
+    def ring(element):
+        for child in element.iter():
+            if local(child.tag) == "coordinates":
+                return [[float(v) for v in point.split(",")[:2]] for point in child.text.split()]
+        return []
+
+    def polygons(element):
+        for polygon in element.iter():
+            if local(polygon.tag) != "Polygon":
+                continue
+            outer, inner = [], []
+            for boundary in polygon:
+                if local(boundary.tag) == "outerBoundaryIs":
+                    outer = ring(boundary)
+                elif local(boundary.tag) == "innerBoundaryIs":
+                    inner.append(ring(boundary))
+            yield [outer] + inner
+
+    for _, element in ET.iterparse(path, events=("end",)):
+        if local(element.tag) != "Placemark":
+            continue
+        name = next((child.text for child in element if local(child.tag) == "name"), None)
+        parts = list(polygons(element))
+        if len(parts) == 1:
+            geometry = {"type": "Polygon", "coordinates": parts[0]}
+        elif parts:
+            geometry = {"type": "MultiPolygon", "coordinates": parts}
+        else:
+            geometry = None
+        element.clear()
+        if geometry is not None:
+            yield name, geometry, {"Name": name}
+
+
+def iter_aoi_features(path):
+    """Streams (name, shapely geometry, properties) for every feature of a KML, GeoJSON or shapefile.
+
+    Features are read one at a time with fiona when it is installed. Without it,
+    GeoJSON is parsed with json and KML with a streaming XML parser (polygons
+    only); shapefiles need fiona.
+    """
+    from shapely.geometry import shape
+
+    try:
+        import fiona
+    except ImportError:
+        fiona = None
+
+    lower = path.lower()
+    if fiona is not None:
+        driver = "KML" if lower.endswith(".kml") else None
+        with fiona.open(path, driver=driver) as src:
+            for i, feature in enumerate(src):
+                properties = dict(feature["properties"] or {})
+                name = properties.get("name") or properties.get("Name") or f"aoi_{i}"
+                if feature["geometry"] is not None:
+                    yield name, shape(feature["geometry"]), properties
+        return
+
+    if lower.endswith(".kml"):
+        for i, (name, geometry, properties) in enumerate(_iter_kml_placemarks(path)):
+            yield name or f"aoi_{i}", shape(geometry), properties
+    elif lower.endswith((".geojson", ".json")):
+        import json
+        with open(path) as f:
+            data = json.load(f)
+        features = data["features"] if data.get("type") == "FeatureCollection" else [data]
+        for i, feature in enumerate(features):
+            properties = feature.get("properties") or {}
+            name = properties.get("name") or properties.get("Name") or f"aoi_{i}"
+            if feature.get("geometry") is not None:
+                yield name, shape(feature["geometry"]), properties
+    else:
+        raise ImportError(f"❌ Reading {path} needs fiona (pip install fiona).")
+
+
+def geometry_stats(geometry):
+    """Vertex count and size in bytes of the compact GeoJSON that is sent to Earth Engine."""
+    import json
+    import shapely
+
+    encoded = json.dumps(shapely.geometry.mapping(geometry), separators=(",", ":"))
+    return {"vertices": int(shapely.get_num_coordinates(geometry)), "bytes": len(encoded)}
+
+
+def simplify_to_vertex_budget(geometry, max_vertices, max_iterations=40):
+    """Simplifies a geometry topology-safely to at most max_vertices vertices; returns (geometry, tolerance).
+
+    Binary-searches the smallest Douglas-Peucker tolerance (preserve_topology=True,
+    so rings stay valid and holes stay inside) that meets the budget. If even
+    the coarsest simplification has more vertices, that one is returned.
+    """
+    import shapely
+
+    if max_vertices is None or shapely.get_num_coordinates(geometry) <= max_vertices:
+        return geometry, 0.0
+
+    west, south, east, north = geometry.bounds
+    low, high = 0.0, max(east - west, north - south)
+    best = shapely.simplify(geometry, high, preserve_topology=True)
+    best_tolerance = high
+    for _ in range(max_iterations):
+        tolerance = (low + high) / 2
+        candidate = shapely.simplify(geometry, tolerance, preserve_topology=True)
+        if shapely.get_num_coordinates(candidate) <= max_vertices:
+            best, best_tolerance, high = candidate, tolerance, tolerance
+        else:
+            low = tolerance
+        if high - low <= high * 1e-3:
+            break
+    return best, best_tolerance
+
+
+def simplify_coverage_to_vertex_budget(geometries, max_vertices, max_iterations=40):
+    """Simplifies adjacent polygons together so each has at most max_vertices vertices; returns (geometries, tolerance).
+
+    shapely.coverage_simplify moves every shared edge once for both of its
+    polygons, so neighbours keep meeting without gaps or overlaps. One tolerance
+    is used for the whole coverage: the smallest that brings every polygon
+    within the budget. Returns None when the polygons are not a valid coverage
+    (they overlap) or shapely is older than 2.1.
+    """
+    import numpy as np
+    import shapely
+
+    if not hasattr(shapely, "coverage_simplify"):
+        return None
+    geometries = np.asarray(geometries, dtype=object)
+    if not shapely.coverage_is_valid(geometries):
+        return None
+    if shapely.get_num_coordinates(geometries).max() <= max_vertices:
+        return list(geometries), 0.0
+
+    west, south, east, north = shapely.total_bounds(geometries)
+    low, high = 0.0, max(east - west, north - south)
+    best = shapely.coverage_simplify(geometries, high)
+    best_tolerance = high
+    for _ in range(max_iterations):
+        tolerance = (low + high) / 2
+        candidate = shapely.coverage_simplify(geometries, tolerance)
+        if shapely.get_num_coordinates(candidate).max() <= max_vertices:
+            best, best_tolerance, high = candidate, tolerance, tolerance
+        else:
+            low = tolerance
+        if high - low <= high * 1e-3:
+            break
+    return list(best), best_tolerance
+
+
+def load_aoi_features(path, mode="each", max_vertices=None):
+    """Loads every feature of a KML/GeoJSON/shapefile as one AOI each, or their union as a single AOI.
+
+    Each AOI is simplified to the vertex budget and returned as
+    {"name", "geometry" (GeoJSON), "properties", "stats"}, where stats holds the
+    vertex count and encoded bytes before and after plus the tolerance used.
+    In "each" mode, polygons that tile the area without overlapping (e.g.
+    neighbouring districts) are simplified as one coverage so their shared
+    borders stay shared; overlapping features are simplified one by one, which
+    can open small gaps or overlaps along common edges.
+    """
+    import shapely
+
+    if mode not in ("each", "union"):
+        raise ValueError(f"❌ Unknown AOI mode '{mode}'; use 'each' or 'union'.")
+
+    def build(name, geometry, properties, simplified=None, tolerance=None):
+        before = geometry_stats(geometry)
+        if simplified is None:
+            simplified, tolerance = simplify_to_vertex_budget(geometry, max_vertices)
+        after = geometry_stats(simplified)
+        return {
+            "name": name,
+            "geometry": shapely.geometry.mapping(simplified),
+            "properties": properties,
+            "stats": {
+                "vertices_before": before["vertices"],
+                "vertices_after": after["vertices"],
+                "bytes_before": before["bytes"],
+                "bytes_after": after["bytes"],
+                "tolerance": tolerance,
+            },
+        }
+
+    if mode == "each":
+        features = list(iter_aoi_features(path))
+        coverage = None
+        if max_vertices is not None and len(features) > 1:
+            coverage = simplify_coverage_to_vertex_budget([f[1] for f in features], max_vertices)
+        if coverage is None:
+            return [build(name, geometry, properties) for name, geometry, properties in features]
+        simplified, tolerance = coverage
+        return [
+            build(name, geometry, properties, simplified_geometry, tolerance)
+            for (name, geometry, properties), simplified_geometry in zip(features, simplified)
+        ]
+
+    # Union in bounded batches so that only one batch of raw geometries is held at a time.
+    union, batch, names = None, [], []
+    for name, geometry, _ in iter_aoi_features(path):
+        batch.append(geometry)
+        names.append(name)
+        if len(batch) >= 256:
+            union = shapely.union_all(batch + ([union] if union is not None else []))
+            batch = []
+    if batch:
+        union = shapely.union_all(batch + ([union] if union is not None else []))
+    if union is None:
+        raise ValueError(f"❌ No features with a geometry in {path}.")
+    return [build("union", union, {"features": len(names)})]
+
+
+def load_aoi_geometry(path, max_vertices=None):
+    """Loads the union of all features in a file as one ee.Geometry within the vertex budget."""
+    aoi = load_aoi_features(path, mode="union", max_vertices=max_vertices)[0]
+    return ee.Geometry(aoi["geometry"]), dict(aoi["stats"], features=aoi["properties"]["features"])
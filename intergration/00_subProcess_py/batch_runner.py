@@ -0,0 +1,211 @@
+# cassie/src/batch_runner.py
+
+import csv
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import ee
+
+from deferred_results import DeferredResults
+from flood_frequency_analysis import calculate_flood_frequency
+from flood_prone_area_detection import flood_prone_mask_area
+from flooded_building_analysis import analyze_flooded_buildings
+from lulc_flooded_area_analysis import analyze_lulc_flooded_area
+from resilient_execution import classify_error, TRANSIENT
+from index import DEFAULT_START_DATE, DEFAULT_END_DATE, DEFAULT_THRESHOLD, load_datasets
+
+
+class TokenBucket:
+    """Thread-safe token bucket: allows `rate` acquisitions per second with bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        if not rate > 0:
+            raise ValueError(f"❌ Rate must be greater than 0, got {rate}.")
+        self.rate = rate
+        self.capacity = max(1, rate) if capacity is None else capacity
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _aoi(name, geometry, properties, defaults):
+    def value(key):
+        # Only missing or blank values fall back, so a threshold of 0 is kept.
+        v = properties.get(key)
+        return defaults[key] if v is None or v == "" else v
+
+    return {
+        "name": name,
+        "geometry": geometry,
+        "start_date": value("start_date"),
+        "end_date": value("end_date"),
+        "low_lying_threshold": float(value("low_lying_threshold")),
+    }
+
+
+def load_aois(path, defaults=None, max_vertices=None):
+    """Reads AOIs with optional per-AOI start_date/end_date/low_lying_threshold from GeoJSON, KML, shapefile or CSV.
+
+    CSV rows need a `bbox` ("west,south,east,north") or a `wkt` column. Feature
+    files are streamed with aoi_utils and each geometry is simplified to
+    max_vertices vertices.
+    """
+    defaults = dict({
+        "start_date": DEFAULT_START_DATE,
+        "end_date": DEFAULT_END_DATE,
+        "low_lying_threshold": DEFAULT_THRESHOLD,
+    }, **(defaults or {}))
+    lower = path.lower()
+
+    if lower.endswith(".csv"):
+        aois = []
+        with open(path, newline="") as f:
+            for i, row in enumerate(csv.DictReader(f)):
+                if row.get("bbox"):
+                    west, south, east, north = (float(v) for v in row["bbox"].split(","))
+                    geometry = {
+                        "type": "Polygon",
+                        "coordinates": [[[west, south], [east, south], [east, north], [west, north], [west, south]]],
+                    }
+                else:
+                    from shapely import wkt
+                    geometry = wkt.loads(row["wkt"]).__geo_interface__
+                aois.append(_aoi(row.get("name") or f"aoi_{i}", geometry, row, defaults))
+        return aois
+
+    from aoi_utils import load_aoi_features
+
+    return [
+        _aoi(aoi["name"], aoi["geometry"], aoi["properties"], defaults)
+        for aoi in load_aoi_features(path, mode="each", max_vertices=max_vertices)
+    ]
+
+
+def analyze_aoi(aoi):
+    """Runs the flood pipeline for one AOI and fetches its numbers in a single round trip."""
+    roi = ee.Geometry(aoi["geometry"])
+    start = ee.Date(aoi["start_date"])
+    end = ee.Date(aoi["end_date"])
+
+    jrc, srtm, worldcover, buildings = load_datasets(roi, start, end)
+
+    deferred = DeferredResults()
+    flood_frequency = calculate_flood_frequency(jrc)
+    flood_prone_area = flood_prone_mask_area(flood_frequency, srtm, aoi["low_lying_threshold"])
+    total, flooded, _, _ = analyze_flooded_buildings(flood_prone_area, buildings, roi, deferred=deferred)
+    lulc = analyze_lulc_flooded_area(flood_prone_area, worldcover, roi, deferred=deferred)
+    deferred.resolve()
+
+    return {
+        "total_buildings": total.value,
+        "flooded_building_count": flooded.value,
+        "lulc_areas": lulc.value,
+    }
+
+
+def run_batch(aois, process=analyze_aoi, max_concurrency=8, rate=2.0, burst=None,
+              retries=3, backoff=2.0):
+    """Runs `process` over many AOIs concurrently and yields one result row per AOI as it finishes.
+
+    At most max_concurrency AOIs run at once, attempts are throttled by a token
+    bucket of `rate` starts per second, and transient failures (rate limits,
+    unavailable service) are retried with exponential backoff. Any other error,
+    or a transient one that outlasts the retries, is reported with status "error".
+    """
+    bucket = TokenBucket(rate, burst)
+
+    def attempt(aoi):
+        started = time.perf_counter()
+        for attempt_number in range(1, retries + 2):
+            bucket.acquire()
+            try:
+                result = process(aoi)
+                status, error = "ok", None
+                break
+            except Exception as e:
+                result, status, error = None, "error", f"{type(e).__name__}: {e}"
+                if attempt_number > retries or classify_error(e) != TRANSIENT:
+                    break
+                time.sleep(backoff ** (attempt_number - 1))
+        return {
+            "name": aoi["name"],
+            "start_date": aoi["start_date"],
+            "end_date": aoi["end_date"],
+            "low_lying_threshold": aoi["low_lying_threshold"],
+            "status": status,
+            "attempts": attempt_number,
+            "error": error,
+            "elapsed_s": round(time.perf_counter() - started, 3),
+            "result": result,
+        }
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        futures = [pool.submit(attempt, aoi) for aoi in aois]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the flood analysis over a list of AOIs.")
+    parser.add_argument("aois", help="GeoJSON, KML or CSV file with one AOI per feature/row")
+    parser.add_argument("--out", default="-", help="JSON-lines output file ('-' for stdout)")
+    parser.add_argument("--start-date", default=DEFAULT_START_DATE)
+    parser.add_argument("--end-date", default=DEFAULT_END_DATE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Default low-lying threshold (m)")
+    parser.add_argument("--max-vertices", type=int, default=5000,
+                        help="Simplify each AOI geometry to at most this many vertices (0 keeps them as is)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=2.0, help="Maximum AOI starts per second")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--project", default="servir-ee")
+    args = parser.parse_args(argv)
+    if args.rate <= 0:
+        parser.error("--rate must be greater than 0")
+
+    aois = load_aois(args.aois, {
+        "start_date": args.start_date,
+        "end_date": args.end_date,
+        "low_lying_threshold": args.threshold,
+    }, max_vertices=args.max_vertices or None)
+    ee.Initialize(project=args.project)
+    print(f"✅ Earth Engine initialized. Running {len(aois)} AOIs...", file=sys.stderr)
+
+    out = open(args.out, "w") if args.out != "-" else None
+    started = time.perf_counter()
+    done = failed = 0
+    try:
+        for row in run_batch(aois, max_concurrency=args.concurrency, rate=args.rate, retries=args.retries):
+            line = json.dumps(row, ensure_ascii=False, default=str)
+            if out:
+                out.write(line + "\n")
+                out.flush()
+            else:
+                print(line, flush=True)
+            done += 1
+            failed += row["status"] != "ok"
+            print(f"⏳ {done}/{len(aois)} done ({failed} failed) - {row['name']}: {row['status']}", file=sys.stderr)
+    finally:
+        if out:
+            out.close()
+    print(f"✅ Batch finished in {time.perf_counter() - started:.1f} s ({failed} failed).", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+# cassie/src/algorithms/utils/benchmark_suite.py
+"""Offline benchmarks of the flood stage modules against the recording fake ee backend.
+
+    python benchmark_suite.py                      # compare against stored baselines
+    python benchmark_suite.py --update-baselines   # record new baselines
+    python benchmark_suite.py --sizes small --latency 0
+
+Each stage reports wall time (including simulated round-trip latency), the
+number of getInfo round trips, their JSON payload bytes and peak traced memory.
+A stage regresses when it makes more round trips than its baseline, or when its
+payload, time or memory grows beyond the tolerances; the process then exits 1.
+The start-up cost of index.py (import and --help) is timed the same way.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+
+from testing import fake_ee
+
+SIZES = {
+    "small": {"size": 64, "months": 24, "buildings": 500},
+    "medium": {"size": 192, "months": 120, "buildings": 5000},
+    "large": {"size": 384, "months": 240, "buildings": 20000},
+}
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baselines.json")
+
+LOW_LYING_THRESHOLD = 10
+
+
+def _write_kml(path, bbox):
+    west, south, east, north = bbox
+    ring = " ".join(f"{x},{y}" for x, y in [(west, south), (east, south), (east, north), (west, north), (west, south)])
+    with open(path, "w") as f:
+        f.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<kml xmlns="http://www.opengis.net/kml/2.2"><Document><Placemark><name>aoi</name>'
+            f'<Polygon><outerBoundaryIs><LinearRing><coordinates>{ring}</coordinates>'
+            '</LinearRing></outerBoundaryIs></Polygon></Placemark></Document></kml>\n'
+        )
+
+
+def stage_flood_frequency(ee, ctx):
+    from flood_frequency_analysis import calculate_flood_frequency
+
+    jrc = ee.ImageCollection("JRC/GSW1_4/MonthlyHistory").filterBounds(ctx["roi"]).filterDate(
+        "1984-03-01", "2030-01-01")
+    ctx["flood_frequency"] = calculate_flood_frequency(jrc)
+
+
+def stage_flood_prone_area(ee, ctx):
+    from flood_prone_area_detection import detect_flood_prone_areas
+
+    srtm = ee.Image("USGS/SRTMGL1_003").clip(ctx["roi"])
+    ctx["flood_prone_area"], ctx["flood_prone_fc"] = detect_flood_prone_areas(
+        ctx["flood_frequency"], srtm, LOW_LYING_THRESHOLD, ctx["roi"])
+
+
+def stage_flooded_buildings(ee, ctx):
+    from flooded_building_analysis import analyze_flooded_buildings
+
+    buildings = ee.FeatureCollection("GOOGLE/Research/open-buildings/v3/polygons")
+    total, flooded, _, _ = analyze_flooded_buildings(ctx["flood_prone_area"], buildings, ctx["roi"])
+    ctx["building_counts"] = (total, flooded)
+
+
+def stage_lulc_areas(ee, ctx):
+    from lulc_flooded_area_analysis import analyze_lulc_flooded_area
+
+    worldcover = ee.ImageCollection("ESA/WorldCover/v200").first().select("Map")
+    ctx["lulc_areas"] = analyze_lulc_flooded_area(ctx["flood_prone_area"], worldcover, ctx["roi"])
+
+
+def stage_aoi(ee, ctx):
+    from aoi_utils import load_aoi_geometry
+
+    with tempfile.TemporaryDirectory() as tmp:
+        kml_path = os.path.join(tmp, "aoi.kml")
+        _write_kml(kml_path, ee.backend.bbox())
+        load_aoi_geometry(kml_path, max_vertices=5000)
+
+
+STAGES = [
+    ("flood_frequency", stage_flood_frequency),
+    ("flood_prone_area", stage_flood_prone_area),
+    ("flooded_buildings", stage_flooded_buildings),
+    ("lulc_areas", stage_lulc_areas),
+    ("aoi", stage_aoi),
+]
+
+
+STARTUP_COMMANDS = {
+    "import_index": ["-c", "import index"],
+    "cli_help": ["index.py", "--help"],
+}
+
+
+def measure_startup(repeats=3):
+    """Best-of-`repeats` wall time of fresh interpreters importing index.py and printing --help.
+
+    The bare interpreter start-up is subtracted, so the numbers are the cost of
+    our own imports; neither command may need ee or a network connection.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    def best(args):
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            subprocess.run([sys.executable] + args, cwd=here, check=True, capture_output=True)
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    interpreter = best(["-c", "pass"])
+    return {
+        name: {"wall_s": round(max(best(args) - interpreter, 0.0), 4)}
+        for name, args in STARTUP_COMMANDS.items()
+    }
+
+
+def run_size(name, size_params, latency_s=0.05, seed=0):
+    """Runs every stage on one synthetic dataset size; returns {stage: metrics}."""
+    backend = fake_ee.FakeBackend(latency_s=latency_s, seed=seed, **size_params)
+    ee = fake_ee.install(backend)
+    ctx = {"roi": ee.Geometry.BBox(*backend.bbox())}
+
+    results = {}
+    for stage, func in STAGES:
+        backend.reset_counters()
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            func(ee, ctx)
+        except ImportError as e:
+            tracemalloc.stop()
+            results[stage] = {"skipped": f"missing dependency: {e.name}"}
+            continue
+        wall_s = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[stage] = {
+            "wall_s": round(wall_s, 4),
+            "round_trips": backend.round_trips,
+            "payload_bytes": backend.payload_bytes,
+            "peak_mb": round(peak / 1e6, 2),
+        }
+    return results
+
+
+def compare(results, baselines, time_tolerance=2.0, memory_tolerance=1.5, payload_tolerance=1.1):
+    """Lists human-readable regressions of results against baselines."""
+    regressions = []
+    for size, stages in results.items():
+        for stage, metrics in stages.items():
+            base = baselines.get(size, {}).get(stage)
+            if base is None or "skipped" in metrics or "skipped" in base:
+                continue
+            label = f"{size}/{stage}"
+            checks = [
+                ("round_trips", "round trips", 1.0, 0),
+                ("payload_bytes", "payload bytes", payload_tolerance, 0),
+                ("wall_s", "wall time s", time_tolerance, 0.05),
+                ("peak_mb", "peak memory MB", memory_tolerance, 1),
+            ]
+            for key, name, factor, slack in checks:
+                if key in metrics and key in base and metrics[key] > base[key] * factor + slack:
+                    regressions.append(f"{label}: {name} {base[key]} -> {metrics[key]}")
+    return regressions
+
+
+def format_table(results):
+    lines = [f"{'size':<8}{'stage':<20}{'wall s':>9}{'trips':>7}{'payload B':>11}{'peak MB':>9}"]
+    for size, stages in results.items():
+        for stage, m in stages.items():
+            if "skipped" in m:
+                lines.append(f"{size:<8}{stage:<20}  skipped ({m['skipped']})")
+            elif "round_trips" not in m:
+                lines.append(f"{size:<8}{stage:<20}{m['wall_s']:>9.3f}")
+            else:
+                lines.append(f"{size:<8}{stage:<20}{m['wall_s']:>9.3f}{m['round_trips']:>7}"
+                             f"{m['payload_bytes']:>11}{m['peak_mb']:>9.1f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the flood stage modules offline.")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated seconds per round trip.")
+    parser.add_argument("--baselines", default=BASELINE_PATH)
+    parser.add_argument("--update-baselines", action="store_true")
+    parser.add_argument("--time-tolerance", type=float, default=2.0)
+    parser.add_argument("--memory-tolerance", type=float, default=1.5)
+    parser.add_argument("--skip-startup", action="store_true", help="Do not time index.py imports and --help.")
+    args = parser.parse_args(argv)
+
+    results = {}
+    if not args.skip_startup:
+        results["startup"] = measure_startup()
+    results.update({size: run_size(size, SIZES[size], latency_s=args.latency) for size in args.sizes})
+    print(format_table(results))
+
+    baselines = {}
+    if os.path.exists(args.baselines):
+        with open(args.baselines) as f:
+            baselines = json.load(f)
+
+    if args.update_baselines:
+        baselines.update(results)
+        with open(args.baselines, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"✅ Baselines written to {args.baselines}")
+        return 0
+
+    if not baselines:
+        print("⚠️ No baselines found; run with --update-baselines to record them.")
+        return 0
+
+    regressions = compare(results, baselines, args.time_tolerance, args.memory_tolerance)
+    if regressions:
+        print("❌ Performance regressions:", file=sys.stderr)
+        for line in regressions:
+            print(f"   {line}", file=sys.stderr)
+        return 1
+    print("✅ No regressions against baselines.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+# cassie/src/algorithms/utils/deferred_results.py
+
+import ee
+
+
+class Deferred:
+    """Placeholder for a server-side value that is fetched later by DeferredResults.resolve()."""
+
+    def __init__(self, name, transform=None):
+        self.name = name
+        self._transform = transform
+        self._resolved = False
+        self._value = None
+
+    def _set(self, value):
+        self._value = self._transform(value) if self._transform else value
+        self._resolved = True
+
+    @property
+    def resolved(self):
+        return self._resolved
+
+    @property
+    def value(self):
+        if not self._resolved:
+            raise RuntimeError(f"❌ '{self.name}' has not been fetched yet; call resolve() first.")
+        return self._value
+
+    def __repr__(self):
+        state = repr(self._value) if self._resolved else "pending"
+        return f"Deferred({self.name}={state})"
+
+
+class DeferredResults:
+    """Collects the scalar values a run needs and fetches them with a single getInfo() call.
+
+    Stages call register() instead of getInfo(); resolve() packs every pending
+    value into one ee.Dictionary and fetches it in one round trip.
+    """
+
+    def __init__(self, ee_module=None):
+        self._ee = ee_module or ee
+        self._pending = {}
+        self._handles = {}
+        self.round_trips = 0
+        self.values_fetched = 0
+
+    def register(self, name, value, transform=None):
+        """Registers a server-side value under a unique name and returns its Deferred handle."""
+        if name in self._handles:
+            raise ValueError(f"❌ A deferred value named '{name}' is already registered.")
+        handle = Deferred(name, transform)
+        self._handles[name] = handle
+        self._pending[name] = value
+        return handle
+
+    def resolve(self):
+        """Fetches every pending value in one round trip and returns {name: value}."""
+        if self._pending:
+            fetched = self._ee.Dictionary(self._pending).getInfo()
+            self.round_trips += 1
+            self.values_fetched += len(self._pending)
+            for name in self._pending:
+                self._handles[name]._set(fetched.get(name))
+            self._pending = {}
+        return {name: handle.value for name, handle in self._handles.items()}
+
+    @property
+    def round_trips_saved(self):
+        """Number of getInfo() round trips avoided compared with fetching each value on its own."""
+        return self.values_fetched - self.round_trips
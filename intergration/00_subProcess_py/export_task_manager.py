@@ -0,0 +1,275 @@
+# cassie/src/algorithms/utils/export_task_manager.py
+
+import json
+import time
+import asyncio
+import hashlib
+
+import ee
+
+SUCCEEDED_STATES = {"COMPLETED", "SUCCEEDED"}
+FAILED_STATES = {"FAILED", "CANCELLED"}
+
+
+class ExportTaskError(RuntimeError):
+    """An export task that failed, was cancelled, timed out or could not be polled."""
+
+    def __init__(self, description, state, message=None):
+        super().__init__(f"❌ Export '{description}' ended in state {state}: {message or 'no details'}")
+        self.description = description
+        self.state = state
+
+
+class EETaskService:
+    """Starts Earth Engine table exports to Drive or Cloud Storage and reads their status.
+
+    A task service needs fingerprint(collection, params), start(collection,
+    params) -> task id, statuses(task_ids) -> [{"state", "error_message",
+    "destination_uris"}] in the same order, and download(task_id, params,
+    status, path); testing.fake_ee.FakeTaskService implements the same interface
+    for offline runs. With a bucket, tables are exported to
+    gs://bucket/<description>.<ext> and download() copies that finished file;
+    Drive exports cannot be downloaded from here.
+    """
+
+    def __init__(self, ee_module=None, bucket=None):
+        self._ee = ee_module or ee
+        self.bucket = bucket
+
+    def fingerprint(self, collection, params):
+        """Hashes the serialized collection and export parameters (identical exports share it)."""
+        payload = json.dumps([self._ee.serializer.toJSON(collection), params, self.bucket],
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def start(self, collection, params):
+        if self.bucket:
+            params = {k: v for k, v in params.items() if k != "folder"}
+            task = self._ee.batch.Export.table.toCloudStorage(
+                collection=collection, bucket=self.bucket, fileNamePrefix=params["description"], **params)
+        else:
+            task = self._ee.batch.Export.table.toDrive(collection=collection, **params)
+        task.start()
+        return task.id
+
+    def statuses(self, task_ids):
+        """Status of many tasks with one getTaskStatus call."""
+        return self._ee.data.getTaskStatus(list(task_ids))
+
+    def download(self, task_id, params, status, path):
+        """Copies the finished Cloud Storage export to path (the table is not computed again)."""
+        if not self.bucket:
+            raise ValueError("❌ Only Cloud Storage exports can be downloaded; set a bucket.")
+        from google.cloud import storage
+
+        blob_name = f"{params['description']}.{params['fileFormat'].lower()}"
+        storage.Client().bucket(self.bucket).blob(blob_name).download_to_filename(path)
+        return path
+
+
+def _failed(future):
+    """True for a future that was cancelled or finished with an exception."""
+    return future.done() and (future.cancelled() or future.exception() is not None)
+
+
+class _Export:
+    def __init__(self, description, collection, params, download_path, future, poll_interval):
+        self.description = description
+        self.collection = collection
+        self.params = params
+        self.download_path = download_path
+        self.future = future
+        self.task_id = None
+        self.state = "SUBMITTED"
+        self.interval = poll_interval
+        self.next_poll = time.monotonic() + poll_interval
+        self.submitted = time.monotonic()
+        self.polls = 0
+        self.status_errors = 0
+
+
+class ExportTaskManager:
+    """Submits export tasks and polls all of them on one asyncio loop with exponential backoff.
+
+    submit() returns an asyncio.Future per export that resolves to a result dict
+    (task id, state, destination URIs and local path when a download was asked
+    for) or fails with ExportTaskError. Identical exports that are in flight or
+    already done share one task and one future; failed ones are resubmitted.
+    Every task that is due, or due within poll_interval, is polled with one
+    batched status call (up to status_batch_size tasks each), and blocking service calls run in worker
+    threads, so hundreds of tasks are polled without blocking the loop.
+    """
+
+    def __init__(self, service=None, poll_interval=5.0, max_interval=60.0, backoff=2.0,
+                 timeout_s=None, max_status_errors=5, on_event=None, status_batch_size=100):
+        self.service = service or EETaskService()
+        self.status_batch_size = status_batch_size
+        self.poll_interval = poll_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.timeout_s = timeout_s
+        self.max_status_errors = max_status_errors
+        self.on_event = on_event
+        self._exports = {}
+        self._wakeup = None
+        self._poller = None
+        self._closed = False
+        self.deduplicated = 0
+
+    def _notify(self, export, event, **fields):
+        if self.on_event is not None:
+            self.on_event(dict({"event": event, "description": export.description,
+                                "task_id": export.task_id, "state": export.state}, **fields))
+
+    async def submit(self, description, collection, folder="FloodAnalysis", file_format="GeoJSON",
+                     download_path=None, **params):
+        """Starts (or reuses) an export and returns the future of its result."""
+        params = dict(params, description=description, folder=folder, fileFormat=file_format)
+        key = self.service.fingerprint(collection, params)
+        existing = self._exports.get(key)
+        if existing is not None and not _failed(existing.future):
+            self.deduplicated += 1
+            return existing.future
+
+        loop = asyncio.get_running_loop()
+        export = _Export(description, collection, params, download_path, loop.create_future(),
+                         self.poll_interval)
+        self._exports[key] = export
+        try:
+            export.task_id = await asyncio.to_thread(self.service.start, collection, params)
+        except Exception as e:
+            export.state = "FAILED"
+            export.future.set_exception(ExportTaskError(description, "FAILED", f"could not start: {e}"))
+            return export.future
+        export.state = "READY"
+        self._notify(export, "export_started")
+
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll_loop())
+        return export.future
+
+    def _pending(self):
+        return [e for e in self._exports.values() if e.task_id is not None and not e.future.done()]
+
+    async def _poll_loop(self):
+        # The closed flag (not only cancel()) stops the loop: wait_for can swallow a
+        # cancellation that races with the wakeup event being set.
+        while not self._closed:
+            pending = self._pending()
+            if not pending:
+                return
+            delay = max(0.0, min(e.next_poll for e in pending) - time.monotonic())
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                continue  # a new export arrived; recompute the next deadline
+            except asyncio.TimeoutError:
+                pass
+
+            if self._closed:
+                return
+            # Tasks due within one base interval are polled early, in the same status call.
+            horizon = time.monotonic() + self.poll_interval
+            due = [e for e in self._pending() if e.next_poll <= horizon]
+            batches = [due[i:i + self.status_batch_size] for i in range(0, len(due), self.status_batch_size)]
+            await asyncio.gather(*(self._poll_batch(batch) for batch in batches))
+
+    async def _poll_batch(self, exports):
+        try:
+            statuses = await asyncio.to_thread(self.service.statuses, [e.task_id for e in exports])
+        except Exception as e:
+            statuses = [e] * len(exports)
+        await asyncio.gather(*(self._poll(export, status) for export, status in zip(exports, statuses)))
+
+    async def _poll(self, export, status):
+        export.polls += 1
+        if isinstance(status, Exception):
+            export.status_errors += 1
+            if export.status_errors >= self.max_status_errors:
+                self._fail(export, "UNKNOWN", f"status polling failed {export.status_errors} times: {status}")
+                return
+            status = {"state": export.state}
+        else:
+            export.status_errors = 0
+
+        state = status.get("state", export.state)
+        if state != export.state:
+            export.state = state
+            self._notify(export, "export_state", polls=export.polls)
+
+        if state in SUCCEEDED_STATES:
+            await self._complete(export, status)
+        elif state in FAILED_STATES:
+            self._fail(export, state, status.get("error_message"))
+        elif self.timeout_s is not None and time.monotonic() - export.submitted > self.timeout_s:
+            self._fail(export, state, f"timed out after {self.timeout_s} s")
+        else:
+            export.next_poll = time.monotonic() + export.interval
+            export.interval = min(export.interval * self.backoff, self.max_interval)
+
+    async def _complete(self, export, status):
+        result = {
+            "description": export.description,
+            "task_id": export.task_id,
+            "state": export.state,
+            "destination_uris": status.get("destination_uris", []),
+            "polls": export.polls,
+            "local_path": None,
+        }
+        if export.download_path:
+            try:
+                result["local_path"] = await asyncio.to_thread(
+                    self.service.download, export.task_id, export.params, status, export.download_path)
+            except Exception as e:
+                self._fail(export, export.state, f"download failed: {e}")
+                return
+        export.future.set_result(result)
+        self._notify(export, "export_done", local_path=result["local_path"])
+
+    def _fail(self, export, state, message):
+        export.state = state
+        export.future.set_exception(ExportTaskError(export.description, state, message))
+        self._notify(export, "export_failed", error=message)
+
+    async def wait_all(self):
+        """Waits for every submitted export; returns {description: result or ExportTaskError}."""
+        exports = list(self._exports.values())
+        outcomes = await asyncio.gather(*(e.future for e in exports), return_exceptions=True)
+        return {e.description: outcome for e, outcome in zip(exports, outcomes)}
+
+    async def close(self):
+        """Stops polling without waiting for the remaining tasks (they keep running server-side)."""
+        self._closed = True
+        if self._poller is not None and not self._poller.done():
+            self._poller.cancel()
+            try:
+                await self._poller
+            except asyncio.CancelledError:
+                pass
+
+
+def run_exports(exports, service=None, wait=True, **manager_options):
+    """Synchronous helper: submits (description, collection, options) exports and optionally waits.
+
+    Returns {description: result, ExportTaskError or task id (when not waiting)}.
+    """
+    def outcome(export):
+        if not export.future.done():
+            return export.task_id
+        if export.future.cancelled():
+            return ExportTaskError(export.description, "CANCELLED", "the export was cancelled")
+        return export.future.exception() or export.future.result()
+
+    async def main():
+        manager = ExportTaskManager(service, **manager_options)
+        for description, collection, options in exports:
+            await manager.submit(description, collection, **options)
+        if wait:
+            return await manager.wait_all()
+        await manager.close()
+        return {e.description: outcome(e) for e in manager._exports.values()}
+
+    return asyncio.run(main())
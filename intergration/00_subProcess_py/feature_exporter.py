@@ -0,0 +1,231 @@
+# cassie/src/algorithms/utils/feature_exporter.py
+
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import ee
+
+
+class EEFeatureSource:
+    """Pages through an ee.FeatureCollection with toList(count, offset) slices.
+
+    The server computes a toList slice by walking the collection up to the
+    offset, so each page costs O(offset + count) and a full export O(n² /
+    page_size) server work. Pages are independent, which is what lets
+    export_features fetch several at once; for collections of many pages, a
+    larger page_size keeps the repeated walk down.
+    """
+
+    def __init__(self, collection, ee_module=None):
+        self._ee = ee_module or ee
+        self.collection = collection
+
+    def size(self):
+        return self.collection.size().getInfo()
+
+    def page(self, offset, count):
+        """Returns the GeoJSON features in [offset, offset + count); O(offset) on the server."""
+        page = self._ee.FeatureCollection(self.collection.toList(count, offset))
+        return page.getInfo()["features"]
+
+
+class GeoJSONSeqWriter:
+    """Writes newline-delimited GeoJSON features (RFC 8142 without record separators)."""
+
+    def __init__(self, path):
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, features):
+        for feature in features:
+            self._file.write(json.dumps(feature, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+def _property_type(value):
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    return "str"
+
+
+def _widen(current, value_type):
+    """The narrowest type holding both: int and float widen to float, any other mix to str."""
+    if current is None or current == value_type:
+        return value_type
+    if {current, value_type} == {"int", "float"}:
+        return "float"
+    return "str"
+
+
+def _convert(value, value_type):
+    if value is None:
+        return None
+    if value_type == "float":
+        return float(value)
+    if value_type == "str" and not isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list)) else str(value)
+    return value
+
+
+class _SpooledWriter:
+    """Spools pages to a GeoJSONSeq file next to `path` while widening the property types.
+
+    Fixed-schema formats need every column and its type before the first row;
+    the features of later pages can add properties or change an int to a float,
+    so the real file is only written on close(), reading the spool back in
+    batches of batch_size with the schema of all pages. Properties that are
+    None on every feature are written as strings. With no features at all the
+    file is still written, with only a geometry column, so readers find a valid
+    empty layer.
+    """
+
+    def __init__(self, path, batch_size=1000):
+        self._path = path
+        self._spool_path = path + ".spool"
+        self._spool = open(self._spool_path, "w", encoding="utf-8")
+        self._batch_size = batch_size
+        self._types = {}
+
+    def write(self, features):
+        for feature in features:
+            for key, value in (feature.get("properties") or {}).items():
+                current = self._types.get(key)
+                self._types[key] = current if value is None else _widen(current, _property_type(value))
+            self._spool.write(json.dumps(feature, ensure_ascii=False) + "\n")
+
+    def _batches(self):
+        batch = []
+        with open(self._spool_path, encoding="utf-8") as f:
+            for line in f:
+                batch.append(json.loads(line))
+                if len(batch) >= self._batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    def _records(self, batch):
+        types = {key: value_type or "str" for key, value_type in self._types.items()}
+        return [
+            (feature["geometry"], {key: _convert((feature.get("properties") or {}).get(key), value_type)
+                                   for key, value_type in types.items()})
+            for feature in batch
+        ]
+
+    def close(self):
+        import os
+
+        self._spool.close()
+        try:
+            self._write_file()
+        finally:
+            os.remove(self._spool_path)
+
+
+class FlatGeobufWriter(_SpooledWriter):
+    """Writes features to FlatGeobuf with fiona, using the property types of every page."""
+
+    def _write_file(self):
+        import fiona
+
+        properties = {key: value_type or "str" for key, value_type in self._types.items()}
+        schema = {"geometry": "Unknown", "properties": properties}
+        with fiona.open(self._path, "w", driver="FlatGeobuf", schema=schema, crs="EPSG:4326") as collection:
+            for batch in self._batches():
+                collection.writerecords(
+                    {"geometry": geometry, "properties": properties}
+                    for geometry, properties in self._records(batch)
+                )
+
+
+ARROW_TYPES = {"bool": "bool_", "int": "int64", "float": "float64", "str": "string"}
+
+
+class GeoParquetWriter(_SpooledWriter):
+    """Writes features to GeoParquet (WKB geometry), one row group per batch, with the types of every page."""
+
+    def _write_file(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        import shapely
+
+        geo = {
+            "version": "1.0.0",
+            "primary_column": "geometry",
+            "columns": {"geometry": {"encoding": "WKB", "geometry_types": []}},
+        }
+        schema = pa.schema(
+            [(key, getattr(pa, ARROW_TYPES[value_type or "str"])()) for key, value_type in self._types.items()]
+            + [("geometry", pa.binary())],
+            metadata={b"geo": json.dumps(geo).encode("utf-8")},
+        )
+        with pq.ParquetWriter(self._path, schema) as writer:
+            for batch in self._batches():
+                records = self._records(batch)
+                geometries = shapely.from_geojson([json.dumps(geometry) for geometry, _ in records])
+                rows = [dict(properties, geometry=wkb)
+                        for (_, properties), wkb in zip(records, shapely.to_wkb(geometries))]
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+
+
+WRITERS = {
+    "geojsonseq": GeoJSONSeqWriter,
+    "flatgeobuf": FlatGeobufWriter,
+    "geoparquet": GeoParquetWriter,
+}
+
+EXTENSIONS = {
+    ".geojsonl": "geojsonseq",
+    ".geojsons": "geojsonseq",
+    ".geojsonseq": "geojsonseq",
+    ".ndjson": "geojsonseq",
+    ".fgb": "flatgeobuf",
+    ".parquet": "geoparquet",
+    ".geoparquet": "geoparquet",
+}
+
+
+def export_features(source, path, file_format=None, page_size=1000, max_in_flight=4, total=None):
+    """Streams every feature of a paged source to a local file and returns the number written.
+
+    `source` needs page(offset, count) (and size() unless total is given); wrap an
+    ee.FeatureCollection in EEFeatureSource. Up to max_in_flight pages are fetched
+    at once and written in order as they arrive, so memory use is bounded by
+    max_in_flight * page_size features regardless of collection size. An empty
+    source still produces a valid, empty file in every format.
+    """
+    if file_format is None:
+        extension = "." + path.rsplit(".", 1)[-1].lower()
+        if extension not in EXTENSIONS:
+            raise ValueError(f"❌ Cannot infer export format from '{path}'; pass file_format.")
+        file_format = EXTENSIONS[extension]
+
+    total = source.size() if total is None else total
+    offsets = iter(range(0, total, page_size))
+    writer = WRITERS[file_format](path)
+    written = 0
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+            in_flight = deque()
+            for offset in offsets:
+                in_flight.append(pool.submit(source.page, offset, min(page_size, total - offset)))
+                if len(in_flight) >= max_in_flight:
+                    break
+            while in_flight:
+                features = in_flight.popleft().result()
+                writer.write(features)
+                written += len(features)
+                offset = next(offsets, None)
+                if offset is not None:
+                    in_flight.append(pool.submit(source.page, offset, min(page_size, total - offset)))
+    finally:
+        writer.close()
+
+    return written
@@ -2,8 +2,10 @@
 
 import ee
 
-def calculate_flood_frequency(collection):
-    """Calculates the flood frequency from a JRC water history collection."""
+from frequency_cube import cube_groups
+
+def calculate_flood_counts(collection):
+    """Sums valid observations and water observations of a JRC water history collection."""
     def add_bands(img):
         obs = img.gt(0).rename("obs")
         water = img.select("water").eq(2).rename("water")
@@ -12,5 +14,66 @@ def calculate_flood_frequency(collection):
     collection = collection.map(add_bands)
     total_obs = collection.select("obs").sum().rename("total_obs")
     total_water = collection.select("water").sum().rename("total_water")
+    return total_obs, total_water
+
+
+def shift_flood_counts(total_obs, total_water, added=None, removed=None):
+    """Updates stored count images with only the monthly images that entered or left the window.
+
+    total_obs/total_water are previously exported count images (e.g. an asset);
+    added/removed are the JRC collections of months to fold in or take out.
+    """
+    for collection, sign in ((added, 1), (removed, -1)):
+        if collection is None:
+            continue
+        obs, water = calculate_flood_counts(collection)
+        obs, water = obs.unmask(0), water.unmask(0)
+        total_obs = total_obs.add(obs) if sign > 0 else total_obs.subtract(obs)
+        total_water = total_water.add(water) if sign > 0 else total_water.subtract(water)
+    return total_obs.rename("total_obs"), total_water.rename("total_water")
+
+
+def calculate_flood_frequency(collection):
+    """Calculates the flood frequency from a JRC water history collection."""
+    total_obs, total_water = calculate_flood_counts(collection)
     flood_frequency = total_water.divide(total_obs).multiply(100).rename("flood_frequency")
-    return flood_frequency.updateMask(flood_frequency.neq(0))
\ No newline at end of file
+    return flood_frequency.updateMask(flood_frequency.neq(0))
+
+
+def calculate_flood_count_cube(collection, group_by=("month",), years=None):
+    """Sums observation and water counts per calendar month and/or year in one pass over the collection.
+
+    Every monthly image is mapped to one-hot count bands (obs_<suffix> and
+    water_<suffix>, non-zero only for the groups its date falls in), so a single
+    sum() produces the counts of every group. Returns (counts, suffixes).
+    """
+    groups = cube_groups(group_by, years)
+
+    def one_hot(img):
+        date = img.date()
+        obs = img.gt(0)
+        water = img.select("water").eq(2)
+        bands = []
+        for field, value, suffix in groups:
+            in_group = ee.Image.constant(ee.Number(date.get(field)).eq(value))
+            bands.append(obs.multiply(in_group).rename(f"obs_{suffix}"))
+            bands.append(water.multiply(in_group).rename(f"water_{suffix}"))
+        return ee.Image.cat(bands)
+
+    return collection.map(one_hot).sum(), [suffix for _, _, suffix in groups]
+
+
+def calculate_flood_frequency_cube(collection, group_by=("month",), years=None):
+    """Flood frequency per calendar month and/or year as one multi-band image (one band per group).
+
+    Bands are named flood_frequency_m01..m12 and/or flood_frequency_y<year>, each
+    masked where the frequency is 0, like calculate_flood_frequency. years is
+    required when grouping by year, e.g. range(start_date.year, end_date.year + 1).
+    """
+    counts, suffixes = calculate_flood_count_cube(collection, group_by, years)
+    bands = []
+    for suffix in suffixes:
+        frequency = counts.select(f"water_{suffix}").divide(counts.select(f"obs_{suffix}")).multiply(100)
+        frequency = frequency.rename(f"flood_frequency_{suffix}")
+        bands.append(frequency.updateMask(frequency.neq(0)))
+    return ee.Image.cat(bands)
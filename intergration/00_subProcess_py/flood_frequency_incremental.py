@@ -0,0 +1,107 @@
+# cassie/src/algorithms/flood_analysis/flood_frequency_incremental.py
+
+import os
+import time
+
+import numpy as np
+
+from flood_frequency_local import (
+    fold_month_file,
+    month_key,
+    open_raster,
+    permanent_water_keep_mask,
+    stream_stats,
+)
+
+
+def month_range(start_month, end_month):
+    """Returns every 'YYYY-MM' month from start_month to end_month inclusive."""
+    year, month = (int(v) for v in start_month.split("-"))
+    end_year, end_mon = (int(v) for v in end_month.split("-"))
+    months = []
+    while (year, month) <= (end_year, end_mon):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def load_flood_counts(state_path):
+    """Loads persisted counters; returns None when no state has been saved yet."""
+    if not os.path.exists(state_path):
+        return None
+    with np.load(state_path) as state:
+        return {
+            "total_obs": state["total_obs"],
+            "total_water": state["total_water"],
+            "months": [str(m) for m in state["months"]],
+            "occurrence": str(state["occurrence"]),
+        }
+
+
+def save_flood_counts(state_path, total_obs, total_water, months, occurrence_path=None):
+    """Persists uint16 total_obs/total_water counters stamped with the months they include."""
+    tmp_path = f"{state_path}.tmp.npz"
+    np.savez_compressed(
+        tmp_path,
+        total_obs=total_obs.astype(np.uint16, copy=False),
+        total_water=total_water.astype(np.uint16, copy=False),
+        months=np.array(sorted(months)),
+        occurrence=np.array(os.path.abspath(occurrence_path) if occurrence_path else ""),
+    )
+    os.replace(tmp_path, state_path)
+
+
+def update_flood_counts(state_path, month_paths, start_month, end_month,
+                        occurrence_path=None, window_rows=512):
+    """Moves persisted flood counters to cover start_month..end_month, folding in only the difference.
+
+    month_paths lists the available monthly rasters (file names carry YYYY_MM).
+    Months newly inside the window are added, months that fell out of it are
+    subtracted, so a monthly refresh reads one raster instead of the whole
+    stack. The state is rebuilt from zero when none exists or when the
+    permanent-water mask changed. Returns (total_obs, total_water, stats).
+    """
+    started = time.perf_counter()
+    available = {month_key(path): path for path in month_paths}
+    target = {month for month in month_range(start_month, end_month) if month in available}
+    if not target:
+        raise ValueError(f"❌ No monthly rasters between {start_month} and {end_month}.")
+
+    state = load_flood_counts(state_path)
+    occurrence = os.path.abspath(occurrence_path) if occurrence_path else ""
+    if state is None or state["occurrence"] != occurrence:
+        reader = open_raster(available[min(target)])
+        shape = reader.shape
+        reader.close()
+        total_obs = np.zeros(shape, dtype=np.uint16)
+        total_water = np.zeros(shape, dtype=np.uint16)
+        current = set()
+    else:
+        total_obs, total_water = state["total_obs"], state["total_water"]
+        current = set(state["months"])
+
+    added = sorted(target - current)
+    removed = sorted(current - target)
+    missing = [month for month in removed if month not in available]
+    if missing:
+        raise ValueError(f"❌ Cannot subtract months whose rasters are gone: {', '.join(missing)}")
+
+    keep = permanent_water_keep_mask(occurrence_path, window_rows) if occurrence_path and (added or removed) else None
+    bytes_read = 0
+    for month in added:
+        bytes_read += fold_month_file(total_obs, total_water, available[month], keep, window_rows, sign=1)
+    for month in removed:
+        bytes_read += fold_month_file(total_obs, total_water, available[month], keep, window_rows, sign=-1)
+
+    if added or removed or state is None:
+        save_flood_counts(state_path, total_obs, total_water, target, occurrence_path)
+
+    stats = stream_stats(len(added) + len(removed), total_obs.shape, window_rows,
+                         bytes_read, time.perf_counter() - started)
+    stats.update({
+        "months_added": len(added),
+        "months_removed": len(removed),
+        "first_month": min(target),
+        "last_month": max(target),
+    })
+    return total_obs, total_water, stats
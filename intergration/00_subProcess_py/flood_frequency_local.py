@@ -0,0 +1,249 @@
+# cassie/src/algorithms/flood_analysis/flood_frequency_local.py
+
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+from frequency_cube import cube_groups
+
+MONTH_PATTERN = re.compile(r"(\d{4})[_-](\d{2})")
+
+
+def month_key(path):
+    """Returns the 'YYYY-MM' month of a JRC MonthlyHistory file (e.g. '1984_03.tif')."""
+    match = MONTH_PATTERN.search(os.path.basename(path))
+    if match is None:
+        raise ValueError(f"❌ Cannot read a YYYY_MM month from file name: {path}")
+    return f"{match.group(1)}-{match.group(2)}"
+
+
+def peak_rss_mb():
+    """Returns the peak resident set size of this process in MB (None where `resource` is unavailable, e.g. Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class _NpyReader:
+    """Row-window reader for a single-band .npy raster (memory-mapped)."""
+
+    def __init__(self, path):
+        self._array = np.load(path, mmap_mode="r")
+        if self._array.ndim != 2:
+            raise ValueError(f"❌ Expected a 2-D raster in {path}, got shape {self._array.shape}")
+        self.shape = self._array.shape
+
+    def read(self, row_start, row_stop):
+        return np.asarray(self._array[row_start:row_stop])
+
+    def close(self):
+        del self._array
+
+
+class _GeoTiffReader:
+    """Row-window reader for band 1 of a GeoTIFF."""
+
+    def __init__(self, path):
+        try:
+            import rasterio
+            from rasterio.windows import Window
+        except ImportError as e:
+            raise ImportError(f"❌ Reading GeoTIFF input ({path}) needs rasterio: pip install rasterio; "
+                              "or convert the months to .npy files.") from e
+
+        self._window = Window
+        self._dataset = rasterio.open(path)
+        self.shape = (self._dataset.height, self._dataset.width)
+
+    def read(self, row_start, row_stop):
+        window = self._window(0, row_start, self.shape[1], row_stop - row_start)
+        return self._dataset.read(1, window=window)
+
+    def close(self):
+        self._dataset.close()
+
+
+def open_raster(path):
+    """Opens a .npy or GeoTIFF raster for windowed reads."""
+    if path.lower().endswith(".npy"):
+        return _NpyReader(path)
+    return _GeoTiffReader(path)
+
+
+def _row_windows(height, window_rows):
+    for row_start in range(0, height, window_rows):
+        yield row_start, min(row_start + window_rows, height)
+
+
+def accumulate_month(total_obs, total_water, water, keep=None, sign=1):
+    """Adds (or with sign=-1 subtracts) one monthly 'water' window to the running counters."""
+    obs = water > 0
+    flooded = water == 2
+    if keep is not None:
+        obs &= keep
+        flooded &= keep
+    if sign > 0:
+        total_obs += obs
+        total_water += flooded
+    else:
+        total_obs -= obs
+        total_water -= flooded
+
+
+def fold_month_file(total_obs, total_water, path, keep=None, window_rows=512, sign=1):
+    """Streams one monthly raster into (sign=1) or out of (sign=-1) the counters; returns bytes read."""
+    reader = open_raster(path)
+    bytes_read = 0
+    try:
+        if reader.shape != total_obs.shape:
+            raise ValueError(f"❌ {path} has shape {reader.shape}, expected {total_obs.shape}")
+        for row_start, row_stop in _row_windows(reader.shape[0], window_rows):
+            water = reader.read(row_start, row_stop)
+            bytes_read += water.nbytes
+            accumulate_month(
+                total_obs[row_start:row_stop],
+                total_water[row_start:row_stop],
+                water,
+                None if keep is None else keep[row_start:row_stop],
+                sign,
+            )
+    finally:
+        reader.close()
+    return bytes_read
+
+
+def permanent_water_keep_mask(occurrence_path, window_rows=512):
+    """Returns a boolean raster that is False where JRC occurrence >= 90 (permanent water)."""
+    reader = open_raster(occurrence_path)
+    try:
+        keep = np.ones(reader.shape, dtype=bool)
+        for row_start, row_stop in _row_windows(reader.shape[0], window_rows):
+            occurrence = reader.read(row_start, row_stop)
+            # Nodata (e.g. 255 or NaN) in occurrence means "never water", not permanent.
+            keep[row_start:row_stop] = ~((occurrence >= 90) & (occurrence <= 100))
+    finally:
+        reader.close()
+    return keep
+
+
+def accumulate_flood_counts(month_paths, occurrence_path=None, window_rows=512):
+    """Streams monthly water rasters window by window into total_obs/total_water counters.
+
+    Only one row window of one month is held in memory at a time; the counters
+    are uint16 so a 1984-2024 stack (~490 months) fits without overflow.
+    Returns (total_obs, total_water, stats).
+    """
+    month_paths = list(month_paths)
+    if not month_paths:
+        raise ValueError("❌ No monthly water rasters were given.")
+
+    started = time.perf_counter()
+    keep = permanent_water_keep_mask(occurrence_path, window_rows) if occurrence_path else None
+    reader = open_raster(month_paths[0])
+    shape = reader.shape
+    reader.close()
+
+    total_obs = np.zeros(shape, dtype=np.uint16)
+    total_water = np.zeros(shape, dtype=np.uint16)
+    bytes_read = 0
+    for path in month_paths:
+        bytes_read += fold_month_file(total_obs, total_water, path, keep, window_rows)
+
+    stats = stream_stats(len(month_paths), shape, window_rows, bytes_read, time.perf_counter() - started)
+    return total_obs, total_water, stats
+
+
+def stream_stats(months, shape, window_rows, bytes_read, elapsed):
+    """Returns the throughput and peak-RSS report of a streaming pass."""
+    pixel_months = shape[0] * shape[1] * months
+    return {
+        "months": months,
+        "shape": shape,
+        "window_rows": window_rows,
+        "elapsed_s": elapsed,
+        "pixel_months_per_s": pixel_months / elapsed if elapsed else float("inf"),
+        "mb_read_per_s": bytes_read / (1024 * 1024) / elapsed if elapsed else float("inf"),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def flood_frequency_from_counts(total_obs, total_water):
+    """Returns the flood_frequency percentage raster, NaN where the server-side image is masked."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        flood_frequency = total_water.astype(np.float32) / total_obs * np.float32(100)
+    flood_frequency[flood_frequency == 0] = np.nan
+    return flood_frequency
+
+
+def accumulate_flood_count_cube(month_paths, group_by=("month",), occurrence_path=None, window_rows=512):
+    """Streams monthly rasters once into per-group observation and water counters.
+
+    Each window of each month is read once and added to the counters of every
+    group it belongs to (its calendar month and/or its year). Returns
+    (obs_cube, water_cube, suffixes, stats); the cubes are uint16 (groups, rows, cols).
+    """
+    month_paths = sorted(month_paths, key=month_key)
+    if not month_paths:
+        raise ValueError("❌ No monthly water rasters were given.")
+    years = sorted({int(month_key(path)[:4]) for path in month_paths})
+    groups = cube_groups(group_by, years)
+    index = {(field, value): i for i, (field, value, _) in enumerate(groups)}
+
+    started = time.perf_counter()
+    keep = permanent_water_keep_mask(occurrence_path, window_rows) if occurrence_path else None
+    reader = open_raster(month_paths[0])
+    shape = reader.shape
+    reader.close()
+
+    obs_cube = np.zeros((len(groups),) + shape, dtype=np.uint16)
+    water_cube = np.zeros((len(groups),) + shape, dtype=np.uint16)
+    bytes_read = 0
+    for path in month_paths:
+        year, month = (int(v) for v in month_key(path).split("-"))
+        targets = [index[key] for key in (("month", month), ("year", year)) if key in index]
+        reader = open_raster(path)
+        try:
+            if reader.shape != shape:
+                raise ValueError(f"❌ {path} has shape {reader.shape}, expected {shape}")
+            for row_start, row_stop in _row_windows(shape[0], window_rows):
+                water = reader.read(row_start, row_stop)
+                bytes_read += water.nbytes
+                window_keep = None if keep is None else keep[row_start:row_stop]
+                for i in targets:
+                    accumulate_month(obs_cube[i, row_start:row_stop], water_cube[i, row_start:row_stop],
+                                     water, window_keep)
+        finally:
+            reader.close()
+
+    stats = stream_stats(len(month_paths), shape, window_rows, bytes_read, time.perf_counter() - started)
+    return obs_cube, water_cube, [suffix for _, _, suffix in groups], stats
+
+
+def calculate_flood_frequency_cube_local(month_paths, group_by=("month",), occurrence_path=None, window_rows=512):
+    """Local equivalent of flood_frequency_analysis.calculate_flood_frequency_cube.
+
+    Returns (cube, band_names, stats): a float32 (groups, rows, cols) array of
+    flood frequency per calendar month and/or year (NaN where masked) and its
+    band names, e.g. 'flood_frequency_m07' or 'flood_frequency_y2010'.
+    """
+    obs_cube, water_cube, suffixes, stats = accumulate_flood_count_cube(
+        month_paths, group_by, occurrence_path, window_rows)
+    cube = flood_frequency_from_counts(obs_cube, water_cube)
+    return cube, [f"flood_frequency_{suffix}" for suffix in suffixes], stats
+
+
+def calculate_flood_frequency_local(month_paths, occurrence_path=None, window_rows=512):
+    """Calculates flood frequency from local JRC MonthlyHistory rasters (.npy or GeoTIFF).
+
+    Local equivalent of calculate_flood_frequency. Returns (flood_frequency, stats)
+    where stats reports throughput and peak RSS.
+    """
+    total_obs, total_water, stats = accumulate_flood_counts(month_paths, occurrence_path, window_rows)
+    return flood_frequency_from_counts(total_obs, total_water), stats
@@ -2,27 +2,67 @@
 
 import ee
 
-def detect_flood_prone_areas(flood_frequency, srtm, low_lying_threshold, roi):
-    """Detects flood-prone areas based on flood frequency, slope, and elevation."""
+def flood_prone_mask_area(flood_frequency, srtm, low_lying_threshold):
+    """Masks flood frequency to flat (slope < 5) pixels below the low-lying threshold."""
     slope = ee.Terrain.slope(srtm).rename("slope")
     flat_area = slope.lt(5).rename("flat_area")
     low_lying = srtm.lt(low_lying_threshold).rename("low_lying")
-    flood_prone_area = flood_frequency.updateMask(low_lying.And(flat_area))
+    return flood_frequency.updateMask(low_lying.And(flat_area))
+
+
+def vectorize_flood_prone_area(flood_prone_area, roi, tile_scale=2, best_effort=True):
+    """Polygonizes the flood-prone raster at 30 m; shared by detection and building analysis.
 
+    best_effort=False keeps the 30 m scale (failing instead of silently coarsening
+    when the region is too large), which is what resilient_execution retries.
+    """
     flood_prone_int = flood_prone_area.multiply(100).toInt()
 
-    flood_prone_fc = ee.FeatureCollection(
+    return ee.FeatureCollection(
         flood_prone_int.reduceToVectors(
             geometryType='polygon',
             reducer=ee.Reducer.countEvery(),
             geometry=roi,
             scale=30,
             maxPixels=1e13,
-            bestEffort=True,
-            tileScale=2
+            bestEffort=best_effort,
+            tileScale=tile_scale
         )
-    ).map(lambda f: f.simplify(30))
+    )
+
+
+def flood_prone_polygons(flood_prone_vectors):
+    """Simplifies, buffers and dissolves the flood-prone vectors into one feature."""
+    flood_prone_fc = flood_prone_vectors.map(lambda f: f.simplify(30))
+    return flood_prone_fc.map(lambda f: f.buffer(30)).union()
+
+
+def detect_flood_prone_areas(flood_frequency, srtm, low_lying_threshold, roi, tile_scale=2, best_effort=True):
+    """Detects flood-prone areas based on flood frequency, slope, and elevation."""
+    flood_prone_area = flood_prone_mask_area(flood_frequency, srtm, low_lying_threshold)
+    flood_prone_fc = flood_prone_polygons(vectorize_flood_prone_area(flood_prone_area, roi, tile_scale, best_effort))
+    return flood_prone_area, flood_prone_fc
+
+
+def detect_flood_prone_areas_local(flood_frequency, transform, low_lying_threshold, terrain_cache, max_slope=5,
+                                   **vectorize_kwargs):
+    """Local equivalent of detect_flood_prone_areas with elevation and slope from a TerrainTileCache.
 
-    flood_prone_fc = flood_prone_fc.map(lambda f: f.buffer(30)).union()
+    flood_frequency (NaN = no data, e.g. from calculate_flood_frequency_local)
+    must be on the cache's pixel grid; transform is its affine transform. The
+    terrain tiles it covers are built once and then memory-mapped, so repeated
+    or overlapping AOIs skip the slope computation. Returns (flood_prone_area,
+    flood_prone_fc): the frequency with pixels that are not flood-prone set to
+    NaN, and the dissolved GeoJSON of vectorize_flood_prone_local.
+    """
+    import numpy as np
+    from local_vectorize import vectorize_flood_prone_local
 
-    return flood_prone_area, flood_prone_fc
\ No newline at end of file
+    flood_frequency = np.asarray(flood_frequency, dtype=np.float32)
+    row_start, col_start = terrain_cache.window_offset(transform)
+    height, width = flood_frequency.shape
+    mask = terrain_cache.flood_prone_mask(row_start, row_start + height, col_start, col_start + width,
+                                          low_lying_threshold, max_slope)
+    flood_prone_area = np.where(mask, flood_frequency, np.nan)
+    flood_prone_fc = vectorize_flood_prone_local(~np.isnan(flood_prone_area), transform, **vectorize_kwargs)
+    return flood_prone_area, flood_prone_fc
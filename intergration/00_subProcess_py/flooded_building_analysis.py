@@ -2,24 +2,42 @@
 
 import ee
 
-def analyze_flooded_buildings(flood_prone_area, buildings, roi):
-    """Analyzes flooded buildings based on flood-prone areas and building footprints."""
-    flood_prone_clipped = flood_prone_area.clip(roi).toInt()
-
-    flood_prone_vector = flood_prone_clipped.reduceToVectors(
-        reducer=ee.Reducer.countEvery(),
-        geometry=roi,
-        geometryType='polygon',
-        scale=30,
-        maxPixels=1e8
-    )
+def analyze_flooded_buildings(flood_prone_area, buildings, roi, deferred=None, flood_prone_vector=None,
+                              tile_scale=1, flood_region=None):
+    """Analyzes flooded buildings based on flood-prone areas and building footprints.
+
+    When a DeferredResults batch is given, the counts are registered on it and
+    returned as Deferred handles instead of being fetched with getInfo(). Pass
+    the vectors from vectorize_flood_prone_area(..., best_effort=False) as
+    flood_prone_vector to reuse them instead of polygonizing the flood-prone
+    raster a second time; best-effort vectors may have been coarsened and would
+    change the count.
+    flood_region (default roi) is where the raster is polygonized; tiled runs
+    pass a slightly larger region so footprints crossing the tile edge are seen.
+    """
+    if flood_prone_vector is None:
+        flood_region = roi if flood_region is None else flood_region
+        flood_prone_clipped = flood_prone_area.clip(flood_region).toInt()
+
+        flood_prone_vector = flood_prone_clipped.reduceToVectors(
+            reducer=ee.Reducer.countEvery(),
+            geometry=flood_region,
+            geometryType='polygon',
+            scale=30,
+            maxPixels=1e8,
+            tileScale=tile_scale
+        )
 
     flood_prone_geom = flood_prone_vector.geometry()
 
     buildings_in_aoi = buildings.filterBounds(roi)
-    total_buildings = buildings_in_aoi.size().getInfo()
-
     flooded_buildings = buildings_in_aoi.filterBounds(flood_prone_geom)
-    flooded_building_count = flooded_buildings.size().getInfo()
 
-    return total_buildings, flooded_building_count, buildings_in_aoi, flooded_buildings
\ No newline at end of file
+    if deferred is not None:
+        total_buildings = deferred.register("total_buildings", buildings_in_aoi.size())
+        flooded_building_count = deferred.register("flooded_building_count", flooded_buildings.size())
+    else:
+        total_buildings = buildings_in_aoi.size().getInfo()
+        flooded_building_count = flooded_buildings.size().getInfo()
+
+    return total_buildings, flooded_building_count, buildings_in_aoi, flooded_buildings
@@ -0,0 +1,23 @@
+# cassie/src/algorithms/flood_analysis/frequency_cube.py
+
+CUBE_GROUPS = ("month", "year")
+
+
+def cube_groups(group_by=("month",), years=None):
+    """Lists the (field, value, band suffix) groups of a frequency cube, months first then years.
+
+    Months are calendar months 1-12 (suffix 'm01'..'m12'); years need the list
+    of years to cover (suffix 'y1984', ...).
+    """
+    group_by = (group_by,) if isinstance(group_by, str) else tuple(group_by)
+    unknown = set(group_by) - set(CUBE_GROUPS)
+    if unknown or not group_by:
+        raise ValueError(f"❌ group_by must name 'month' and/or 'year', got {group_by!r}")
+    groups = []
+    if "month" in group_by:
+        groups += [("month", month, f"m{month:02d}") for month in range(1, 13)]
+    if "year" in group_by:
+        if not years:
+            raise ValueError("❌ Grouping by year needs the list of years.")
+        groups += [("year", year, f"y{year}") for year in sorted(years)]
+    return groups
@@ -1,121 +1,339 @@
 # cassie/src/index.js
 
-import ee
+import os
+import sys
+import argparse
 import datetime
-from flood_frequency_analysis import calculate_flood_frequency
-from flood_prone_area_detection import detect_flood_prone_areas
-from flooded_building_analysis import analyze_flooded_buildings
-from lulc_flooded_area_analysis import analyze_lulc_flooded_area
-from aoi_utils import load_kml_geometry
-
-ee.Initialize(project='servir-ee')
-print("✅ Earth Engine initialized.")
-
-use_bbox = True
-bbox = [-58.024429, 6.729363, -57.935249, 6.763412]
-
-use_kml = not use_bbox
-kml_file = "/_use/aoi.kml"
-
-start_date = datetime.date(1984, 3, 16)
-end_date = datetime.date(2024, 12, 31)
-low_lying_threshold = 10
-
-start_date_ee = ee.Date.fromYMD(start_date.year, start_date.month, start_date.day)
-end_date_ee = ee.Date.fromYMD(end_date.year, end_date.month, end_date.day)
-
-print("✅ Time range set:", start_date, "to", end_date)
-
-roi = None
-if use_kml:
-    roi = load_kml_geometry(kml_file)
-elif use_bbox:
-    roi = ee.Geometry.BBox(*bbox)
-
-if roi is None:
-    raise ValueError("❌ ERROR: Region of Interest (ROI) is not defined! Check AOI selection.")
-
-print("✅ AOI Loaded Successfully:", roi.getInfo())
-
-print("⏳ Loading datasets...")
-jrc = ee.ImageCollection("JRC/GSW1_4/MonthlyHistory").filterBounds(roi).filterDate(start_date_ee, end_date_ee)
-srtm = ee.Image("USGS/SRTMGL1_003")
-worldcover = ee.ImageCollection("ESA/WorldCover/v200").first().select("Map")
-buildings = ee.FeatureCollection("GOOGLE/Research/open-buildings/v3/polygons")
-print("✅ Datasets loaded successfully.")
-
-permanent_water = ee.Image("JRC/GSW1_4/GlobalSurfaceWater").select("occurrence").gte(90)
-jrc = jrc.map(lambda img: img.updateMask(permanent_water.Not()))
-print("✅ Applied water mask.")
-
-print("⏳ Calculating flood frequency...")
-print("⏳ Calculating flood frequency...")
-flood_frequency = calculate_flood_frequency(jrc)  #Call the function
-print("✅ Flood frequency calculated.")
-
-print("⏳ Identifying flood-prone areas...")
-flood_prone_area, flood_prone_fc = detect_flood_prone_areas(flood_frequency, srtm, low_lying_threshold, roi)  #Call the function
-print("✅ Flood-prone areas identified.")
-
-total_buildings, flooded_building_count, buildings_in_aoi, flooded_buildings = analyze_flooded_buildings(flood_prone_area, buildings, roi)
-print(f"🔍 Total buildings in AOI: {total_buildings}")
-print(f"✅ Flooded buildings identified: {flooded_building_count}")
-
-print("⏳ Calculating flooded area per LULC class...")
-area_km2 = analyze_lulc_flooded_area(flood_prone_area, worldcover, roi)  #Call the function
-print("✅ Flooded area per LULC class calculated.")
-
-# ----------------------------- #
-#         EXPORT RESULTS        #
-# ----------------------------- #
-
-print("\n🚀 Exporting results...")
-
-# --- Export Flood-Prone Area ---
-print("⏳ Exporting Flood-Prone area...")
-task_flood_prone = ee.batch.Export.table.toDrive(
-    collection=flood_prone_fc,
-    description="FloodProne_Area",
-    folder="FloodAnalysis",
-    fileFormat="GeoJSON"
-)
-task_flood_prone.start()
-
-# --- Export Buildings ---
-print("⏳ Exporting AOI Buildings...")
-task_aoi_buildings = ee.batch.Export.table.toDrive(
-    collection=buildings_in_aoi,
-    description="AOI_Buildings",
-    folder="FloodAnalysis",
-    fileFormat="GeoJSON"
-)
-task_aoi_buildings.start()
-
-print("⏳ Exporting Flooded Buildings...")
-task_flooded_buildings = ee.batch.Export.table.toDrive(
-    collection=flooded_buildings,
-    description="Flooded_Buildings",
-    folder="FloodAnalysis",
-    fileFormat="GeoJSON"
-)
-task_flooded_buildings.start()
-
-# --- Export Flooded Area per LULC ---
-print("⏳ Exporting Flooded area per LULC...")
-
-# Convert area_km2 to a FeatureCollection
-features = []
-for row in area_km2:
-    feature = ee.Feature(None, row)
-    features.append(feature)
-lulc_fc = ee.FeatureCollection(features)
-
-task_lulc_flooded = ee.batch.Export.table.toDrive(
-    collection=lulc_fc,
-    description="Flooded_Area_Per_LULC",
-    fileFormat="CSV",
-    folder="FloodAnalysis"
-)
-task_lulc_flooded.start()
-
-print("\n=== FLOOD ANALYSIS RESULTS ===")
+
+# Only the standard library is imported at module level so that `--help` and
+# argument errors return immediately; ee, the stage modules and geopandas (KML
+# path only) are imported once a run actually needs them.
+
+DEFAULT_BBOX = [-58.024429, 6.729363, -57.935249, 6.763412]
+DEFAULT_START_DATE = "1984-03-16"
+DEFAULT_END_DATE = "2024-12-31"
+DEFAULT_THRESHOLD = 10
+
+cache_max_bytes = 256 * 1024 * 1024
+
+DATASET_IDS = {
+    "jrc_monthly": "JRC/GSW1_4/MonthlyHistory",
+    "jrc_occurrence": "JRC/GSW1_4/GlobalSurfaceWater",
+    "srtm": "USGS/SRTMGL1_003",
+    "worldcover": "ESA/WorldCover/v200",
+    "buildings": "GOOGLE/Research/open-buildings/v3/polygons",
+}
+
+
+def load_datasets(roi, start_date, end_date):
+    """Returns (jrc, srtm, worldcover, buildings) for the AOI, with permanent water masked out of jrc."""
+    import ee
+
+    jrc = ee.ImageCollection(DATASET_IDS["jrc_monthly"]).filterBounds(roi).filterDate(start_date, end_date)
+    srtm = ee.Image(DATASET_IDS["srtm"])
+    worldcover = ee.ImageCollection(DATASET_IDS["worldcover"]).first().select("Map")
+    buildings = ee.FeatureCollection(DATASET_IDS["buildings"])
+
+    permanent_water = ee.Image(DATASET_IDS["jrc_occurrence"]).select("occurrence").gte(90)
+    jrc = jrc.map(lambda img: img.updateMask(permanent_water.Not()))
+    return jrc, srtm, worldcover, buildings
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Flood-prone area, building and LULC analysis for one AOI.")
+    aoi = parser.add_mutually_exclusive_group()
+    aoi.add_argument("--bbox", nargs=4, type=float, metavar=("WEST", "SOUTH", "EAST", "NORTH"),
+                     help="AOI bounding box (default: the Georgetown coastal test area)")
+    aoi.add_argument("--aoi", "--kml", dest="aoi",
+                     help="KML, GeoJSON or shapefile; the union of its features is the AOI")
+    parser.add_argument("--max-vertices", type=int, default=5000,
+                        help="Simplify the AOI file geometry to at most this many vertices (0 keeps it as is)")
+    parser.add_argument("--start-date", type=datetime.date.fromisoformat, default=DEFAULT_START_DATE)
+    parser.add_argument("--end-date", type=datetime.date.fromisoformat, default=DEFAULT_END_DATE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Low-lying threshold (m)")
+    parser.add_argument("--sweep-thresholds", nargs="+", type=float, metavar="M",
+                        help="Also report area, LULC areas and flooded buildings for each of these ascending "
+                             "low-lying thresholds (m), fetched in the same round trip")
+    parser.add_argument("--project", default="servir-ee", help="Earth Engine cloud project")
+    parser.add_argument("--export-dir", help="Stream feature exports to this folder instead of Drive")
+    parser.add_argument("--export-format", default="geojsonl", choices=["geojsonl", "fgb", "parquet"])
+    parser.add_argument("--wait-exports", action="store_true",
+                        help="Poll the Drive export tasks until they finish instead of exiting after starting them")
+    parser.add_argument("--export-bucket",
+                        help="Export the tables to this Cloud Storage bucket instead of Drive")
+    parser.add_argument("--download-dir",
+                        help="Wait for the bucket exports and copy each finished table here (needs --export-bucket)")
+    parser.add_argument("--time-budget", type=float,
+                        help="Seconds allowed for retrying failed reductions with a larger tileScale or split regions")
+    parser.add_argument("--cache-dir", default="_cache")
+    parser.add_argument("--events-log", help="Also append the JSON-lines progress events to this file")
+    parser.add_argument("--run-store", default="_runs",
+                        help="Append this run's parameters and results to the Parquet run store here ('' disables)")
+    args = parser.parse_args(argv)
+    if args.aoi is None and args.bbox is None:
+        args.bbox = DEFAULT_BBOX
+    if args.end_date <= args.start_date:
+        parser.error("--end-date must be after --start-date")
+    if args.download_dir and not args.export_bucket:
+        parser.error("--download-dir needs --export-bucket (Drive exports cannot be downloaded)")
+    if args.sweep_thresholds and sorted(set(args.sweep_thresholds)) != args.sweep_thresholds:
+        parser.error("--sweep-thresholds must be strictly ascending")
+    return args
+
+
+def run(args):
+    """Runs the whole analysis for parsed CLI arguments; returns the Instrumentation of the run."""
+    import ee
+    from flood_frequency_analysis import calculate_flood_frequency
+    from flood_prone_area_detection import flood_prone_mask_area, vectorize_flood_prone_area, flood_prone_polygons
+    from flooded_building_analysis import analyze_flooded_buildings
+    from lulc_flooded_area_analysis import analyze_lulc_flooded_area
+    from threshold_sweep import sweep_flood_prone_thresholds
+    from deferred_results import DeferredResults
+    from result_cache import ResultCache
+    from stage_graph import StageGraph, Ref
+    from instrumentation import Instrumentation, StdoutSink, JsonlFileSink
+
+    instr = Instrumentation([StdoutSink()] + ([JsonlFileSink(args.events_log)] if args.events_log else []))
+    instr.install_remote_hook()
+    started_at = datetime.datetime.now(datetime.timezone.utc)
+
+    start_date, end_date = args.start_date, args.end_date
+    low_lying_threshold = args.threshold
+    instr.event("Time range set", start_date=start_date, end_date=end_date)
+
+    # Earth Engine is initialized right before the first ee object is built.
+    with instr.stage("initialize"):
+        ee.Initialize(project=args.project)
+
+    roi = None
+    with instr.stage("load_aoi"):
+        if args.aoi:
+            from aoi_utils import load_aoi_geometry
+            roi, aoi_stats = load_aoi_geometry(args.aoi, max_vertices=args.max_vertices or None)
+            instr.event("AOI simplified", path=args.aoi, **aoi_stats)
+        else:
+            roi = ee.Geometry.BBox(*args.bbox)
+
+    if roi is None:
+        raise ValueError("❌ ERROR: Region of Interest (ROI) is not defined! Check AOI selection.")
+
+    instr.event("AOI loaded", aoi=roi.toGeoJSON())
+
+    start_date_ee = ee.Date.fromYMD(start_date.year, start_date.month, start_date.day)
+    end_date_ee = ee.Date.fromYMD(end_date.year, end_date.month, end_date.day)
+
+    # Scalar results are fetched together in one round trip once every stage is built.
+    deferred = DeferredResults()
+
+    # Stage results are cached on disk, keyed on the AOI, parameters and dataset IDs.
+    cache = ResultCache(args.cache_dir, cache_max_bytes)
+    date_params = {"start_date": start_date.isoformat(), "end_date": end_date.isoformat()}
+    threshold_params = dict(date_params, low_lying_threshold=low_lying_threshold)
+
+    with instr.stage("load_datasets"):
+        jrc, srtm, worldcover, buildings = load_datasets(roi, start_date_ee, end_date_ee)
+
+    # Every intermediate is computed once and shared by all stages that consume it,
+    # e.g. the flood-prone vectors feed both the exported polygons and the building count.
+    # They are vectorized strictly at 30 m (no bestEffort), so sharing them can never
+    # coarsen the building count; a region too large for that is retried below.
+    # Each stage is measured by the instrumentation. Only stages that fetch values are
+    # cached: the image and vector stages just build lazy ee graphs, which are cheap to
+    # rebuild and are computed on the server again at getInfo/export time anyway.
+    def measured(func, stage):
+        return instr.wrap(stage, func, lazy=True)
+
+    def cached(func, params, stage):
+        return instr.wrap(stage, cache.stage(func, roi, params, DATASET_IDS, stage))
+
+    graph = StageGraph()
+    graph.source("jrc", jrc)
+    graph.source("srtm", srtm)
+    graph.source("worldcover", worldcover)
+    graph.source("buildings", buildings)
+    graph.source("roi", roi)
+    graph.add("flood_frequency", measured(calculate_flood_frequency, "flood_frequency"), Ref("jrc"))
+    graph.add("flood_prone_area", measured(flood_prone_mask_area, "flood_prone_area"),
+              Ref("flood_frequency"), Ref("srtm"), low_lying_threshold)
+    graph.add("flood_prone_vectors", measured(vectorize_flood_prone_area, "flood_prone_vectors"),
+              Ref("flood_prone_area"), Ref("roi"), best_effort=False)
+    graph.add("flood_prone_fc", measured(flood_prone_polygons, "flood_prone_fc"),
+              Ref("flood_prone_vectors"))
+    graph.add("flooded_buildings", cached(analyze_flooded_buildings, threshold_params, "flooded_buildings"),
+              Ref("flood_prone_area"), Ref("buildings"), Ref("roi"),
+              deferred=deferred, flood_prone_vector=Ref("flood_prone_vectors"))
+    graph.add("lulc_areas", cached(analyze_lulc_flooded_area, threshold_params, "lulc_areas"),
+              Ref("flood_prone_area"), Ref("worldcover"), Ref("roi"), deferred=deferred)
+    if args.sweep_thresholds:
+        sweep_params = dict(date_params, thresholds=args.sweep_thresholds)
+        graph.add("threshold_sweep", cached(sweep_flood_prone_thresholds, sweep_params, "threshold_sweep"),
+                  Ref("flood_frequency"), Ref("srtm"), args.sweep_thresholds, Ref("roi"),
+                  worldcover=Ref("worldcover"), buildings=Ref("buildings"), deferred=deferred)
+
+    flood_frequency = graph.get("flood_frequency")
+    flood_prone_area = graph.get("flood_prone_area")
+    flood_prone_fc = graph.get("flood_prone_fc")
+    total_buildings, flooded_building_count, buildings_in_aoi, flooded_buildings = graph.get("flooded_buildings")
+    area_km2 = graph.get("lulc_areas")
+    threshold_sweep = graph.get("threshold_sweep") if args.sweep_thresholds else None
+
+    # The server-side work of every stage above happens here, in one round trip.
+    # If that batch runs out of memory or time, the flood-prone vectors and the
+    # building and LULC numbers are recomputed stage by stage with tileScale
+    # escalation and region splitting, all within one --time-budget.
+    with instr.stage("fetch_results"):
+        try:
+            deferred.resolve()
+            total_building_count = total_buildings.value
+            flooded_count = flooded_building_count.value
+            lulc_rows = area_km2.value
+            sweep_rows = threshold_sweep.value if threshold_sweep is not None else None
+            # The counts are the sizes of the collections exported below, so the exporter can use them.
+            export_sizes = (total_building_count, flooded_count)
+        except Exception as e:
+            from resilient_execution import (MEMORY, TIMEOUT, ResilientExecutor, classify_error,
+                                             resilient_building_counts, resilient_flood_prone_vectors,
+                                             resilient_lulc_areas)
+            if classify_error(e) not in (MEMORY, TIMEOUT):
+                raise
+            instr.event("Batched fetch failed, retrying stage by stage", error=str(e))
+            executor = ResilientExecutor(time_budget_s=args.time_budget,
+                                         on_event=lambda event: instr.event("Escalation", **event))
+            # The shared 30 m vectors are likely what failed, so the exported polygons and
+            # the flooded-building collection are rebuilt from vectors computed piece by piece.
+            with instr.stage("resilient_flood_prone_vectors"):
+                flood_prone_vectors = resilient_flood_prone_vectors(flood_prone_area, roi, executor)
+                flood_prone_fc = flood_prone_polygons(flood_prone_vectors)
+                flooded_buildings = buildings_in_aoi.filterBounds(flood_prone_vectors.geometry())
+            with instr.stage("resilient_flooded_buildings"):
+                total_building_count, flooded_count = resilient_building_counts(
+                    flood_prone_area, buildings, roi, executor)
+            with instr.stage("resilient_lulc_areas"):
+                lulc_rows = resilient_lulc_areas(flood_prone_area, worldcover, roi, executor)
+            # The resilient counts assign buildings to tiles, so they need not equal the
+            # sizes of the exported collections; the exporter counts those itself.
+            export_sizes = (None, None)
+            sweep_rows = None
+            if args.sweep_thresholds:
+                # The sweep has no vectors, so it usually fits once it is fetched on its own.
+                with instr.stage("resilient_threshold_sweep"):
+                    try:
+                        sweep_rows = sweep_flood_prone_thresholds(flood_frequency, srtm, args.sweep_thresholds,
+                                                                  roi, worldcover, buildings)
+                    except Exception as sweep_error:
+                        if classify_error(sweep_error) not in (MEMORY, TIMEOUT):
+                            raise
+                        instr.event("Threshold sweep skipped", error=str(sweep_error))
+        cache.flush()
+
+    stage_report = graph.report()
+    instr.event(
+        "Results fetched",
+        total_buildings=total_building_count,
+        flooded_building_count=flooded_count,
+        round_trips=deferred.round_trips,
+        round_trips_saved=deferred.round_trips_saved,
+        cache_hits=cache.hits,
+        cache_misses=cache.misses,
+        stages_evaluated=stage_report["evaluations"],
+        stages_deduplicated=stage_report["deduplicated"],
+    )
+    if sweep_rows is not None:
+        instr.event("Threshold sweep", rows=sweep_rows)
+
+    # ----------------------------- #
+    #         EXPORT RESULTS        #
+    # ----------------------------- #
+
+    feature_exports = [
+        ("FloodProne_Area", flood_prone_fc, None),
+        ("AOI_Buildings", buildings_in_aoi, export_sizes[0]),
+        ("Flooded_Buildings", flooded_buildings, export_sizes[1]),
+    ]
+
+    if args.export_dir:
+        from feature_exporter import EEFeatureSource, export_features
+
+        os.makedirs(args.export_dir, exist_ok=True)
+        for name, collection, count in feature_exports:
+            path = os.path.join(args.export_dir, f"{name}.{args.export_format}")
+            with instr.stage(f"export_{name}", path=path):
+                written = export_features(EEFeatureSource(collection), path, total=count)
+            instr.event("Features written", name=name, path=path, features=written)
+        drive_exports = []
+    else:
+        drive_exports = [(name, collection, "GeoJSON") for name, collection, _ in feature_exports]
+
+    # --- Export Flooded Area per LULC ---
+
+    # Convert area_km2 to a FeatureCollection
+    features = []
+    for row in lulc_rows:
+        feature = ee.Feature(None, row)
+        features.append(feature)
+    lulc_fc = ee.FeatureCollection(features)
+    drive_exports.append(("Flooded_Area_Per_LULC", lulc_fc, "CSV"))
+
+    # Drive (or bucket) exports are started, and if asked polled to completion, by one task manager.
+    from export_task_manager import EETaskService, run_exports
+
+    wait = args.wait_exports or bool(args.download_dir)
+    if args.download_dir:
+        os.makedirs(args.download_dir, exist_ok=True)
+    exports = [
+        (name, collection, {
+            "folder": "FloodAnalysis",
+            "file_format": file_format,
+            "download_path": os.path.join(args.download_dir, f"{name}.{file_format.lower()}")
+            if args.download_dir else None,
+        })
+        for name, collection, file_format in drive_exports
+    ]
+    with instr.stage("drive_exports", wait=wait):
+        outcomes = run_exports(exports, EETaskService(bucket=args.export_bucket), wait=wait,
+                               on_event=lambda e: instr.event("Export task", **e))
+    for name, outcome in outcomes.items():
+        if isinstance(outcome, Exception):
+            instr.event("Export failed", name=name, error=str(outcome))
+
+    # Every run is appended to the columnar run store, so past runs can be queried
+    # (by AOI hash, dates, threshold, ...) without parsing exported CSVs.
+    if args.run_store:
+        try:
+            from run_result_store import RunResultStore, normalize_aoi, run_record
+        except ImportError as e:
+            instr.event("Run store skipped", error=str(e))
+        else:
+            parameters = {key: value for key, value in vars(args).items() if key != "run_store"}
+            # Normalized once, so the ROI is fetched a single time for the run row and the AOI table.
+            aoi = normalize_aoi(roi)
+            record = run_record(
+                aoi, start_date, end_date, low_lying_threshold, started_at,
+                total_buildings=total_building_count, flooded_building_count=flooded_count,
+                lulc_areas=lulc_rows, stage_summary=instr.summary(), parameters=parameters,
+                datasets=DATASET_IDS, run_id=instr.run_id,
+            )
+            with instr.stage("store_run"):
+                try:
+                    store = RunResultStore(args.run_store)
+                    store.put_aoi(aoi)
+                    store.append(record)
+                    instr.event("Run stored", path=args.run_store, run_id=record["run_id"], aoi_hash=record["aoi_hash"])
+                except ImportError as e:
+                    instr.event("Run store skipped", error=str(e))
+
+    instr.close()
+    return instr
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    instr = run(args)
+    print("\n=== FLOOD ANALYSIS RESULTS ===")
+    print(instr.summary_table())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+# cassie/src/algorithms/utils/instrumentation.py
+
+import sys
+import json
+import time
+import functools
+import threading
+import contextlib
+import tracemalloc
+
+import ee
+
+
+class StdoutSink:
+    """Writes each event as one JSON line to a stream (stdout by default)."""
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def emit(self, event):
+        print(json.dumps(event, default=str), file=self.stream or sys.stdout, flush=True)
+
+
+class JsonlFileSink:
+    """Appends each event as one JSON line to a file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def emit(self, event):
+        line = json.dumps(event, default=str)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class MemorySink:
+    """Keeps events in a list, e.g. for tests and benchmarks."""
+
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event):
+        self.events.append(event)
+
+
+class Instrumentation:
+    """Records per-stage wall time, remote calls, response payload bytes and (optionally) peak memory.
+
+    Wrap stage functions with stage()/wrap()/instrument(); each finished stage
+    emits a JSON-serializable "stage" event to every sink. Remote calls are
+    counted by install_remote_hook(), which patches ee.ComputedObject.getInfo
+    process-wide, so concurrent stages in other threads are counted too.
+    Peak memory (tracemalloc, client side) is only tracked with track_memory=True,
+    which is meant for local-mode runs.
+
+    Stages that only build lazy ee graphs are marked lazy=True: their time is
+    client-side graph construction, and the server work they describe is
+    measured in the stage that finally fetches it (getInfo, resolve, export).
+    """
+
+    def __init__(self, sinks=None, track_memory=False, run_id=None, ee_module=None):
+        self.sinks = [StdoutSink()] if sinks is None else list(sinks)
+        self.track_memory = track_memory
+        self.run_id = run_id
+        self._ee = ee_module or ee
+        self.records = []
+        self.remote_calls = 0
+        self.payload_bytes = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._original_get_info = None
+
+    def _emit(self, event):
+        if self.run_id is not None:
+            event = dict(event, run_id=self.run_id)
+        for sink in self.sinks:
+            sink.emit(event)
+
+    def event(self, message, **fields):
+        """Emits a free-form progress event (the former print() lines)."""
+        self._emit(dict({"event": "info", "time": time.time(), "message": message}, **fields))
+
+    def install_remote_hook(self):
+        """Counts every getInfo() round trip and the JSON size of its response."""
+        if self._original_get_info is not None:
+            return
+        computed_object = self._ee.ComputedObject
+        original = computed_object.getInfo
+        instrumentation = self
+
+        @functools.wraps(original)
+        def get_info(obj, *args, **kwargs):
+            result = original(obj, *args, **kwargs)
+            size = len(json.dumps(result, default=str))
+            with instrumentation._lock:
+                instrumentation.remote_calls += 1
+                instrumentation.payload_bytes += size
+            return result
+
+        computed_object.getInfo = get_info
+        self._original_get_info = original
+
+    def uninstall_remote_hook(self):
+        if self._original_get_info is not None:
+            self._ee.ComputedObject.getInfo = self._original_get_info
+            self._original_get_info = None
+
+    def _stack(self):
+        return self._local.__dict__.setdefault("stack", [])
+
+    @contextlib.contextmanager
+    def stage(self, name, **fields):
+        """Context manager that measures one stage and emits its event when it ends.
+
+        Stages may nest within a thread: wall_s includes the nested stages and
+        self_s excludes them, and a nested stage's event names its parent.
+        """
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        frame = {"name": name, "child_s": 0.0, "peak": 0}
+        started_tracing = self.track_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        elif self.track_memory:
+            # Keep the parent's peak so far before resetting it for this stage.
+            if parent is not None:
+                parent["peak"] = max(parent["peak"], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        with self._lock:
+            calls_before, bytes_before = self.remote_calls, self.payload_bytes
+        stack.append(frame)
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            wall = time.perf_counter() - start
+            stack.pop()
+            record = dict({
+                "event": "stage",
+                "stage": name,
+                "status": status,
+                "wall_s": round(wall, 6),
+                "self_s": round(wall - frame["child_s"], 6),
+                "remote_calls": self.remote_calls - calls_before,
+                "payload_bytes": self.payload_bytes - bytes_before,
+            }, **fields)
+            if parent is not None:
+                parent["child_s"] += wall
+                record["parent"] = parent["name"]
+            if self.track_memory:
+                peak = max(tracemalloc.get_traced_memory()[1], frame["peak"])
+                record["peak_mb"] = round(peak / 1e6, 3)
+                if parent is not None:
+                    parent["peak"] = max(parent["peak"], peak)
+                if started_tracing:
+                    tracemalloc.stop()
+            self.records.append(record)
+            self._emit(record)
+
+    def wrap(self, name, func, **fields):
+        """Returns func measured as stage `name` on every call; fields are added to each event."""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.stage(name, **fields):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def instrument(self, name=None):
+        """Decorator form of wrap(); the stage name defaults to the function name."""
+        def decorator(func):
+            return self.wrap(name or func.__name__, func)
+        return decorator
+
+    def summary(self):
+        """Per-stage totals (calls, wall and self time, remote calls, payload, peak memory), by self time.
+
+        self_s adds up to the run time; wall_s of nested stages is also part of
+        their parent's wall_s.
+        """
+        totals = {}
+        for record in self.records:
+            row = totals.setdefault(record["stage"], {
+                "stage": record["stage"], "calls": 0, "wall_s": 0.0, "self_s": 0.0, "remote_calls": 0,
+                "payload_bytes": 0,
+            })
+            if record.get("lazy"):
+                row["lazy"] = True
+            row["calls"] += 1
+            row["wall_s"] += record["wall_s"]
+            row["self_s"] += record.get("self_s", record["wall_s"])
+            row["remote_calls"] += record["remote_calls"]
+            row["payload_bytes"] += record["payload_bytes"]
+            if "peak_mb" in record:
+                row["peak_mb"] = max(row.get("peak_mb", 0), record["peak_mb"])
+        return sorted(totals.values(), key=lambda row: row["self_s"], reverse=True)
+
+    def summary_table(self):
+        """Formats summary() as a plain-text table."""
+        rows = self.summary()
+        lines = [f"{'stage':<30}{'calls':>6}{'wall s':>10}{'self s':>10}{'remote':>8}{'payload B':>11}{'peak MB':>9}"]
+        for row in rows:
+            peak = f"{row['peak_mb']:>9.1f}" if "peak_mb" in row else f"{'-':>9}"
+            stage = row["stage"] + (" (lazy)" if row.get("lazy") else "")
+            lines.append(f"{stage:<30}{row['calls']:>6}{row['wall_s']:>10.3f}{row['self_s']:>10.3f}"
+                         f"{row['remote_calls']:>8}{row['payload_bytes']:>11}{peak}")
+        return "\n".join(lines)
+
+    def close(self):
+        """Emits the end-of-run summary event and removes the remote-call hook."""
+        self._emit({"event": "summary", "stages": self.summary()})
+        self.uninstall_remote_hook()
@@ -0,0 +1,378 @@
+# cassie/src/algorithms/utils/interactive_explorer.py
+
+import base64
+import struct
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# The widget UI used to rebuild the whole ee graph and block on getInfo() for
+# every widget change. Here the expensive part (flood frequency, elevation and
+# slope of a region and date range) is fetched once into an overview pyramid;
+# a threshold change only re-masks arrays that are already in memory, and the
+# area and building counts come from sorted elevations with a binary search.
+
+FLOOD_FREQUENCY_VIS = {"min": 0, "max": 50, "palette": ["ffffff", "fffcb8", "0905ff"]}
+FLOOD_PRONE_AREA_VIS = {"min": 0, "max": 50, "palette": ["ffffff", "ff9999", "ff0000"]}
+
+
+def downsample(array, factor):
+    """NaN-aware factor x factor block mean (edges padded with NaN)."""
+    array = np.asarray(array, dtype=np.float32)
+    height, width = array.shape
+    rows, cols = -(-height // factor), -(-width // factor)
+    padded = np.full((rows * factor, cols * factor), np.nan, dtype=np.float32)
+    padded[:height, :width] = array
+    blocks = padded.reshape(rows, factor, cols, factor)
+    valid = ~np.isnan(blocks)
+    counts = valid.sum(axis=(1, 3))
+    sums = np.where(valid, blocks, 0).sum(axis=(1, 3))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan).astype(np.float32)
+
+
+class OverviewPyramid:
+    """Flood frequency, elevation and slope of one region at full and 2x, 4x, ... coarser resolutions.
+
+    Level 0 is the full-resolution grid. Pixels that are flood-prone for some
+    threshold (valid frequency, slope < max_slope) are also kept sorted by
+    elevation, so the flood-prone area and flooded-building count for any
+    low-lying threshold are one binary search each, equal to a recompute over
+    the level-0 grid. pixel_area_m2 is one value or a per-pixel array; on a
+    degree grid pass the per-pixel areas, since they shrink with latitude.
+    Building pixels are (row, col) level-0 indices.
+    """
+
+    def __init__(self, levels, bounds, prone_elevations, prone_area_cumsum, building_elevations,
+                 total_buildings, max_slope=5):
+        self.levels = levels
+        self.bounds = bounds
+        self.prone_elevations = prone_elevations
+        self.prone_area_cumsum = prone_area_cumsum
+        self.building_elevations = building_elevations
+        self.total_buildings = total_buildings
+        self.max_slope = max_slope
+
+    @classmethod
+    def build(cls, flood_frequency, elevation, slope, bounds, pixel_area_m2=900.0, building_rows=None,
+              building_cols=None, min_size=64, max_slope=5):
+        flood_frequency = np.asarray(flood_frequency, dtype=np.float32)
+        elevation = np.asarray(elevation, dtype=np.float32)
+        slope = np.asarray(slope, dtype=np.float32)
+
+        levels = [{"flood_frequency": flood_frequency, "elevation": elevation, "slope": slope}]
+        factor = 2
+        while max(flood_frequency.shape) // (factor // 2) > min_size:
+            levels.append({name: downsample(array, factor) for name, array in levels[0].items()})
+            factor *= 2
+
+        eligible = ~np.isnan(flood_frequency) & (slope < max_slope)
+        order = np.argsort(elevation[eligible], kind="stable")
+        prone_elevations = elevation[eligible][order]
+        area = np.broadcast_to(np.asarray(pixel_area_m2, dtype=np.float64), elevation.shape)[eligible][order]
+        prone_area_cumsum = np.concatenate([[0.0], np.cumsum(area)])
+
+        building_elevations = np.empty(0, dtype=np.float32)
+        total_buildings = None
+        if building_rows is not None:
+            at_building = eligible[building_rows, building_cols]
+            building_elevations = np.sort(elevation[building_rows, building_cols][at_building])
+            total_buildings = int(len(building_rows))
+
+        return cls(levels, bounds, prone_elevations, prone_area_cumsum, building_elevations,
+                   total_buildings, max_slope)
+
+    def level_for(self, max_pixels):
+        """Index of the finest level with at most max_pixels pixels (the coarsest one if none fits)."""
+        for index, level in enumerate(self.levels):
+            if level["flood_frequency"].size <= max_pixels:
+                return index
+        return len(self.levels) - 1
+
+    def flood_prone_area_km2(self, low_lying_threshold):
+        count = np.searchsorted(self.prone_elevations, low_lying_threshold, side="left")
+        return float(self.prone_area_cumsum[count]) / 1e6
+
+    def flooded_building_count(self, low_lying_threshold):
+        return int(np.searchsorted(self.building_elevations, low_lying_threshold, side="left"))
+
+    def layers(self, low_lying_threshold, max_pixels):
+        """Display arrays (flood frequency and flood-prone area, NaN = transparent) at the level that fits."""
+        level = self.levels[self.level_for(max_pixels)]
+        frequency = level["flood_frequency"]
+        prone = (level["elevation"] < low_lying_threshold) & (level["slope"] < self.max_slope)
+        return {
+            "Flood Frequency": frequency,
+            "Flood-Prone Areas": np.where(prone, frequency, np.nan),
+        }
+
+
+class Debouncer:
+    """Calls func once, delay_s after the last of a burst of calls, with the last call's arguments."""
+
+    def __init__(self, delay_s, func):
+        self.delay_s = delay_s
+        self.func = func
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay_s, self.func, args, kwargs)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def cancel(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+
+class FloodExplorer:
+    """Interactive backend: debounced, cancellable recomputes served from per-region overview pyramids.
+
+    load_layers(region, start_date, end_date) returns a dict with flood_frequency,
+    elevation and slope arrays, their bounds [west, south, east, north] and
+    optionally pixel_area_m2, building_rows and building_cols; it is the only
+    expensive call and runs once per (region, start_date, end_date). Widget
+    changes go through update(); each burst is debounced, a newer request
+    supersedes older ones (queued ones are cancelled, running ones are dropped
+    before rendering), and render(result) is called with the latest result only.
+    """
+
+    def __init__(self, load_layers, render=None, delay_s=0.25, max_pixels=512 * 512, max_cached_regions=8,
+                 **params):
+        self.load_layers = load_layers
+        self.render = render
+        self.max_pixels = max_pixels
+        self.max_cached_regions = max_cached_regions
+        self.params = dict({"region": None, "start_date": None, "end_date": None, "low_lying_threshold": 10},
+                           **params)
+        self.last_result = None
+        self.cancelled = 0
+        self.superseded = 0
+        self._pyramids = {}
+        self._generation = 0
+        self._pending = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._debouncer = Debouncer(delay_s, self._submit)
+
+    def update(self, **params):
+        """Records widget changes and schedules a (debounced) recompute."""
+        with self._lock:
+            self.params.update(params)
+        self._debouncer()
+
+    def refresh(self):
+        """Recomputes now with the current parameters and waits for the result."""
+        self._debouncer.cancel()
+        return self._submit().result()
+
+    def _submit(self):
+        with self._lock:
+            self._generation += 1
+            if self._pending is not None and self._pending.cancel():
+                self.cancelled += 1
+            self._pending = self._executor.submit(self._recompute, self._generation, dict(self.params))
+            return self._pending
+
+    def _is_superseded(self, generation):
+        if generation != self._generation:
+            self.superseded += 1
+            return True
+        return False
+
+    def pyramid(self, region, start_date, end_date):
+        """The overview pyramid of a region and date range, loading it on first use."""
+        key = (region, start_date, end_date)
+        pyramid = self._pyramids.pop(key, None)
+        if pyramid is None:
+            layers = dict(self.load_layers(region, start_date, end_date))
+            pyramid = OverviewPyramid.build(
+                layers.pop("flood_frequency"), layers.pop("elevation"), layers.pop("slope"),
+                layers.pop("bounds"), **layers)
+        self._pyramids[key] = pyramid  # most recently used last
+        while len(self._pyramids) > self.max_cached_regions:
+            self._pyramids.pop(next(iter(self._pyramids)))
+        return pyramid
+
+    def _recompute(self, generation, params):
+        if self._is_superseded(generation):
+            return None
+        key = (params["region"], params["start_date"], params["end_date"])
+        recompute = "threshold" if key in self._pyramids else "region"
+        pyramid = self.pyramid(*key)
+        if self._is_superseded(generation):
+            return None
+
+        threshold = params["low_lying_threshold"]
+        result = dict(params, recompute=recompute, bounds=pyramid.bounds,
+                      layers=pyramid.layers(threshold, self.max_pixels),
+                      flood_prone_area_km2=pyramid.flood_prone_area_km2(threshold),
+                      total_buildings=pyramid.total_buildings,
+                      flooded_building_count=pyramid.flooded_building_count(threshold))
+        if self._is_superseded(generation):
+            return None
+        self.last_result = result
+        if self.render is not None:
+            self.render(result)
+        return result
+
+    def close(self):
+        self._debouncer.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def array_to_png_url(array, vis):
+    """Encodes a 2-D array as an RGBA PNG data URL with an ee-style {min, max, palette}; NaN is transparent."""
+    array = np.asarray(array, dtype=np.float64)
+    palette = np.array([[int(color.lstrip("#")[i:i + 2], 16) for i in (0, 2, 4)] for color in vis["palette"]],
+                       dtype=np.float64)
+    valid = ~np.isnan(array)
+    scaled = np.clip((np.where(valid, array, vis["min"]) - vis["min"]) / (vis["max"] - vis["min"]), 0, 1)
+    position = scaled * (len(palette) - 1)
+    low = np.floor(position).astype(int)
+    high = np.minimum(low + 1, len(palette) - 1)
+    weight = (position - low)[..., None]
+    rgba = np.empty(array.shape + (4,), dtype=np.uint8)
+    rgba[..., :3] = np.round(palette[low] * (1 - weight) + palette[high] * weight)
+    rgba[..., 3] = np.where(valid, 255, 0)
+
+    height, width = array.shape
+    raw = b"".join(b"\x00" + row.tobytes() for row in rgba)
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    png = (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+           + chunk(b"IDAT", zlib.compress(raw, 6)) + chunk(b"IEND", b""))
+    return "data:image/png;base64," + base64.b64encode(png).decode("ascii")
+
+
+class MapRenderer:
+    """Draws explorer results on a geemap/ipyleaflet Map as image overlays that are updated in place."""
+
+    def __init__(self, Map, vis=None):
+        self.Map = Map
+        self.vis = {"Flood Frequency": FLOOD_FREQUENCY_VIS, "Flood-Prone Areas": FLOOD_PRONE_AREA_VIS}
+        self.vis.update(vis or {})
+        self._overlays = {}
+        self._label = None
+
+    def __call__(self, result):
+        import ipywidgets as widgets
+        from ipyleaflet import ImageOverlay, WidgetControl
+
+        west, south, east, north = result["bounds"]
+        bounds = ((south, west), (north, east))
+        for name, array in result["layers"].items():
+            url = array_to_png_url(array, self.vis[name])
+            overlay = self._overlays.get(name)
+            if overlay is None:
+                overlay = self._overlays[name] = ImageOverlay(url=url, bounds=bounds, name=name)
+                self.Map.add_layer(overlay)
+            else:
+                overlay.bounds = bounds
+                overlay.url = url
+
+        text = (f"Flooded Buildings: {result['flooded_building_count']}"
+                f" | Flood-prone area: {result['flood_prone_area_km2']:.2f} km²")
+        if self._label is None:
+            self._label = widgets.HTML(value=text)
+            self.Map.add_control(WidgetControl(widget=self._label, position="topright"))
+        else:
+            self._label.value = text
+
+
+def bind_widgets(explorer, **widgets_by_param):
+    """Forwards ipywidgets value changes to explorer.update(), e.g. low_lying_threshold=slider."""
+    for param, widget in widgets_by_param.items():
+        widget.observe(lambda change, param=param: explorer.update(**{param: change["new"]}), names="value")
+
+
+NO_DATA = -9999
+
+
+def ee_layer_loader(zones, zone_property, scale=30, buildings=None, building_page_size=5000):
+    """load_layers for FloodExplorer that fetches a zone's layers from Earth Engine with computePixels.
+
+    The flood frequency, SRTM elevation and slope of the zone named `region`
+    are fetched as one NumPy array on a grid over its bounds, with a step of
+    scale metres at the equator in degrees; pixels outside the zone or without
+    data come back as NaN in every layer. ee.Image.pixelArea() comes along as a
+    band, so the areas are per pixel and follow the latitude. With a
+    buildings FeatureCollection, their centroids are fetched once per region
+    too, in pages of building_page_size points. The grid must stay within the
+    computePixels size limit (~48 MB per request).
+    """
+    import ee
+    from concurrent.futures import ThreadPoolExecutor
+    from feature_exporter import EEFeatureSource
+    from flood_frequency_analysis import calculate_flood_frequency
+    from building_raster_sampling import xy_to_rowcol
+    from tiled_executor import geometry_bbox
+
+    def load_layers(region, start_date, end_date):
+        roi = zones.filter(ee.Filter.eq(zone_property, region)).geometry()
+        west, south, east, north = geometry_bbox(roi)
+        step = scale / 111320.0
+        width, height = max(int(np.ceil((east - west) / step)), 1), max(int(np.ceil((north - south) / step)), 1)
+        transform = (step, 0, west, 0, -step, north)
+
+        jrc = ee.ImageCollection("JRC/GSW1_4/MonthlyHistory").filterBounds(roi).filterDate(
+            str(start_date), str(end_date))
+        permanent_water = ee.Image("JRC/GSW1_4/GlobalSurfaceWater").select("occurrence").gte(90)
+        jrc = jrc.map(lambda img: img.updateMask(permanent_water.Not()))
+        srtm = ee.Image("USGS/SRTMGL1_003")
+        # Clip first, then fill every band, so masked pixels and pixels outside the
+        # zone share one sentinel instead of arriving as zeros.
+        stack = ee.Image.cat([
+            calculate_flood_frequency(jrc).rename("flood_frequency"),
+            srtm.rename("elevation"),
+            ee.Terrain.slope(srtm).rename("slope"),
+            ee.Image.pixelArea().rename("pixel_area"),
+        ]).clip(roi).unmask(NO_DATA)
+
+        pixels = ee.data.computePixels({
+            "expression": stack,
+            "fileFormat": "NUMPY_NDARRAY",
+            "grid": {
+                "dimensions": {"width": width, "height": height},
+                "affineTransform": {"scaleX": step, "shearX": 0, "translateX": west,
+                                    "shearY": 0, "scaleY": -step, "translateY": north},
+                "crsCode": "EPSG:4326",
+            },
+        })
+        bands = {}
+        for name in ("flood_frequency", "elevation", "slope", "pixel_area"):
+            band = pixels[name].astype(np.float64 if name == "pixel_area" else np.float32)
+            band[band == NO_DATA] = np.nan
+            bands[name] = band
+
+        layers = {
+            "flood_frequency": bands["flood_frequency"],
+            "elevation": bands["elevation"],
+            "slope": bands["slope"],
+            "bounds": [west, north - height * step, west + width * step, north],
+            "pixel_area_m2": bands["pixel_area"],
+        }
+        if buildings is not None:
+            source = EEFeatureSource(buildings.filterBounds(roi).map(lambda f: f.centroid(1)).select([]))
+            offsets = range(0, source.size(), building_page_size)
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                pages = pool.map(lambda offset: source.page(offset, building_page_size), offsets)
+                points = [feature["geometry"]["coordinates"] for page in pages for feature in page]
+            xs = np.array([p[0] for p in points], dtype=np.float64)
+            ys = np.array([p[1] for p in points], dtype=np.float64)
+            rows, cols = xy_to_rowcol(xs, ys, transform)
+            inside = (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+            layers["building_rows"], layers["building_cols"] = rows[inside], cols[inside]
+        return layers
+
+    return load_layers
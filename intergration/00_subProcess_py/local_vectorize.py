@@ -0,0 +1,111 @@
+# cassie/src/algorithms/flood_analysis/local_vectorize.py
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import shapely
+
+from building_raster_sampling import affine_coefficients
+
+
+def _row_runs(row):
+    """Start/stop columns of the True runs in one mask row."""
+    padded = np.concatenate(([False], row, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return edges[0::2], edges[1::2]
+
+
+def polygonize_tile(mask, row_offset, col_offset, transform):
+    """Polygonizes the True pixels of one mask tile at full resolution; returns WKB polygons.
+
+    Each row is run-length encoded into pixel-exact boxes, which are then
+    dissolved, so no pixel is dropped or resampled.
+    """
+    a, b, c, d, e, f = affine_coefficients(transform)
+    if b or d:
+        raise ValueError("❌ Only north-up (non-rotated) transforms are supported.")
+
+    x0s, x1s, y0s, y1s = [], [], [], []
+    for r in range(mask.shape[0]):
+        starts, stops = _row_runs(mask[r])
+        if len(starts):
+            row = row_offset + r
+            x0s.append(c + a * (col_offset + starts))
+            x1s.append(c + a * (col_offset + stops))
+            y0s.append(np.full(len(starts), f + e * row))
+            y1s.append(np.full(len(starts), f + e * (row + 1)))
+    if not x0s:
+        return []
+
+    boxes = shapely.box(np.concatenate(x0s), np.concatenate(y0s), np.concatenate(x1s), np.concatenate(y1s))
+    dissolved = shapely.union_all(boxes)
+    return shapely.to_wkb(shapely.get_parts(dissolved)).tolist()
+
+
+def simplify_and_buffer(polygons, simplify_tolerance, buffer_distance):
+    """Vectorized simplify then buffer of a polygon array (the simplify(30)/buffer(30) step)."""
+    polygons = np.asarray(polygons, dtype=object)
+    if simplify_tolerance:
+        polygons = shapely.simplify(polygons, simplify_tolerance, preserve_topology=True)
+    if buffer_distance:
+        polygons = shapely.buffer(polygons, buffer_distance)
+    return polygons
+
+
+def vectorize_tile(mask, row_offset, col_offset, transform, simplify_tolerance, buffer_distance):
+    """Pool worker: polygonizes one tile, simplifies and buffers its polygons and dissolves them; returns WKB."""
+    polygons = shapely.from_wkb(polygonize_tile(mask, row_offset, col_offset, transform))
+    return shapely.to_wkb(shapely.union_all(simplify_and_buffer(polygons, simplify_tolerance, buffer_distance)))
+
+
+def cascaded_union(geometries, fan_in=8):
+    """Dissolves geometries with a tree of small unions, stitching tile seams level by level."""
+    level = [g for g in geometries if g is not None and not shapely.is_empty(g)]
+    if not level:
+        return shapely.Polygon()
+    while len(level) > 1:
+        level = [shapely.union_all(level[i:i + fan_in]) for i in range(0, len(level), fan_in)]
+    return level[0]
+
+
+def vectorize_flood_prone_local(flood_prone_mask, transform, simplify_tolerance=None,
+                                buffer_distance=None, tile_size=512, max_workers=None):
+    """Local equivalent of the reduceToVectors -> simplify -> buffer -> union chain.
+
+    Each pool worker takes one tile of the mask at its native resolution (no
+    bestEffort coarsening): its pixels are dissolved into connected polygons
+    (what reduceToVectors returns, without the split by frequency value), each
+    polygon is simplified and buffered, and the tile is dissolved. Only that
+    tile union comes back to the parent, which merges the tiles with a cascaded
+    union. A polygon crossing a tile seam is simplified as separate pieces, so
+    its outline can differ from an untiled run, not only next to the seam; either
+    way it stays within tolerance + buffer of the pixel outline. Tolerance and buffer are in transform units and default to one pixel
+    (30 m for a 30 m grid, as in detect_flood_prone_areas). Returns a GeoJSON
+    FeatureCollection with one dissolved feature, like FeatureCollection.union().
+    """
+    mask = np.asarray(flood_prone_mask, dtype=bool)
+    pixel_size = abs(affine_coefficients(transform)[0])
+    simplify_tolerance = pixel_size if simplify_tolerance is None else simplify_tolerance
+    buffer_distance = pixel_size if buffer_distance is None else buffer_distance
+
+    windows = [
+        (row, col)
+        for row in range(0, mask.shape[0], tile_size)
+        for col in range(0, mask.shape[1], tile_size)
+        if mask[row:row + tile_size, col:col + tile_size].any()
+    ]
+    transform = affine_coefficients(transform)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(vectorize_tile, mask[row:row + tile_size, col:col + tile_size], row, col, transform,
+                        simplify_tolerance, buffer_distance)
+            for row, col in windows
+        ]
+        tile_unions = [shapely.from_wkb(future.result()) for future in futures]
+
+    dissolved = cascaded_union(tile_unions)
+    features = []
+    if not dissolved.is_empty:
+        features.append({"type": "Feature", "geometry": shapely.geometry.mapping(dissolved), "properties": {}})
+    return {"type": "FeatureCollection", "features": features}
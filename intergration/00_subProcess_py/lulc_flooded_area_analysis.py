@@ -2,40 +2,71 @@
 
 import ee
 
-def analyze_lulc_flooded_area(flood_prone_area, worldcover, roi):
-    """Analyzes flooded area per LULC class."""
-    lulc_mapping = {
-        10: "Tree cover",
-        20: "Shrubland",
-        30: "Grassland",
-        40: "Cropland",
-        50: "Built-up",
-        60: "Bare / sparse vegetation",
-        70: "Snow and ice",
-        80: "Permanent water bodies",
-        90: "Herbaceous wetland",
-        95: "Mangroves",
-    }
-
-    lulc_values = list(lulc_mapping.keys())
+LULC_MAPPING = {
+    10: "Tree cover",
+    20: "Shrubland",
+    30: "Grassland",
+    40: "Cropland",
+    50: "Built-up",
+    60: "Bare / sparse vegetation",
+    70: "Snow and ice",
+    80: "Permanent water bodies",
+    90: "Herbaceous wetland",
+    95: "Mangroves",
+}
+
+
+def lulc_area_groups(flood_prone_area, worldcover, roi, tile_scale=1):
+    """Builds one grouped reduction summing pixel area (m²) per WorldCover class code."""
     landcover_masked = worldcover.clip(roi).updateMask(flood_prone_area)
-    area_km2 = []
+    area = ee.Image.pixelArea().updateMask(landcover_masked.mask())
+    return area.addBands(landcover_masked).reduceRegion(
+        reducer=ee.Reducer.sum().group(groupField=1, groupName="class"),
+        geometry=roi,
+        scale=30,
+        maxPixels=1e13,
+        tileScale=tile_scale
+    )
 
-    for lulc_class in lulc_values:
-        class_mask = landcover_masked.eq(lulc_class)
-        area_m2 = class_mask.multiply(ee.Image.pixelArea()).reduceRegion(
-            reducer=ee.Reducer.sum(),
-            geometry=roi,
-            scale=30,
-            maxPixels=1e13
-        ).getInfo()
 
-        flooded_area_km2 = area_m2.get("Map", 0) / 1e6 if area_m2 else 0
+def format_lulc_areas(groups, lulc_mapping=None):
+    """Converts grouped area sums (m²) into the per-class km² rows of analyze_lulc_flooded_area."""
+    lulc_mapping = LULC_MAPPING if lulc_mapping is None else lulc_mapping
+    area_m2 = {int(group["class"]): group["sum"] for group in (groups or {}).get("groups", [])}
 
-        area_km2.append({
+    return [
+        {
             "LULC_Class": lulc_class,
-            "LULC_Name": lulc_mapping.get(lulc_class, "Unknown"),
-            "Flooded_Area_km²": flooded_area_km2
-        })
+            "LULC_Name": lulc_name,
+            "Flooded_Area_km²": area_m2.get(lulc_class, 0) / 1e6
+        }
+        for lulc_class, lulc_name in lulc_mapping.items()
+    ]
+
+
+def lulc_area_histogram_local(class_raster, area_raster, flood_prone_mask=None, lulc_mapping=None):
+    """Local equivalent of analyze_lulc_flooded_area: one bincount pass over a class and area raster."""
+    import numpy as np
+
+    classes = np.asarray(class_raster).ravel()
+    areas = np.asarray(area_raster, dtype=np.float64).ravel()
+    valid = classes >= 0
+    if flood_prone_mask is not None:
+        valid &= np.asarray(flood_prone_mask, dtype=bool).ravel()
+
+    sums = np.bincount(classes[valid].astype(np.int64), weights=areas[valid])
+    groups = [{"class": code, "sum": float(total)} for code, total in enumerate(sums) if total]
+    return format_lulc_areas({"groups": groups}, lulc_mapping)
+
+
+def analyze_lulc_flooded_area(flood_prone_area, worldcover, roi, lulc_mapping=None, deferred=None, tile_scale=1):
+    """Analyzes flooded area per LULC class.
 
-    return area_km2
\ No newline at end of file
+    When a DeferredResults batch is given, the grouped areas are registered on it
+    and a Deferred handle to the per-class rows is returned instead.
+    """
+    groups = lulc_area_groups(flood_prone_area, worldcover, roi, tile_scale)
+    if deferred is not None:
+        return deferred.register("lulc_areas", groups, lambda fetched: format_lulc_areas(fetched, lulc_mapping))
+    groups = groups.getInfo()
+    return format_lulc_areas(groups, lulc_mapping)
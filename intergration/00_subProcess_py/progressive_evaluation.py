@@ -0,0 +1,225 @@
+# cassie/src/algorithms/flood_analysis/progressive_evaluation.py
+
+import math
+import time
+
+import ee
+
+from lulc_flooded_area_analysis import LULC_MAPPING, format_lulc_areas
+
+DEFAULT_SCALES = (300, 120, 60, 30)
+NATIVE_SCALE = 30
+
+# Every coarse pass reduces the flood-prone mask at its own scale, so a preview
+# costs what a reduction at that scale costs. Its ± bounds come from a fixed
+# native-resolution sample: sample_points random points in the ROI are read
+# once at native_scale and again at each coarse scale, and the bound is the ROI
+# area times the Wilson upper confidence limit (z) of the share of points where
+# the two disagree, since the coarse and native flood-prone areas can differ by
+# no more than the area where they disagree. The local equivalent samples the
+# centre pixel of each coarse block instead, so its bounds are z standard errors
+# of that sample with the finite-population correction (zero at the native
+# scale). The flooded-building figure is only a heuristic, not a bound: it
+# applies the same uncertain share of the ROI to the building count.
+
+
+def _bound(count, sampled, fraction, roi_area, z):
+    if not sampled:
+        return 0.0
+    p = count / sampled
+    return z * math.sqrt(max(p * (1 - p) / sampled * (1 - fraction), 0.0)) * roi_area
+
+
+def _disagreement_bound(disagreeing, sampled, roi_area, z):
+    if not sampled:
+        return roi_area
+    share = disagreeing / sampled
+    spread = z * math.sqrt(share * (1 - share) / sampled + z * z / (4 * sampled * sampled))
+    return min((share + z * z / (2 * sampled) + spread) / (1 + z * z / sampled), 1.0) * roi_area
+
+
+def progressive_estimate(scale, roi_area_m2, prone_area_m2, area_error_m2, class_stats=None, total_buildings=None,
+                         flooded_buildings=None, native_scale=NATIVE_SCALE, lulc_mapping=None):
+    """Builds one progressive result (km², with ± bounds) from the areas and bounds at one scale.
+
+    class_stats maps LULC class -> (flood-prone area m², its error bound m²).
+    """
+    result = {
+        "scale": scale,
+        "final": scale <= native_scale,
+        "flood_prone_area_km2": prone_area_m2 / 1e6,
+        "flood_prone_area_error_km2": area_error_m2 / 1e6,
+        "relative_error": (area_error_m2 / prone_area_m2 if prone_area_m2
+                           else (0.0 if not area_error_m2 else math.inf)),
+    }
+
+    if class_stats is not None:
+        groups = [{"class": lulc_class, "sum": area} for lulc_class, (area, _) in class_stats.items()]
+        rows = format_lulc_areas({"groups": groups}, lulc_mapping)
+        for row in rows:
+            row["Flooded_Area_Error_km²"] = class_stats.get(row["LULC_Class"], (0, 0))[1] / 1e6
+        result["lulc_areas"] = rows
+
+    if total_buildings is not None:
+        uncertain_share = area_error_m2 / roi_area_m2 if roi_area_m2 else 0.0
+        result["total_buildings"] = total_buildings
+        result["flooded_building_count"] = flooded_buildings
+        result["flooded_building_error_estimate"] = min(uncertain_share * total_buildings, total_buildings)
+    return result
+
+
+def _parse_scale(fetched, native, scale, native_scale, z, lulc_mapping):
+    roi_area = fetched["roi"] or 0
+    prone_area = fetched["prone"] or 0
+    final = scale <= native_scale
+    coarse = native if final else fetched["sample"]
+    prone, native_prone = coarse["prone"], native["prone"]
+    sampled = len(native_prone)
+
+    def bound(coarse_flags, native_flags):
+        if final:
+            return 0.0
+        disagreeing = sum(1 for a, b in zip(coarse_flags, native_flags) if bool(a) != bool(b))
+        return _disagreement_bound(disagreeing, sampled, roi_area, z)
+
+    class_stats = None
+    if "lulc" in fetched:
+        class_stats = {}
+        for group in fetched["lulc"]["groups"]:
+            lulc_class = int(group["class"])
+            coarse_flags = [p and c == lulc_class for p, c in zip(prone, coarse["class"])]
+            native_flags = [p and c == lulc_class for p, c in zip(native_prone, native["class"])]
+            class_stats[lulc_class] = (group["sum"], bound(coarse_flags, native_flags))
+    return progressive_estimate(
+        scale, roi_area, prone_area, bound(prone, native_prone), class_stats, fetched.get("total_buildings"),
+        fetched.get("flooded_buildings"), native_scale, lulc_mapping)
+
+
+def progressive_flood_statistics(flood_prone_area, roi, worldcover=None, buildings=None, scales=DEFAULT_SCALES,
+                                 native_scale=NATIVE_SCALE, z=1.96, tolerance=None, on_result=None,
+                                 lulc_mapping=None, tile_scale=1, sample_points=500, seed=0):
+    """Yields flood-prone area, LULC areas and flooded-building counts at coarse-to-fine scales.
+
+    Each scale is one round trip and its result (with ± error bounds and the
+    seconds it took) is yielded, and passed to on_result, as soon as it
+    arrives. Stop early by breaking out of the loop, or with tolerance: once the
+    relative area error is at most tolerance no finer scale is computed.
+    Buildings are counted by footprint against the flood-prone raster
+    polygonized at each pass's scale, as analyze_flooded_buildings does at
+    30 m, so only the native pass matches the full run.
+    """
+    lulc_mapping = LULC_MAPPING if lulc_mapping is None else lulc_mapping
+    area = ee.Image.pixelArea()
+    prone_mask = flood_prone_area.mask()
+    prone_area = area.updateMask(prone_mask)
+    sum_reducer = ee.Reducer.sum()
+    flags = prone_mask.rename("prone")
+    if worldcover is not None:
+        flags = flags.addBands(worldcover.unmask(0).rename("class"))
+    points = ee.FeatureCollection.randomPoints(roi, sample_points, seed)
+    buildings_in_aoi = buildings.filterBounds(roi) if buildings is not None else None
+    native = None
+
+    def sample(scale):
+        sampled = flags.reduceRegions(collection=points, reducer=ee.Reducer.first().forEachBand(flags),
+                                      scale=scale, tileScale=tile_scale)
+        columns = {"prone": sampled.aggregate_array("prone")}
+        if worldcover is not None:
+            columns["class"] = sampled.aggregate_array("class")
+        return columns
+
+    for scale in sorted(scales, reverse=True):
+        values = {
+            "roi": area.reduceRegion(reducer=sum_reducer, geometry=roi, scale=scale, maxPixels=1e13,
+                                     tileScale=tile_scale).get("area"),
+            "prone": prone_area.reduceRegion(reducer=sum_reducer, geometry=roi, scale=scale, maxPixels=1e13,
+                                             tileScale=tile_scale).get("area"),
+        }
+        if native is None:
+            # The native sample is read once, with the first pass, and reused by every later one.
+            values["native"] = sample(native_scale)
+        if scale > native_scale:
+            values["sample"] = sample(scale)
+        if worldcover is not None:
+            values["lulc"] = prone_area.addBands(worldcover.rename("class")).reduceRegion(
+                reducer=sum_reducer.group(groupField=1, groupName="class"),
+                geometry=roi,
+                scale=scale,
+                maxPixels=1e13,
+                tileScale=tile_scale
+            )
+        if buildings_in_aoi is not None:
+            flood_prone_vector = flood_prone_area.clip(roi).toInt().reduceToVectors(
+                reducer=ee.Reducer.countEvery(),
+                geometry=roi,
+                geometryType='polygon',
+                scale=scale,
+                maxPixels=1e13,
+                tileScale=tile_scale
+            )
+            values["total_buildings"] = buildings_in_aoi.size()
+            values["flooded_buildings"] = buildings_in_aoi.filterBounds(flood_prone_vector.geometry()).size()
+
+        start = time.perf_counter()
+        fetched = ee.Dictionary(values).getInfo()
+        native = fetched.get("native", native)
+        result = _parse_scale(fetched, native, scale, native_scale, z, lulc_mapping)
+        result["elapsed_s"] = time.perf_counter() - start
+        if on_result is not None:
+            on_result(result)
+        yield result
+        if tolerance is not None and result["relative_error"] <= tolerance:
+            return
+
+
+def progressive_flood_statistics_local(flood_prone_mask, lulc=None, building_rows=None, building_cols=None,
+                                       pixel_area_m2=900.0, factors=(10, 4, 2, 1), z=1.96, tolerance=None,
+                                       on_result=None, lulc_mapping=None):
+    """Local equivalent of progressive_flood_statistics over a native-resolution flood-prone mask.
+
+    A factor-k step samples the centre pixel of every k x k block (a scale of k
+    native pixels); building rows/cols are native pixel indices and take the
+    value of their block's sample, as a coarse raster lookup would. Negative or
+    NaN lulc pixels (nodata) have no class.
+    """
+    import numpy as np
+
+    mask = np.asarray(flood_prone_mask, dtype=bool)
+    height, width = mask.shape
+    for factor in sorted(factors, reverse=True):
+        start = time.perf_counter()
+        offset = factor // 2
+        sampled = mask[offset::factor, offset::factor]
+        coarse_area = pixel_area_m2 * factor * factor
+        roi_pixels = int(sampled.size)
+        prone_pixels = int(sampled.sum())
+
+        fraction = 1.0 / (factor * factor)
+        area_error = _bound(prone_pixels, roi_pixels, fraction, roi_pixels * coarse_area, z)
+
+        class_stats = None
+        if lulc is not None:
+            classes = np.asarray(lulc)[offset::factor, offset::factor][sampled]
+            counts = np.bincount(classes[classes >= 0].astype(np.int64))
+            class_stats = {
+                int(c): (float(counts[c] * coarse_area), _bound(counts[c], roi_pixels, fraction,
+                                                                roi_pixels * coarse_area, z))
+                for c in np.nonzero(counts)[0]
+            }
+
+        total_buildings = flooded_buildings = None
+        if building_rows is not None:
+            rows = np.minimum(np.asarray(building_rows) // factor * factor + offset, height - 1)
+            cols = np.minimum(np.asarray(building_cols) // factor * factor + offset, width - 1)
+            total_buildings = int(len(rows))
+            flooded_buildings = int(mask[rows, cols].sum())
+
+        result = progressive_estimate(
+            factor, roi_pixels * coarse_area, prone_pixels * coarse_area, area_error, class_stats,
+            total_buildings, flooded_buildings, native_scale=1, lulc_mapping=lulc_mapping)
+        result["elapsed_s"] = time.perf_counter() - start
+        if on_result is not None:
+            on_result(result)
+        yield result
+        if tolerance is not None and result["relative_error"] <= tolerance:
+            return
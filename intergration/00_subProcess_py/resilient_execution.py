@@ -0,0 +1,190 @@
+# cassie/src/algorithms/utils/resilient_execution.py
+
+import re
+import time
+
+import ee
+
+from deferred_results import DeferredResults
+from flood_prone_area_detection import vectorize_flood_prone_area
+from flooded_building_analysis import analyze_flooded_buildings
+from lulc_flooded_area_analysis import analyze_lulc_flooded_area
+from tiled_executor import geometry_bbox, split_bbox, tile_geometry, merge_sums, merge_lulc_areas, owned_by_tile
+
+MEMORY = "memory"
+TIMEOUT = "timeout"
+TRANSIENT = "transient"
+FATAL = "fatal"
+
+ERROR_PATTERNS = [
+    (MEMORY, re.compile(r"memory limit exceeded|out of memory|too many pixels|exceeds? max ?pixels", re.I)),
+    (TIMEOUT, re.compile(r"timed? ?out|deadline exceeded|time limit", re.I)),
+    (TRANSIENT, re.compile(r"too many concurrent|rate limit|quota|429|503|service unavailable|internal error",
+                           re.I)),
+]
+
+
+def classify_error(error):
+    """Returns MEMORY, TIMEOUT, TRANSIENT or FATAL for an exception raised by an Earth Engine call."""
+    message = str(error)
+    for kind, pattern in ERROR_PATTERNS:
+        if pattern.search(message):
+            return kind
+    return FATAL
+
+
+class TimeBudgetExceeded(RuntimeError):
+    """The resilient execution ran out of its time budget before a region succeeded."""
+
+
+class ResilientExecutor:
+    """Runs a region computation, escalating on memory errors and timeouts instead of dying.
+
+    compute(geometry, tile_scale, bbox) must evaluate its result (getInfo) so
+    that failures surface inside the call; bbox is the [west, south, east,
+    north] box the geometry was cut from. Transient errors are retried with
+    exponential backoff at the same settings. Memory errors and timeouts move on
+    to the next tile_scale; when every tile_scale failed, the region's bounding
+    box is bisected along its longer side, both halves are run the same way
+    (down to max_depth) and merge(results) combines them, so results must be
+    additive over disjoint regions. Every escalation is passed to on_event and
+    kept in self.escalations. time_budget_s bounds all runs of one executor
+    together, counted from its first run().
+    """
+
+    def __init__(self, tile_scales=(1, 2, 4, 8, 16), max_depth=4, time_budget_s=None, transient_retries=3,
+                 backoff_s=1.0, on_event=None, sleep=time.sleep):
+        self.tile_scales = tile_scales
+        self.max_depth = max_depth
+        self.time_budget_s = time_budget_s
+        self.transient_retries = transient_retries
+        self.backoff_s = backoff_s
+        self.on_event = on_event
+        self.sleep = sleep
+        self.escalations = []
+        self._deadline = None
+
+    def _log(self, event, **fields):
+        record = dict({"event": event}, **fields)
+        self.escalations.append(record)
+        if self.on_event is not None:
+            self.on_event(record)
+
+    def _check_budget(self, bbox, depth):
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            self._log("budget_exceeded", bbox=bbox, depth=depth)
+            raise TimeBudgetExceeded(f"❌ Time budget of {self.time_budget_s} s exceeded at region {bbox}.")
+
+    def run(self, compute, roi, merge, bbox=None):
+        """Computes over roi (ee.Geometry), splitting it within bbox [west, south, east, north] if needed."""
+        if self._deadline is None and self.time_budget_s is not None:
+            self._deadline = time.monotonic() + self.time_budget_s
+        return self._run(compute, merge, roi, roi, bbox or geometry_bbox(roi), 0)
+
+    def _attempt(self, compute, geometry, bbox, depth, tile_scale):
+        for retry in range(self.transient_retries + 1):
+            self._check_budget(bbox, depth)
+            try:
+                return compute(geometry, tile_scale, bbox)
+            except TimeBudgetExceeded:
+                raise
+            except Exception as e:
+                kind = classify_error(e)
+                if kind != TRANSIENT or retry == self.transient_retries:
+                    raise
+                delay = self.backoff_s * 2 ** retry
+                self._log("retry", bbox=bbox, depth=depth, tile_scale=tile_scale, error=str(e), delay_s=delay)
+                self.sleep(delay)
+
+    def _run(self, compute, merge, roi, geometry, bbox, depth):
+        error = None
+        for index, tile_scale in enumerate(self.tile_scales):
+            try:
+                return self._attempt(compute, geometry, bbox, depth, tile_scale)
+            except TimeBudgetExceeded:
+                raise
+            except Exception as e:
+                kind = classify_error(e)
+                if kind not in (MEMORY, TIMEOUT):
+                    self._log("failed", bbox=bbox, depth=depth, tile_scale=tile_scale, kind=kind, error=str(e))
+                    raise
+                error = e
+                # A larger tileScale only lowers memory per tile; a timeout needs a smaller region.
+                if kind == TIMEOUT or index == len(self.tile_scales) - 1:
+                    break
+                self._log("escalate_tile_scale", bbox=bbox, depth=depth, tile_scale=tile_scale,
+                          next_tile_scale=self.tile_scales[index + 1], kind=kind, error=str(e))
+
+        if depth >= self.max_depth:
+            self._log("failed", bbox=bbox, depth=depth, kind=classify_error(error), error=str(error))
+            raise error
+
+        west, south, east, north = bbox
+        halves = split_bbox(bbox, 1, 2) if east - west >= north - south else split_bbox(bbox, 2, 1)
+        self._log("split", bbox=bbox, depth=depth, halves=halves, kind=classify_error(error), error=str(error))
+        return merge([
+            self._run(compute, merge, roi, tile_geometry(roi, half), half, depth + 1) for half in halves
+        ])
+
+
+def resilient_lulc_areas(flood_prone_area, worldcover, roi, executor=None, lulc_mapping=None):
+    """analyze_lulc_flooded_area with tileScale escalation and region splitting."""
+    executor = executor or ResilientExecutor()
+
+    def compute(geometry, tile_scale, bbox):
+        return analyze_lulc_flooded_area(flood_prone_area, worldcover, geometry, lulc_mapping,
+                                         tile_scale=tile_scale)
+
+    return executor.run(compute, roi, merge_lulc_areas)
+
+
+def resilient_building_counts(flood_prone_area, buildings, roi, executor=None, margin_m=250):
+    """(total, flooded) building counts with tileScale escalation and region splitting.
+
+    Each region runs analyze_flooded_buildings, so buildings are counted by
+    footprint exactly as in the batched run. When a region is split, a building
+    in the ROI belongs to the half (of the bbox) holding its centroid and is
+    tested against the flood polygons of that half grown by margin_m, as in
+    analyze_tiled.
+    """
+    executor = executor or ResilientExecutor()
+    root_bbox = geometry_bbox(roi)
+    buildings_in_roi = buildings.filterBounds(roi)
+
+    def compute(geometry, tile_scale, bbox):
+        in_region = buildings_in_roi
+        flood_region = None
+        if bbox != root_bbox:
+            grown = ee.Geometry.BBox(*bbox).buffer(margin_m, 10)
+            in_region = owned_by_tile(buildings_in_roi.filterBounds(grown), bbox, root_bbox)
+            flood_region = grown.intersection(roi, 1)
+        deferred = DeferredResults()
+        total, flooded, _, _ = analyze_flooded_buildings(flood_prone_area, in_region, roi, deferred=deferred,
+                                                         tile_scale=tile_scale, flood_region=flood_region)
+        deferred.resolve()
+        return total.value, flooded.value
+
+    def merge(results):
+        return merge_sums([r[0] for r in results]), merge_sums([r[1] for r in results])
+
+    return executor.run(compute, roi, merge, root_bbox)
+
+
+def resilient_flood_prone_vectors(flood_prone_area, roi, executor=None):
+    """Flood-prone vectors at full 30 m resolution (no bestEffort), split into pieces if needed.
+
+    Each piece is forced to compute by fetching its feature count; pieces of a
+    split region are merged into one FeatureCollection (polygons crossing a
+    split line come out cut, flood_prone_polygons dissolves them again).
+    """
+    executor = executor or ResilientExecutor()
+
+    def compute(geometry, tile_scale, bbox):
+        vectors = vectorize_flood_prone_area(flood_prone_area, geometry, tile_scale, best_effort=False)
+        vectors.size().getInfo()
+        return vectors
+
+    def merge(results):
+        return ee.FeatureCollection(results).flatten()
+
+    return executor.run(compute, roi, merge)
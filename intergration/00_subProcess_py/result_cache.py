@@ -0,0 +1,234 @@
+# cassie/src/algorithms/utils/result_cache.py
+
+import os
+import json
+import pickle
+import hashlib
+import functools
+
+import ee
+
+from deferred_results import Deferred
+
+
+def _round_coordinates(coordinates, ndigits):
+    if isinstance(coordinates, (list, tuple)):
+        return [_round_coordinates(c, ndigits) for c in coordinates]
+    if isinstance(coordinates, float):
+        return round(coordinates, ndigits)
+    return coordinates
+
+
+def normalize_aoi(aoi, ndigits=7):
+    """Returns a canonical GeoJSON-like dict for a bbox list, GeoJSON dict, shapely or ee geometry."""
+    if isinstance(aoi, (list, tuple)) and len(aoi) == 4:
+        west, south, east, north = aoi
+        aoi = {
+            "type": "Polygon",
+            "coordinates": [[[west, south], [east, south], [east, north], [west, north], [west, south]]],
+        }
+    elif isinstance(aoi, ee.Geometry):
+        aoi = aoi.toGeoJSON()
+    elif hasattr(aoi, "__geo_interface__"):
+        aoi = aoi.__geo_interface__
+
+    if not isinstance(aoi, dict) or "type" not in aoi:
+        raise TypeError(f"❌ Unsupported AOI type for caching: {type(aoi).__name__}")
+
+    normalized = {key: value for key, value in aoi.items() if key != "coordinates"}
+    if "coordinates" in aoi:
+        normalized["coordinates"] = _round_coordinates(aoi["coordinates"], ndigits)
+    return normalized
+
+
+def cache_key(stage, aoi, params, datasets):
+    """Hashes the stage name, normalized AOI, parameters and dataset IDs into a cache key."""
+    payload = {
+        "stage": stage,
+        "aoi": normalize_aoi(aoi),
+        "params": params,
+        "datasets": datasets,
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class _Unresolved(Exception):
+    """Raised while encoding a result that still holds a pending Deferred."""
+
+
+def _encode(value):
+    if isinstance(value, Deferred):
+        if not value.resolved:
+            raise _Unresolved(value.name)
+        return {"__deferred__": value.name, "value": _encode(value.value)}
+    if isinstance(value, ee.ComputedObject):
+        return {"__ee__": ee.serializer.toJSON(value)}
+    if isinstance(value, tuple):
+        return {"__tuple__": [_encode(v) for v in value]}
+    if isinstance(value, list):
+        return [_encode(v) for v in value]
+    if isinstance(value, dict):
+        return {key: _encode(v) for key, v in value.items()}
+    return value
+
+
+def _lazy_only(value):
+    """True when a value holds nothing but unevaluated ee objects (cheap to rebuild, nothing to save)."""
+    if isinstance(value, ee.ComputedObject):
+        return True
+    if isinstance(value, (list, tuple)):
+        return bool(value) and all(_lazy_only(v) for v in value)
+    if isinstance(value, dict):
+        return bool(value) and all(_lazy_only(v) for v in value.values())
+    return False
+
+
+def _decode(value):
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if "__deferred__" in value:
+        handle = Deferred(value["__deferred__"])
+        handle._set(_decode(value["value"]))
+        return handle
+    if "__ee__" in value:
+        return ee.deserializer.fromJSON(value["__ee__"])
+    if "__tuple__" in value:
+        return tuple(_decode(v) for v in value["__tuple__"])
+    return {key: _decode(v) for key, v in value.items()}
+
+
+class ResultCache:
+    """Content-addressed on-disk cache for flood pipeline stage results.
+
+    Entries are keyed on the stage name, normalized AOI, parameters and dataset
+    IDs, stored as one pickle file each and evicted least-recently-used once the
+    directory grows past max_bytes. Only results that hold fetched values are
+    stored: Deferred handles once resolved (see flush()) and plain client-side
+    data. A result made only of lazy ee objects is not cached, because rebuilding
+    the graph is cheap and the server computes it again at getInfo/export
+    anyway; ee objects next to fetched values are kept as serialized graphs.
+    """
+
+    def __init__(self, cache_dir, max_bytes=256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self._pending = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, stage, key):
+        return os.path.join(self.cache_dir, f"{stage}-{key}.pkl")
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pkl"):
+                path = os.path.join(self.cache_dir, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def get(self, stage, key):
+        """Returns (True, value) on a hit and (False, None) on a miss.
+
+        An entry that cannot be loaded for any reason (truncated, written by an
+        incompatible version, ...) is a miss and is evicted.
+        """
+        path = self._path(stage, key)
+        try:
+            with open(path, "rb") as f:
+                value = _decode(pickle.load(f))
+        except FileNotFoundError:
+            self.misses += 1
+            return False, None
+        except Exception:
+            self.misses += 1
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            return False, None
+        os.utime(path)  # Mark as most recently used.
+        self.hits += 1
+        return True, value
+
+    def put(self, stage, key, value):
+        """Stores a value; values holding unresolved Deferred handles are written by flush().
+
+        Values made only of lazy ee objects are skipped (see the class docstring).
+        """
+        if _lazy_only(value):
+            self.skipped += 1
+            return
+        try:
+            encoded = _encode(value)
+        except _Unresolved:
+            self._pending[(stage, key)] = value
+            return
+        path = self._path(stage, key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(encoded, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def flush(self):
+        """Writes entries that were waiting on Deferred handles; call after DeferredResults.resolve()."""
+        pending, self._pending = self._pending, {}
+        for (stage, key), value in pending.items():
+            self.put(stage, key, value)
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def invalidate(self, stage=None, key=None):
+        """Removes one entry, every entry of a stage, or (with no arguments) the whole cache."""
+        removed = 0
+        for _, _, path in self._entries():
+            name = os.path.basename(path)[:-len(".pkl")]
+            entry_stage, _, entry_key = name.rpartition("-")
+            if (stage is None or entry_stage == stage) and (key is None or entry_key == key):
+                os.remove(path)
+                removed += 1
+        return removed
+
+    def stats(self):
+        """Returns hit/miss counters and the current size of the cache."""
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+        }
+
+    def stage(self, func, aoi, params, datasets, stage=None):
+        """Wraps a stage function so its result is cached under (stage, aoi, params, datasets).
+
+        The wrapped function's own arguments are not hashed: they must be derived
+        from the AOI, parameters and datasets that make up the key.
+        """
+        stage = stage or func.__name__
+        key = cache_key(stage, aoi, params, datasets)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            found, value = self.get(stage, key)
+            if found:
+                return value
+            value = func(*args, **kwargs)
+            self.put(stage, key, value)
+            return value
+
+        return wrapper
@@ -0,0 +1,244 @@
+# cassie/src/algorithms/utils/run_result_store.py
+
+import json
+import uuid
+import hashlib
+import datetime
+
+from result_cache import normalize_aoi
+
+SCHEMA_VERSION = 1
+
+# One row per run in a hive-partitioned Parquet dataset (run_month=YYYY-MM/...).
+# The schema is fixed here; new columns may only be appended as nullable fields,
+# so every file ever written reads back with run_schema() (missing columns are
+# null) and old runs stay queryable. Runs refer to their AOI by aoi_hash; each
+# distinct geometry is stored once in the _aois side table (the leading
+# underscore keeps it out of the run dataset scan).
+
+AOI_DIR = "_aois"
+
+
+def run_schema():
+    """The stable Arrow schema of a run row (run_month is the partition column)."""
+    import pyarrow as pa
+
+    return pa.schema([
+        ("run_id", pa.string()),
+        ("run_month", pa.string()),
+        ("started_at", pa.timestamp("us", tz="UTC")),
+        ("finished_at", pa.timestamp("us", tz="UTC")),
+        ("aoi_hash", pa.string()),
+        ("start_date", pa.date32()),
+        ("end_date", pa.date32()),
+        ("low_lying_threshold", pa.float64()),
+        ("parameters", pa.string()),
+        ("datasets", pa.string()),
+        ("total_buildings", pa.int64()),
+        ("flooded_building_count", pa.int64()),
+        ("lulc_areas", pa.list_(pa.struct([
+            ("lulc_class", pa.int32()),
+            ("lulc_name", pa.string()),
+            ("flooded_area_km2", pa.float64()),
+        ]))),
+        ("stage_timings", pa.list_(pa.struct([
+            ("stage", pa.string()),
+            ("calls", pa.int32()),
+            ("wall_s", pa.float64()),
+            ("remote_calls", pa.int64()),
+            ("payload_bytes", pa.int64()),
+            ("peak_mb", pa.float64()),
+        ]))),
+        ("schema_version", pa.int32()),
+    ])
+
+
+def aoi_schema():
+    """The Arrow schema of the AOI side table, one row per aoi_hash."""
+    import pyarrow as pa
+
+    return pa.schema([("aoi_hash", pa.string()), ("aoi_geojson", pa.string())])
+
+
+def aoi_hash(aoi):
+    """Hashes the normalized AOI (bbox, GeoJSON, shapely or ee geometry) as in result_cache."""
+    encoded = json.dumps(normalize_aoi(aoi), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _utc(moment):
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=datetime.timezone.utc)
+    return moment.astimezone(datetime.timezone.utc)
+
+
+def run_record(aoi, start_date, end_date, low_lying_threshold, started_at, finished_at=None,
+               total_buildings=None, flooded_building_count=None, lulc_areas=None, stage_summary=None,
+               parameters=None, datasets=None, run_id=None):
+    """Builds one run row from the run inputs, the analyze_lulc_flooded_area rows and Instrumentation.summary()."""
+    started_at = _utc(started_at)
+    finished_at = _utc(finished_at or datetime.datetime.now(datetime.timezone.utc))
+    return {
+        "run_id": run_id or uuid.uuid4().hex,
+        "run_month": started_at.strftime("%Y-%m"),
+        "started_at": started_at,
+        "finished_at": finished_at,
+        "aoi_hash": aoi_hash(aoi),
+        "start_date": start_date,
+        "end_date": end_date,
+        "low_lying_threshold": float(low_lying_threshold),
+        "parameters": json.dumps(parameters or {}, sort_keys=True, default=str),
+        "datasets": json.dumps(datasets or {}, sort_keys=True),
+        "total_buildings": total_buildings,
+        "flooded_building_count": flooded_building_count,
+        "lulc_areas": [
+            {
+                "lulc_class": row["LULC_Class"],
+                "lulc_name": row["LULC_Name"],
+                "flooded_area_km2": row["Flooded_Area_km²"],
+            }
+            for row in lulc_areas or []
+        ],
+        "stage_timings": [
+            {
+                "stage": row["stage"],
+                "calls": row["calls"],
+                "wall_s": row["wall_s"],
+                "remote_calls": row["remote_calls"],
+                "payload_bytes": row["payload_bytes"],
+                "peak_mb": row.get("peak_mb"),
+            }
+            for row in stage_summary or []
+        ],
+        "schema_version": SCHEMA_VERSION,
+    }
+
+
+class RunResultStore:
+    """Appends run rows to a partitioned Parquet dataset and reads them back with predicate pushdown.
+
+    Each append() writes one new file under run_month=YYYY-MM, so concurrent
+    runs never rewrite each other's files; compact() merges a month's small
+    files into one. read() takes a pyarrow.compute expression or DNF filters
+    such as [("aoi_hash", "=", h), ("run_month", ">=", "2025-01")]: partitions
+    are pruned by run_month and row groups by their column statistics.
+    put_aoi() stores a run's geometry once per aoi_hash and aoi() reads it back.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def _dataset(self):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        schema = run_schema()
+        partitioning = ds.partitioning(pa.schema([schema.field("run_month")]), flavor="hive")
+        return ds.dataset(self.root, schema=schema, format="parquet", partitioning=partitioning)
+
+    def append(self, records):
+        """Writes run rows (dicts from run_record) and returns the number of rows written."""
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        records = [records] if isinstance(records, dict) else list(records)
+        if not records:
+            return 0
+        schema = run_schema()
+        table = pa.Table.from_pylist(records, schema=schema)
+        ds.write_dataset(
+            table, self.root, format="parquet",
+            partitioning=ds.partitioning(pa.schema([schema.field("run_month")]), flavor="hive"),
+            basename_template=f"runs-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+        return table.num_rows
+
+    def put_aoi(self, aoi):
+        """Stores the normalized AOI under its hash unless it is already there; returns the hash."""
+        import os
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        geometry = normalize_aoi(aoi)
+        digest = aoi_hash(geometry)
+        directory = os.path.join(self.root, AOI_DIR)
+        path = os.path.join(directory, f"{digest}.parquet")
+        if os.path.exists(path):
+            return digest
+        os.makedirs(directory, exist_ok=True)
+        table = pa.Table.from_pylist(
+            [{"aoi_hash": digest, "aoi_geojson": json.dumps(geometry, separators=(",", ":"))}],
+            schema=aoi_schema(),
+        )
+        # Written aside and renamed, so a concurrent run storing the same AOI never leaves a partial file.
+        tmp_path = os.path.join(directory, f".{digest}-{uuid.uuid4().hex}.tmp")
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+        return digest
+
+    def aoi(self, digest):
+        """Returns the GeoJSON geometry stored for an aoi_hash, or None if it is unknown."""
+        import os
+        import pyarrow.parquet as pq
+
+        path = os.path.join(self.root, AOI_DIR, f"{digest}.parquet")
+        if not os.path.exists(path):
+            return None
+        return json.loads(pq.read_table(path, schema=aoi_schema())["aoi_geojson"][0].as_py())
+
+    def aois(self):
+        """Returns the whole AOI side table (aoi_hash, aoi_geojson), e.g. to join with read()."""
+        import os
+        import pyarrow.dataset as ds
+
+        directory = os.path.join(self.root, AOI_DIR)
+        if not os.path.isdir(directory):
+            return aoi_schema().empty_table()
+        return ds.dataset(directory, schema=aoi_schema(), format="parquet").to_table()
+
+    def read(self, columns=None, filters=None):
+        """Returns the matching runs as a pyarrow Table (an empty one when nothing was stored yet)."""
+        import os
+        import pyarrow.parquet as pq
+
+        if not os.path.isdir(self.root):
+            return run_schema().empty_table() if columns is None else run_schema().empty_table().select(columns)
+        if isinstance(filters, list):
+            filters = pq.filters_to_expression(filters)
+        return self._dataset().to_table(columns=columns, filter=filters)
+
+    def lulc_areas(self, filters=None):
+        """One row per run and LULC class (run_id, started_at, aoi_hash, lulc_class, lulc_name, flooded_area_km2)."""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        table = self.read(columns=["run_id", "started_at", "aoi_hash", "lulc_areas"], filters=filters)
+        parents = pc.list_parent_indices(table["lulc_areas"])
+        classes = pc.list_flatten(table["lulc_areas"])
+        columns = {name: pc.take(table[name], parents) for name in ("run_id", "started_at", "aoi_hash")}
+        columns.update({name: pc.struct_field(classes, name) for name in ("lulc_class", "lulc_name", "flooded_area_km2")})
+        return pa.table(columns)
+
+    def compact(self, run_month):
+        """Rewrites one month partition as a single file; returns the number of files replaced."""
+        import os
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+
+        directory = os.path.join(self.root, f"run_month={run_month}")
+        if not os.path.isdir(directory):
+            return 0
+        paths = sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".parquet"))
+        if len(paths) < 2:
+            return 0
+        # Only the listed files are merged, so a run appended meanwhile is left alone.
+        schema = run_schema()
+        file_schema = schema.remove(schema.get_field_index("run_month"))
+        table = ds.dataset(paths, schema=file_schema, format="parquet").to_table()
+        tmp_path = os.path.join(directory, f".compact-{uuid.uuid4().hex}.tmp")
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, os.path.join(directory, f"runs-{uuid.uuid4().hex}-0.parquet"))
+        for path in paths:
+            os.remove(path)
+        return len(paths)
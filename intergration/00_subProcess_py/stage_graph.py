@@ -0,0 +1,68 @@
+# cassie/src/algorithms/utils/stage_graph.py
+
+
+class Ref:
+    """Marks a stage argument that is the output of another stage (or a source value)."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return f"Ref({self.name!r})"
+
+
+class StageGraph:
+    """Explicit pipeline graph whose stages are evaluated at most once and shared by every consumer.
+
+    Sources are plain values; stages are functions whose positional and keyword
+    arguments may be Ref(name) placeholders. get() evaluates a stage and its
+    dependencies on first use and memoizes the result, so fanning an
+    intermediate out to several consumers never recomputes it.
+    """
+
+    def __init__(self):
+        self._stages = {}
+        self._values = {}
+        self._order = []
+        self.evaluations = 0
+        self.deduplicated = 0
+
+    def source(self, name, value):
+        """Registers an already computed input value."""
+        self._values[name] = value
+        return Ref(name)
+
+    def add(self, name, func, *args, **kwargs):
+        """Registers a stage; returns a Ref to its output."""
+        if name in self._stages or name in self._values:
+            raise ValueError(f"❌ Stage '{name}' is already defined.")
+        self._stages[name] = (func, args, kwargs)
+        return Ref(name)
+
+    def _resolve(self, value):
+        return self.get(value.name) if isinstance(value, Ref) else value
+
+    def get(self, name):
+        """Returns a stage's output, evaluating it (and its inputs) only the first time."""
+        if name in self._values:
+            if name in self._stages:
+                self.deduplicated += 1
+            return self._values[name]
+        if name not in self._stages:
+            raise KeyError(f"❌ Unknown stage '{name}'.")
+
+        func, args, kwargs = self._stages[name]
+        args = [self._resolve(a) for a in args]
+        kwargs = {key: self._resolve(v) for key, v in kwargs.items()}
+        self._values[name] = func(*args, **kwargs)
+        self.evaluations += 1
+        self._order.append(name)
+        return self._values[name]
+
+    def report(self):
+        """Summarizes how many stages ran and how many repeated requests were served from memory."""
+        return {
+            "evaluations": self.evaluations,
+            "deduplicated": self.deduplicated,
+            "order": list(self._order),
+        }
@@ -0,0 +1,194 @@
+# cassie/src/algorithms/utils/terrain_tile_cache.py
+
+import os
+import json
+import math
+
+import numpy as np
+
+ELEVATION = 0
+SLOPE = 1
+
+GEOGRAPHIC_CRS = "EPSG:4326"
+# SRTMGL1's 1 arc-second grid (pixel centres on whole seconds) from 180°W, 60°N.
+SRTM_TRANSFORM = (1 / 3600, 0.0, -180.0 - 1 / 7200, 0.0, -1 / 3600, 60.0 + 1 / 7200)
+METRES_PER_DEGREE = 2 * math.pi * 6378137.0 / 360
+
+
+def terrain_slope(elevation, pixel_size_x, pixel_size_y):
+    """Slope in degrees with Horn's 3x3 method (as ee.Terrain.slope), for the inner pixels of a haloed block.
+
+    Pixel sizes are in metres; pixel_size_x may be one value per inner row,
+    as on a degree grid where it shrinks with latitude.
+    """
+    z = np.asarray(elevation, dtype=np.float64)
+    pixel_size_x = np.reshape(np.asarray(pixel_size_x, dtype=np.float64), (-1, 1))
+    dzdx = ((z[:-2, 2:] + 2 * z[1:-1, 2:] + z[2:, 2:]) - (z[:-2, :-2] + 2 * z[1:-1, :-2] + z[2:, :-2])) / (8 * pixel_size_x)
+    dzdy = ((z[2:, :-2] + 2 * z[2:, 1:-1] + z[2:, 2:]) - (z[:-2, :-2] + 2 * z[:-2, 1:-1] + z[:-2, 2:])) / (8 * pixel_size_y)
+    return np.degrees(np.arctan(np.hypot(dzdx, dzdy))).astype(np.float32)
+
+
+def pixel_sizes_m(transform, crs, row_start, row_stop):
+    """(pixel_size_x per row, pixel_size_y) in metres for rows [row_start, row_stop) of a north-up grid.
+
+    On a geographic grid a degree of longitude spans cos(latitude) of a degree
+    of latitude, so x spacing is taken at each row's centre latitude.
+    """
+    a, _, _, _, e, f = transform
+    if crs != GEOGRAPHIC_CRS:
+        return np.full(row_stop - row_start, abs(a)), abs(e)
+    latitudes = f + (np.arange(row_start, row_stop) + 0.5) * e
+    return abs(a) * METRES_PER_DEGREE * np.cos(np.radians(latitudes)), abs(e) * METRES_PER_DEGREE
+
+
+class TerrainTileCache:
+    """Memory-mapped store of SRTM elevation and precomputed slope in fixed-size tiles.
+
+    Tile (tile_row, tile_col) covers pixels [tile_row * tile_size, ...) of a
+    fixed north-up pixel grid, georeferenced by its affine transform (a, b, c,
+    d, e, f) and crs (SRTMGL1's 1 arc-second grid by default), and is stored as
+    one (2, tile_size, tile_size) float32 .npy file (band 0 elevation, band 1
+    slope). Missing tiles are built once with fetch_elevation(row_start,
+    row_stop, col_start, col_stop), which must return the elevation block
+    including a 1-pixel halo on every side. Slope uses the pixel spacing in
+    metres at each row's latitude. Reads are memory-mapped, so band views are
+    zero-copy and only touched pages are read. The grid is stored in
+    terrain.json, so a cache is only reopened with the grid it was built on.
+    """
+
+    def __init__(self, root, fetch_elevation=None, tile_size=512, transform=SRTM_TRANSFORM, crs=GEOGRAPHIC_CRS):
+        self.root = root
+        self.fetch_elevation = fetch_elevation
+        self.tile_size = tile_size
+        self.transform = tuple(float(v) for v in transform[:6])
+        self.crs = crs
+        if self.transform[1] or self.transform[3]:
+            raise ValueError(f"❌ Terrain cache grids must be north-up, got transform {self.transform}.")
+        self._tiles = {}
+        os.makedirs(root, exist_ok=True)
+
+        meta_path = os.path.join(root, "terrain.json")
+        meta = {"tile_size": tile_size, "transform": list(self.transform), "crs": crs}
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                stored = json.load(f)
+            if stored != meta:
+                raise ValueError(f"❌ Terrain cache at {root} was built with {stored}, not {meta}.")
+        else:
+            with open(meta_path, "w") as f:
+                json.dump(meta, f)
+
+    def _path(self, tile_row, tile_col):
+        return os.path.join(self.root, f"{tile_row}_{tile_col}.npy")
+
+    def has_tile(self, tile_row, tile_col):
+        return os.path.exists(self._path(tile_row, tile_col))
+
+    def _build_tile(self, tile_row, tile_col):
+        if self.fetch_elevation is None:
+            raise KeyError(f"❌ Terrain tile {tile_row}_{tile_col} is not cached and no fetch_elevation was given.")
+        size = self.tile_size
+        row_start, col_start = tile_row * size, tile_col * size
+        block = np.asarray(
+            self.fetch_elevation(row_start - 1, row_start + size + 1, col_start - 1, col_start + size + 1),
+            dtype=np.float32,
+        )
+        if block.shape != (size + 2, size + 2):
+            raise ValueError(f"❌ fetch_elevation returned {block.shape}, expected {(size + 2, size + 2)}.")
+
+        path = self._path(tile_row, tile_col)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        tile = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(2, size, size))
+        tile[ELEVATION] = block[1:-1, 1:-1]
+        pixel_size_x, pixel_size_y = pixel_sizes_m(self.transform, self.crs, row_start, row_start + size)
+        tile[SLOPE] = terrain_slope(block, pixel_size_x, pixel_size_y)
+        tile.flush()
+        del tile
+        os.replace(tmp_path, path)
+
+    def window_transform(self, row_start, col_start):
+        """Affine transform of a pixel window whose top-left pixel is (row_start, col_start)."""
+        a, b, c, d, e, f = self.transform
+        return (a, b, c + col_start * a, d, e, f + row_start * e)
+
+    def tile_transform(self, tile_row, tile_col):
+        """Affine transform of one tile."""
+        return self.window_transform(tile_row * self.tile_size, tile_col * self.tile_size)
+
+    def window_offset(self, transform, tolerance=1e-6):
+        """(row_start, col_start) of a raster with this transform on the cache grid.
+
+        Raises ValueError if the raster's pixels are not the cache's pixels
+        (another pixel size, or an origin off the grid by more than tolerance
+        of a pixel).
+        """
+        from building_raster_sampling import affine_coefficients
+
+        a, b, c, d, e, f = affine_coefficients(transform)
+        grid = self.transform
+        if not (math.isclose(a, grid[0], rel_tol=tolerance) and math.isclose(e, grid[4], rel_tol=tolerance)
+                and b == 0 and d == 0):
+            raise ValueError(f"❌ Transform {(a, b, c, d, e, f)} does not match the terrain cache grid {grid}.")
+        col = (c - grid[2]) / grid[0]
+        row = (f - grid[5]) / grid[4]
+        if abs(col - round(col)) > tolerance or abs(row - round(row)) > tolerance:
+            raise ValueError(f"❌ Transform {(a, b, c, d, e, f)} is not aligned with the terrain cache grid {grid}.")
+        return int(round(row)), int(round(col))
+
+    def tile(self, tile_row, tile_col):
+        """Returns the memory-mapped (2, tile_size, tile_size) array of a tile, building it if needed."""
+        key = (tile_row, tile_col)
+        if key not in self._tiles:
+            if not self.has_tile(tile_row, tile_col):
+                self._build_tile(tile_row, tile_col)
+            self._tiles[key] = np.load(self._path(tile_row, tile_col), mmap_mode="r")
+        return self._tiles[key]
+
+    def elevation(self, tile_row, tile_col):
+        """Zero-copy view of a tile's elevation band."""
+        return self.tile(tile_row, tile_col)[ELEVATION]
+
+    def slope(self, tile_row, tile_col):
+        """Zero-copy view of a tile's slope band."""
+        return self.tile(tile_row, tile_col)[SLOPE]
+
+    def flat_area(self, tile_row, tile_col, max_slope=5):
+        """slope < max_slope mask of a tile (the flat_area of detect_flood_prone_areas)."""
+        return self.slope(tile_row, tile_col) < max_slope
+
+    def low_lying(self, tile_row, tile_col, low_lying_threshold):
+        """elevation < threshold mask of a tile (the low_lying of detect_flood_prone_areas)."""
+        return self.elevation(tile_row, tile_col) < low_lying_threshold
+
+    def tiles_for_window(self, row_start, row_stop, col_start, col_stop):
+        """Lists the (tile_row, tile_col) keys overlapping a pixel window."""
+        size = self.tile_size
+        return [
+            (tile_row, tile_col)
+            for tile_row in range(row_start // size, math.ceil(row_stop / size))
+            for tile_col in range(col_start // size, math.ceil(col_stop / size))
+        ]
+
+    def window(self, band, row_start, row_stop, col_start, col_stop):
+        """Returns a pixel window of one band; a zero-copy view when it lies inside a single tile."""
+        size = self.tile_size
+        keys = self.tiles_for_window(row_start, row_stop, col_start, col_stop)
+        if len(keys) == 1:
+            tile_row, tile_col = keys[0]
+            r0, c0 = tile_row * size, tile_col * size
+            return self.tile(tile_row, tile_col)[band, row_start - r0:row_stop - r0, col_start - c0:col_stop - c0]
+
+        out = np.empty((row_stop - row_start, col_stop - col_start), dtype=np.float32)
+        for tile_row, tile_col in keys:
+            r0, c0 = tile_row * size, tile_col * size
+            rs, re = max(row_start, r0), min(row_stop, r0 + size)
+            cs, ce = max(col_start, c0), min(col_stop, c0 + size)
+            out[rs - row_start:re - row_start, cs - col_start:ce - col_start] = \
+                self.tile(tile_row, tile_col)[band, rs - r0:re - r0, cs - c0:ce - c0]
+        return out
+
+    def flood_prone_mask(self, row_start, row_stop, col_start, col_stop, low_lying_threshold, max_slope=5):
+        """low_lying & flat_area for a pixel window, derived from the cached bands."""
+        elevation = self.window(ELEVATION, row_start, row_stop, col_start, col_stop)
+        slope = self.window(SLOPE, row_start, row_stop, col_start, col_stop)
+        return (elevation < low_lying_threshold) & (slope < max_slope)
@@ -0,0 +1,2 @@
+# cassie/testing/__init__.py
+"""Test doubles shared by the pytest suite and the offline benchmark suite."""
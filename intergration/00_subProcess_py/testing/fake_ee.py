@@ -0,0 +1,1025 @@
+# cassie/testing/fake_ee.py
+"""Offline, recording stand-in for the `ee` module used by the flood stage modules.
+
+Images are NumPy masked arrays on one synthetic 30 m grid and are evaluated
+eagerly; collections are lazy so a long monthly stack never sits in memory.
+Every getInfo() is recorded as one round trip with its JSON payload size and
+an optional simulated latency. Earth Engine failures can be injected: memory
+errors for reductions over more than memory_limit_pixels per tile (a tileScale
+of s divides that cost by s²), timeouts above timeout_pixels whatever the
+tileScale, and transient errors on the first transient_failures round trips.
+Point features (buildings) are squares reaching building_radius pixels around
+their centroid, so filterBounds() tests a footprint, not only its centre.
+Install with install(FakeBackend(...)) before importing the stage modules.
+"""
+
+import sys
+import json
+import time
+import types
+import datetime
+import threading
+from collections import Counter
+
+import numpy as np
+
+PIXEL_DEGREES = 0.00027  # ~30 m at the equator
+PIXEL_AREA_M2 = 900.0
+
+_backend = None
+
+
+class FakeBackend:
+    """Synthetic datasets plus the call/round-trip recorder shared by all fake ee objects."""
+
+    def __init__(self, size=128, months=48, buildings=2000, latency_s=0.0, seed=0,
+                 origin=(-58.05, 6.78), start_year=1984, memory_limit_pixels=None, timeout_pixels=None,
+                 transient_failures=0, building_radius=0):
+        self.shape = (size, size)
+        self.building_radius = building_radius
+        self.memory_limit_pixels = memory_limit_pixels
+        self.timeout_pixels = timeout_pixels
+        self.transient_failures = transient_failures
+        self.origin = origin
+        self.latency_s = latency_s
+        self.seed = seed
+        self.month_list = []
+        year, month = start_year, 3
+        for _ in range(months):
+            self.month_list.append(datetime.date(year, month, 1))
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+        rng = np.random.default_rng(seed)
+        rows, cols = np.mgrid[0:size, 0:size]
+        # Smooth coastal ramp with noise: low near row 0, rising inland.
+        self.elevation = (rows * (40.0 / size) + rng.normal(0, 0.8, self.shape)).astype(np.float64)
+        self.occurrence = np.clip(100 - rows * (300.0 / size), 0, 100) + rng.uniform(0, 5, self.shape)
+        codes = np.array([10, 20, 30, 40, 50, 60, 80, 90, 95])
+        self.worldcover = codes[(rows // 8 + cols // 8 + rng.integers(0, 3, self.shape)) % len(codes)]
+        self.water_probability = np.clip(0.6 - rows / size, 0.02, 0.6)
+        self.building_rows = rng.integers(0, size, buildings)
+        self.building_cols = rng.integers(0, size, buildings)
+
+        self.calls = Counter()
+        self.round_trips = 0
+        self.payload_bytes = 0
+        self.failures = Counter()
+        self._lock = threading.Lock()
+
+    # --- recording -------------------------------------------------------
+
+    def record(self, op):
+        with self._lock:
+            self.calls[op] += 1
+
+    def round_trip(self, value):
+        with self._lock:
+            if self.transient_failures > 0:
+                self.transient_failures -= 1
+                self.failures["transient"] += 1
+                raise EEException("Too many concurrent aggregations.")
+        payload = json.dumps(value, default=float)
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        with self._lock:
+            self.round_trips += 1
+            self.payload_bytes += len(payload)
+        return json.loads(payload)
+
+    def check_cost(self, pixels, tile_scale=1):
+        """Returns the injected failure for a reduction over `pixels` pixels, or None."""
+        with self._lock:
+            if self.timeout_pixels is not None and pixels > self.timeout_pixels:
+                self.failures["timeout"] += 1
+                return _Failed("Computation timed out.")
+            if self.memory_limit_pixels is not None and pixels / tile_scale ** 2 > self.memory_limit_pixels:
+                self.failures["memory"] += 1
+                return _Failed("User memory limit exceeded.")
+        return None
+
+    def reset_counters(self):
+        with self._lock:
+            self.failures = Counter()
+            self.calls = Counter()
+            self.round_trips = 0
+            self.payload_bytes = 0
+
+    # --- coordinates -----------------------------------------------------
+
+    def pixel_centers(self):
+        rows, cols = np.mgrid[0:self.shape[0], 0:self.shape[1]]
+        west, north = self.origin
+        return west + (cols + 0.5) * PIXEL_DEGREES, north - (rows + 0.5) * PIXEL_DEGREES
+
+    def bbox(self):
+        west, north = self.origin
+        return [west, north - self.shape[0] * PIXEL_DEGREES, west + self.shape[1] * PIXEL_DEGREES, north]
+
+    def month_water(self, date):
+        rng = np.random.default_rng((self.seed, date.year, date.month))
+        draw = rng.random(self.shape)
+        water = np.where(draw < self.water_probability, 2, 1).astype(np.int64)
+        water[draw > 0.97] = 0  # no-data pixels
+        return water
+
+
+def _masked(data, mask=None):
+    data = np.asarray(data)
+    return np.ma.MaskedArray(data, mask=np.zeros(data.shape, bool) if mask is None else mask)
+
+
+# --- computed objects ----------------------------------------------------
+
+class EEException(Exception):
+    pass
+
+
+class ComputedObject:
+    """Base of the fake computed objects; each subclass evaluates itself in _evaluate()."""
+
+    def getInfo(self):
+        _backend.record("getInfo")
+        return _backend.round_trip(_evaluate(self))
+
+
+class _Failed(ComputedObject):
+    """A computation that fails with an EEException when it is evaluated; chained calls keep failing."""
+
+    def __init__(self, message):
+        self.message = message
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self
+
+    def _evaluate(self):
+        raise EEException(self.message)
+
+
+def _evaluate(value):
+    if isinstance(value, ComputedObject):
+        return value._evaluate()
+    if isinstance(value, dict):
+        return {k: _evaluate(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_evaluate(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class Number(ComputedObject):
+    def __init__(self, value):
+        self._value = value._value if isinstance(value, Number) else value
+
+    def eq(self, other):
+        return Number(int(self._value == (other._value if isinstance(other, Number) else other)))
+
+    def add(self, other):
+        return Number(self._value + (other._value if isinstance(other, Number) else other))
+
+    def _evaluate(self):
+        return _evaluate(self._value)
+
+
+class Dictionary(ComputedObject):
+    def __init__(self, values=None):
+        _backend.record("Dictionary")
+        self._values = dict(values or {})
+
+    def get(self, key, default=None):
+        return Number(self._values.get(key, default))
+
+    def _evaluate(self):
+        return {k: _evaluate(v) for k, v in self._values.items()}
+
+
+class List(ComputedObject):
+    def __init__(self, values):
+        self._values = [_evaluate(v) for v in values]
+
+    def distinct(self):
+        return List(list(dict.fromkeys(self._values)))
+
+    def indexOf(self, element):
+        element = _evaluate(element)
+        return Number(self._values.index(element) if element in self._values else -1)
+
+    def size(self):
+        return Number(len(self._values))
+
+    def _evaluate(self):
+        return [_evaluate(v) for v in self._values]
+
+
+class Date:
+    def __init__(self, value):
+        self.date = value if isinstance(value, datetime.date) else datetime.date.fromisoformat(str(value)[:10])
+
+    @staticmethod
+    def fromYMD(year, month, day):
+        return Date(datetime.date(year, month, day))
+
+    def get(self, unit):
+        return Number(getattr(self.date, unit))
+
+
+# --- geometry ------------------------------------------------------------
+
+def _grow(mask, pixels):
+    """Grows a mask by `pixels` in every direction (diagonals included)."""
+    for _ in range(pixels):
+        grown = mask.copy()
+        grown[1:] |= grown[:-1].copy()
+        grown[:-1] |= grown[1:].copy()
+        grown[:, 1:] |= grown[:, :-1].copy()
+        grown[:, :-1] |= grown[:, 1:].copy()
+        mask = grown
+    return mask
+
+
+class Geometry(ComputedObject):
+    def __init__(self, geojson=None, mask=None):
+        _backend.record("Geometry")
+        self._geojson = geojson
+        if mask is None:
+            import shapely
+            xs, ys = _backend.pixel_centers()
+            mask = shapely.contains_xy(shapely.geometry.shape(geojson), xs, ys)
+        self.mask = mask
+
+    @staticmethod
+    def BBox(west, south, east, north):
+        _backend.record("Geometry.BBox")
+        xs, ys = _backend.pixel_centers()
+        geojson = {
+            "type": "Polygon",
+            "coordinates": [[[west, south], [east, south], [east, north], [west, north], [west, south]]],
+        }
+        return Geometry(geojson, (xs >= west) & (xs < east) & (ys >= south) & (ys < north))
+
+    def toGeoJSON(self):
+        if self._geojson is None:
+            raise ValueError("Computed geometries have no client-side GeoJSON.")
+        return self._geojson
+
+    def intersection(self, other, maxError=None):
+        _backend.record("Geometry.intersection")
+        return Geometry(None, self.mask & other.mask)
+
+    def bounds(self, maxError=None):
+        _backend.record("Geometry.bounds")
+        rows, cols = np.nonzero(self.mask)
+        if not len(rows):
+            return Geometry({"type": "Polygon", "coordinates": [[]]}, np.zeros(_backend.shape, bool))
+        west, north = _backend.origin
+        return Geometry.BBox(west + cols.min() * PIXEL_DEGREES, north - (rows.max() + 1) * PIXEL_DEGREES,
+                             west + (cols.max() + 1) * PIXEL_DEGREES, north - rows.min() * PIXEL_DEGREES)
+
+    def buffer(self, distance, maxError=None):
+        _backend.record("Geometry.buffer")
+        steps = int(np.ceil(abs(distance) / 30.0))
+        mask = self.mask.copy()
+        for _ in range(steps):
+            grown = mask.copy()
+            grown[1:] |= mask[:-1]
+            grown[:-1] |= mask[1:]
+            grown[:, 1:] |= mask[:, :-1]
+            grown[:, :-1] |= mask[:, 1:]
+            mask = grown
+        return Geometry(None, mask)
+
+    def area(self, maxError=None):
+        return Number(float(self.mask.sum() * PIXEL_AREA_M2))
+
+    def _evaluate(self):
+        if self._geojson is not None:
+            return self._geojson
+        return {"type": "MultiPolygon", "pixels": int(self.mask.sum())}
+
+
+# --- images --------------------------------------------------------------
+
+def _stride(scale):
+    return max(1, int(round(scale / 30.0))) if scale else 1
+
+
+def _operand(value):
+    return value._first() if isinstance(value, Image) else value
+
+
+class Image(ComputedObject):
+    _date = None
+
+    def __init__(self, source=None, bands=None):
+        if bands is not None:
+            self.bands = bands
+            return
+        _backend.record("Image")
+        if isinstance(source, Image):
+            self.bands = dict(source.bands)
+        elif source == "USGS/SRTMGL1_003":
+            self.bands = {"elevation": _masked(_backend.elevation)}
+        elif source == "JRC/GSW1_4/GlobalSurfaceWater":
+            self.bands = {"occurrence": _masked(_backend.occurrence)}
+        elif isinstance(source, Number):
+            self.bands = {"constant": _masked(np.full(_backend.shape, source._value, dtype=np.float64))}
+        elif isinstance(source, (int, float)):
+            self.bands = {"constant": _masked(np.full(_backend.shape, source, dtype=np.float64))}
+        else:
+            raise ValueError(f"Unknown fake image: {source!r}")
+
+    @staticmethod
+    def constant(value):
+        _backend.record("Image.constant")
+        return Image(value)
+
+    @staticmethod
+    def cat(images):
+        _backend.record("Image.cat")
+        bands = {}
+        for image in images:
+            bands.update(image.bands)
+        return Image(bands=bands)
+
+    @staticmethod
+    def pixelArea():
+        _backend.record("Image.pixelArea")
+        return Image(bands={"area": _masked(np.full(_backend.shape, PIXEL_AREA_M2))})
+
+    def _first(self):
+        return next(iter(self.bands.values()))
+
+    def date(self):
+        return Date(self._date)
+
+    def _map(self, op, func):
+        _backend.record(f"Image.{op}")
+        image = Image(bands={name: func(band) for name, band in self.bands.items()})
+        image._date = self._date
+        return image
+
+    def _binary(self, op, other, func):
+        other = _operand(other)
+        return self._map(op, lambda band: func(band, other))
+
+    def gt(self, other): return self._binary("gt", other, lambda a, b: (a > b).astype(np.int64))
+    def gte(self, other): return self._binary("gte", other, lambda a, b: (a >= b).astype(np.int64))
+    def lt(self, other): return self._binary("lt", other, lambda a, b: (a < b).astype(np.int64))
+    def lte(self, other): return self._binary("lte", other, lambda a, b: (a <= b).astype(np.int64))
+    def eq(self, other): return self._binary("eq", other, lambda a, b: (a == b).astype(np.int64))
+    def neq(self, other): return self._binary("neq", other, lambda a, b: (a != b).astype(np.int64))
+    def add(self, other): return self._binary("add", other, lambda a, b: a + b)
+    def subtract(self, other): return self._binary("subtract", other, lambda a, b: a - b)
+    def multiply(self, other): return self._binary("multiply", other, lambda a, b: a * b)
+    def divide(self, other): return self._binary("divide", other, lambda a, b: np.ma.divide(a.astype(np.float64), b))
+    def And(self, other): return self._binary("And", other, lambda a, b: ((a != 0) & (b != 0)).astype(np.int64))
+    def Or(self, other): return self._binary("Or", other, lambda a, b: ((a != 0) | (b != 0)).astype(np.int64))
+    def Not(self): return self._map("Not", lambda a: (a == 0).astype(np.int64))
+    def toInt(self): return self._map("toInt", lambda a: a.astype(np.int64))
+    def unmask(self, value=0): return self._map("unmask", lambda a: _masked(a.filled(value)))
+    def mask(self): return self._map("mask", lambda a: _masked((~np.ma.getmaskarray(a)).astype(np.int64)))
+
+    def updateMask(self, mask_image):
+        m = mask_image._first()
+        keep = ~np.ma.getmaskarray(m) & (m.filled(0) != 0)
+        return self._map("updateMask", lambda a: np.ma.MaskedArray(a.data, mask=np.ma.getmaskarray(a) | ~keep))
+
+    def selfMask(self):
+        return self.updateMask(self)
+
+    def reproject(self, crs=None, crsTransform=None, scale=None):
+        # Fake images only exist on the native grid, so there is nothing to resample.
+        return self._map("reproject", lambda a: a)
+
+    def clip(self, geometry):
+        return self._map("clip", lambda a: np.ma.MaskedArray(a.data, mask=np.ma.getmaskarray(a) | ~geometry.mask))
+
+    def rename(self, *names):
+        _backend.record("Image.rename")
+        names = list(names[0]) if len(names) == 1 and isinstance(names[0], (list, tuple)) else list(names)
+        return Image(bands=dict(zip(names, self.bands.values())))
+
+    def select(self, *names):
+        _backend.record("Image.select")
+        names = list(names[0]) if len(names) == 1 and isinstance(names[0], (list, tuple)) else list(names)
+        return Image(bands={name: self.bands[name] for name in names})
+
+    def addBands(self, images):
+        _backend.record("Image.addBands")
+        bands = dict(self.bands)
+        for image in images if isinstance(images, (list, tuple)) else [images]:
+            bands.update(image.bands)
+        return Image(bands=bands)
+
+    def reduceRegion(self, reducer, geometry=None, scale=None, maxPixels=None, bestEffort=False, tileScale=1):
+        _backend.record("Image.reduceRegion")
+        inside = geometry.mask if geometry is not None else np.ones(_backend.shape, bool)
+        names = list(self.bands)
+        arrays = list(self.bands.values())
+        step = _stride(scale)
+        if step > 1:
+            # Coarser scales sample the centre pixel of each step x step block; the
+            # "area" band (pixelArea) then stands for the whole coarse pixel.
+            sample = np.zeros(_backend.shape, bool)
+            sample[step // 2::step, step // 2::step] = True
+            inside = inside & sample
+            arrays = [band * step * step if name == "area" else band for name, band in zip(names, arrays)]
+        failed = _backend.check_cost(int(inside.sum()), tileScale)
+        if failed is not None:
+            return failed
+        return Dictionary(reducer._reduce(names, arrays, inside))
+
+    def reduceToVectors(self, geometryType="polygon", reducer=None, geometry=None, scale=None,
+                        maxPixels=None, bestEffort=False, tileScale=1, **kwargs):
+        _backend.record("Image.reduceToVectors")
+        band = self._first()
+        mask = ~np.ma.getmaskarray(band)
+        step = _stride(scale)
+        if step > 1:
+            # A coarse scale polygonizes the centre pixel of each step x step block over the whole block.
+            centres = mask[step // 2::step, step // 2::step]
+            mask = np.repeat(np.repeat(centres, step, axis=0), step, axis=1)[:mask.shape[0], :mask.shape[1]]
+        if geometry is not None:
+            mask &= geometry.mask
+        pixels = int(geometry.mask.sum() if geometry is not None else band.size) // (step * step)
+        failed = _backend.check_cost(pixels, tileScale)
+        if failed is not None:
+            return failed
+        labels = np.unique(band.data[mask]) if mask.any() else []
+        return FeatureCollection(_region=(mask, len(labels)))
+
+    def reduceRegions(self, collection, reducer, scale=None, **kwargs):
+        _backend.record("Image.reduceRegions")
+        rows, cols = collection._rows, collection._cols
+        step = _stride(scale)
+        if step > 1:
+            rows = np.minimum(rows // step * step + step // 2, _backend.shape[0] - 1)
+            cols = np.minimum(cols // step * step + step // 2, _backend.shape[1] - 1)
+        properties = dict(collection._props)
+        # One output per band: the setOutputs() names, the band names after forEachBand(), else "first".
+        for name, band in zip(reducer._outputs or ["first"], self.bands.values()):
+            properties[name] = np.where(np.ma.getmaskarray(band)[rows, cols], np.nan,
+                                        band.data[rows, cols].astype(np.float64))
+        return FeatureCollection(_points=(collection._rows, collection._cols, properties))
+
+    def _evaluate(self):
+        return {"type": "Image", "bands": [{"id": name} for name in self.bands]}
+
+
+class Terrain:
+    @staticmethod
+    def slope(image):
+        _backend.record("Terrain.slope")
+        z = np.pad(image._first().filled(0).astype(np.float64), 1, mode="edge")
+        dzdx = ((z[:-2, 2:] + 2 * z[1:-1, 2:] + z[2:, 2:]) - (z[:-2, :-2] + 2 * z[1:-1, :-2] + z[2:, :-2])) / 240.0
+        dzdy = ((z[2:, :-2] + 2 * z[2:, 1:-1] + z[2:, 2:]) - (z[:-2, :-2] + 2 * z[:-2, 1:-1] + z[:-2, 2:])) / 240.0
+        return Image(bands={"slope": _masked(np.degrees(np.arctan(np.hypot(dzdx, dzdy))))})
+
+
+class ImageCollection(ComputedObject):
+    """Lazy collection: images are generated and mapped one at a time when reduced."""
+
+    def __init__(self, source=None, _items=None, _funcs=(), _bands=None):
+        if _items is None:
+            _backend.record("ImageCollection")
+            if source == "JRC/GSW1_4/MonthlyHistory":
+                _items = [("jrc", date) for date in _backend.month_list]
+            elif source == "ESA/WorldCover/v200":
+                _items = [("worldcover", None)]
+            else:
+                raise ValueError(f"Unknown fake collection: {source!r}")
+        self._items = _items
+        self._funcs = tuple(_funcs)
+        self._bands = _bands
+
+    def _derive(self, items=None, funcs=None, bands=None):
+        return ImageCollection(
+            _items=self._items if items is None else items,
+            _funcs=self._funcs if funcs is None else funcs,
+            _bands=self._bands if bands is None else bands,
+        )
+
+    def _images(self):
+        for kind, date in self._items:
+            if kind == "jrc":
+                image = Image(bands={"water": _masked(_backend.month_water(date))})
+                image._date = date
+            else:
+                image = Image(bands={"Map": _masked(_backend.worldcover)})
+            for func in self._funcs:
+                image = func(image)
+            if self._bands is not None:
+                image = image.select(self._bands)
+            yield image
+
+    def filterBounds(self, geometry):
+        _backend.record("ImageCollection.filterBounds")
+        return self._derive()
+
+    def filterDate(self, start, end):
+        _backend.record("ImageCollection.filterDate")
+        start, end = Date(start).date if not isinstance(start, Date) else start.date, \
+            Date(end).date if not isinstance(end, Date) else end.date
+        return self._derive(items=[(k, d) for k, d in self._items if d is None or start <= d < end])
+
+    def map(self, func):
+        _backend.record("ImageCollection.map")
+        return self._derive(funcs=self._funcs + (func,))
+
+    def select(self, *names):
+        _backend.record("ImageCollection.select")
+        names = list(names[0]) if len(names) == 1 and isinstance(names[0], (list, tuple)) else list(names)
+        return self._derive(bands=names)
+
+    def first(self):
+        _backend.record("ImageCollection.first")
+        return next(self._images())
+
+    def size(self):
+        return Number(len(self._items))
+
+    def sum(self):
+        _backend.record("ImageCollection.sum")
+        totals = {}
+        for image in self._images():
+            for name, band in image.bands.items():
+                valid = ~np.ma.getmaskarray(band)
+                data = band.filled(0).astype(np.int64 if band.dtype.kind in "biu" else np.float64)
+                if name not in totals:
+                    totals[name] = [data.copy(), valid.copy()]
+                else:
+                    totals[name][0] += data
+                    totals[name][1] |= valid
+        return Image(bands={name: np.ma.MaskedArray(data, mask=~valid) for name, (data, valid) in totals.items()})
+
+    def _evaluate(self):
+        return {"type": "ImageCollection", "size": len(self._items)}
+
+
+# --- features ------------------------------------------------------------
+
+class Feature(ComputedObject):
+    """Feature with a pixel-mask geometry; simplify/buffer/centroid are no-ops on that representation."""
+
+    def __init__(self, geometry=None, properties=None):
+        self._geometry = geometry
+        self._properties = dict(properties or {})
+
+    def simplify(self, *args, **kwargs): return self
+    def buffer(self, *args, **kwargs): return self
+    def centroid(self, *args, **kwargs): return self
+    def coordinates(self): return List([0, 0])
+
+    def geometry(self):
+        return self._geometry if self._geometry is not None else self
+
+    def get(self, prop):
+        return Number(self._properties.get(prop))
+
+    def set(self, *args, **kwargs):
+        if len(args) == 2:
+            return Feature(self._geometry, dict(self._properties, **{args[0]: _evaluate(args[1])}))
+        return self
+
+    def _evaluate(self):
+        return {"type": "Feature", "geometry": None, "properties": self._properties}
+
+
+class _PointFeatures(Feature):
+    """All features of a point collection at once, so map() can compute per-point properties as arrays."""
+
+    def __init__(self, rows, cols, properties):
+        super().__init__(None, properties)
+        self._rows, self._cols = rows, cols
+
+    def coordinates(self):
+        west, north = _backend.origin
+        xs = west + (self._cols + 0.5) * PIXEL_DEGREES
+        ys = north - (self._rows + 0.5) * PIXEL_DEGREES
+        return types.SimpleNamespace(get=lambda i: Number((xs, ys)[i]))
+
+    def set(self, *args, **kwargs):
+        values = args[0] if len(args) == 1 else {args[0]: args[1]}
+        properties = dict(self._properties)
+        properties.update({k: np.asarray(v._value if isinstance(v, Number) else v) for k, v in values.items()})
+        return _PointFeatures(self._rows, self._cols, properties)
+
+
+class Filter:
+    def __init__(self, func):
+        self._func = func
+
+    @staticmethod
+    def notNull(properties):
+        return Filter(lambda props: np.logical_and.reduce([~np.isnan(props[p]) for p in properties]))
+
+    @staticmethod
+    def eq(name, value):
+        return Filter(lambda props: np.asarray(props.get(name)) == value)
+
+    @staticmethod
+    def gte(name, value):
+        return Filter(lambda props: props[name] >= value)
+
+    @staticmethod
+    def lt(name, value):
+        return Filter(lambda props: props[name] < value)
+
+    @staticmethod
+    def And(*filters):
+        return Filter(lambda props: np.logical_and.reduce([f._func(props) for f in filters]))
+
+
+class FeatureCollection(ComputedObject):
+    def __new__(cls, source=None, **kwargs):
+        if isinstance(source, _Failed):
+            return source
+        return super().__new__(cls)
+
+    def __init__(self, source=None, _points=None, _region=None, _features=None):
+        self._rows = self._cols = None
+        self._props = {}
+        self._region = None
+        self._features = None
+        if isinstance(source, FeatureCollection):
+            _points, _region, _features = source._points(), source._region, source._features
+        elif source == "GOOGLE/Research/open-buildings/v3/polygons":
+            _backend.record("FeatureCollection")
+            _points = (_backend.building_rows, _backend.building_cols, {})
+        elif isinstance(source, list):
+            _features = source
+        elif isinstance(source, List):
+            _features = source._values
+        elif source is not None:
+            raise ValueError(f"Unknown fake feature collection: {source!r}")
+
+        if _points is not None:
+            self._rows, self._cols, self._props = _points
+        self._region = _region
+        self._features = _features
+
+    @staticmethod
+    def randomPoints(region, points=1000, seed=0, maxError=None):
+        _backend.record("FeatureCollection.randomPoints")
+        rows, cols = np.nonzero(region.mask)
+        picked = np.random.default_rng(seed).integers(0, len(rows), points)
+        return FeatureCollection(_points=(rows[picked], cols[picked], {}))
+
+    def _points(self):
+        return None if self._rows is None else (self._rows, self._cols, self._props)
+
+    def filterBounds(self, geometry):
+        _backend.record("FeatureCollection.filterBounds")
+        if isinstance(geometry, _Failed):
+            return geometry
+        if self._rows is not None:
+            keep = _grow(geometry.mask, _backend.building_radius)[self._rows, self._cols]
+            return FeatureCollection(_points=(
+                self._rows[keep], self._cols[keep], {k: v[keep] for k, v in self._props.items()}))
+        if self._region is not None:
+            mask, count = self._region
+            return FeatureCollection(_region=(mask & geometry.mask, count))
+        return self
+
+    def select(self, properties):
+        _backend.record("FeatureCollection.select")
+        if self._rows is not None:
+            return FeatureCollection(_points=(self._rows, self._cols, {k: v for k, v in self._props.items()
+                                                                       if k in properties}))
+        return self
+
+    def filter(self, filter_):
+        _backend.record("FeatureCollection.filter")
+        if self._features is not None:
+            return FeatureCollection(_features=[f for f in self._features if filter_._func(f._properties)])
+        keep = filter_._func(self._props)
+        return FeatureCollection(_points=(
+            self._rows[keep], self._cols[keep], {k: v[keep] for k, v in self._props.items()}))
+
+    def map(self, func):
+        _backend.record("FeatureCollection.map")
+        if self._features is not None:
+            return FeatureCollection(_features=[func(f) for f in self._features])
+        if self._rows is not None:
+            mapped = func(_PointFeatures(self._rows, self._cols, self._props))
+            if isinstance(mapped, _PointFeatures):
+                return FeatureCollection(_points=(self._rows, self._cols, mapped._properties))
+            return self
+        func(Feature())
+        return self
+
+    def flatten(self):
+        _backend.record("FeatureCollection.flatten")
+        collections = self._features or []
+        if collections and all(isinstance(c, FeatureCollection) and c._region is not None for c in collections):
+            mask = np.logical_or.reduce([c._region[0] for c in collections])
+            return FeatureCollection(_region=(mask, sum(c._region[1] for c in collections)))
+        return FeatureCollection(_features=[f for c in collections for f in (c._features or [])])
+
+    def aggregate_array(self, prop):
+        _backend.record("FeatureCollection.aggregate_array")
+        if self._rows is not None:
+            values = self._props[prop]
+            return List([v.item() for v in values[~np.isnan(values)]])
+        return List([f._properties.get(prop) for f in self._features or []])
+
+    def reduceToImage(self, properties, reducer):
+        _backend.record("FeatureCollection.reduceToImage")
+        data = np.zeros(_backend.shape, dtype=np.float64)
+        filled = np.zeros(_backend.shape, bool)
+        for feature in self._features:
+            pixels = feature._geometry.mask & ~filled
+            data[pixels] = feature._properties[properties[0]]
+            filled |= pixels
+        return Image(bands={"first": np.ma.MaskedArray(data, mask=~filled)})
+
+    def union(self, maxError=None):
+        _backend.record("FeatureCollection.union")
+        if self._region is not None:
+            return FeatureCollection(_region=(self._region[0], 1 if self._region[0].any() else 0))
+        return self
+
+    def geometry(self, maxError=None):
+        _backend.record("FeatureCollection.geometry")
+        if self._region is not None:
+            return Geometry(None, self._region[0])
+        mask = np.zeros(_backend.shape, bool)
+        for feature in self._features or []:
+            if isinstance(feature, Feature) and isinstance(feature._geometry, Geometry):
+                mask |= feature._geometry.mask
+        if self._rows is not None:
+            mask[self._rows, self._cols] = True
+        return Geometry(None, mask)
+
+    def size(self):
+        _backend.record("FeatureCollection.size")
+        if self._rows is not None:
+            return Number(len(self._rows))
+        if self._region is not None:
+            return Number(self._region[1])
+        return Number(len(self._features or []))
+
+    def aggregate_histogram(self, prop):
+        values = self._props[prop]
+        keys, counts = np.unique(values[~np.isnan(values)], return_counts=True)
+        return Dictionary({str(k): int(n) for k, n in zip(keys, counts)})
+
+    def toList(self, count, offset=0):
+        _backend.record("FeatureCollection.toList")
+        features = self._evaluate()["features"][offset:offset + count]
+        return List(features)
+
+    def _evaluate(self):
+        if self._features is not None:
+            return {"type": "FeatureCollection", "features": [_evaluate(f) for f in self._features]}
+        if self._rows is not None:
+            west, north = _backend.origin
+            features = [
+                {
+                    "type": "Feature",
+                    "geometry": {
+                        "type": "Point",
+                        "coordinates": [west + (c + 0.5) * PIXEL_DEGREES, north - (r + 0.5) * PIXEL_DEGREES],
+                    },
+                    "properties": {k: _evaluate(v[i]) for k, v in self._props.items()},
+                }
+                for i, (r, c) in enumerate(zip(self._rows.tolist(), self._cols.tolist()))
+            ]
+            return {"type": "FeatureCollection", "features": features}
+        return {"type": "FeatureCollection", "features": [{"type": "Feature", "pixels": int(self._region[0].sum())}]}
+
+
+# --- reducers ------------------------------------------------------------
+
+class Reducer:
+    def __init__(self, kinds, groups=(), outputs=None):
+        self._kinds = [kinds] if isinstance(kinds, str) else list(kinds)
+        self._groups = tuple(groups)  # (groupField, groupName), innermost first
+        self._outputs = outputs
+
+    @staticmethod
+    def sum(): return Reducer("sum")
+
+    @staticmethod
+    def countEvery(): return Reducer("countEvery")
+
+    @staticmethod
+    def count(): return Reducer("count")
+
+    @staticmethod
+    def first(): return Reducer("first")
+
+    @staticmethod
+    def mean(): return Reducer("mean")
+
+    @staticmethod
+    def max(): return Reducer("max")
+
+    def group(self, groupField=1, groupName="group"):
+        return Reducer(self._kinds, self._groups + ((groupField, groupName),), self._outputs)
+
+    def combine(self, reducer2, outputPrefix="", sharedInputs=False):
+        return Reducer(self._kinds + reducer2._kinds, self._groups, self._outputs)
+
+    def setOutputs(self, outputs):
+        return Reducer(self._kinds, self._groups, list(outputs))
+
+    def forEachBand(self, image):
+        return Reducer(self._kinds, self._groups, list(image.bands))
+
+    @staticmethod
+    def _apply(kind, values):
+        if kind == "sum":
+            return float(values.sum())
+        if kind in ("count", "countEvery"):
+            return int(values.size)
+        if kind == "mean":
+            return float(values.mean()) if values.size else None
+        if kind == "max":
+            return float(values.max()) if values.size else None
+        return float(values[0]) if values.size else None
+
+    def _reduce(self, names, arrays, inside):
+        if not self._groups:
+            result = {}
+            for name, band in zip(names, arrays):
+                valid = inside & ~np.ma.getmaskarray(band)
+                for kind in self._kinds:
+                    key = name if len(self._kinds) == 1 else f"{name}_{kind}"
+                    result[key] = self._apply(kind, band.data[valid])
+            return result
+
+        valid = inside.copy()
+        for band in arrays:
+            valid &= ~np.ma.getmaskarray(band)
+        values = arrays[0].data[valid]
+        fields = [arrays[field].data[valid].astype(np.int64) for field, _ in self._groups]
+
+        def build(level, selected):
+            field_values = fields[level][selected]
+            rows = []
+            for key in np.unique(field_values):
+                inner = selected.copy()
+                inner[selected] = field_values == key
+                row = {self._groups[level][1]: int(key)}
+                if level == 0:
+                    row.update({kind: self._apply(kind, values[inner]) for kind in self._kinds})
+                else:
+                    row["groups"] = build(level - 1, inner)
+                rows.append(row)
+            return rows
+
+        return {"groups": build(len(self._groups) - 1, np.ones(values.shape, bool))}
+
+
+# --- module wiring -------------------------------------------------------
+
+_tasks = {}
+
+
+class _Task:
+    def __init__(self, description):
+        self.id = f"FAKE_{description}"
+        self.description = description
+        self._state = "UNSUBMITTED"
+        _tasks[self.id] = self
+
+    def start(self):
+        _backend.record("Task.start")
+        self._state = "COMPLETED"
+
+    def status(self):
+        return {"id": self.id, "description": self.description, "state": self._state}
+
+
+def _to_drive(collection=None, description="export", **kwargs):
+    _backend.record("Export.table.toDrive")
+    return _Task(description)
+
+
+class _Serializer:
+    """Process-local stand-in for ee.serializer/ee.deserializer (used by result_cache)."""
+
+    def __init__(self):
+        self._objects = []
+
+    def toJSON(self, obj):
+        self._objects.append(obj)
+        return json.dumps({"fake_ref": len(self._objects) - 1})
+
+    def fromJSON(self, text):
+        return self._objects[json.loads(text)["fake_ref"]]
+
+
+_serializer = _Serializer()
+
+
+class FakeTaskService:
+    """Local export-task service for export_task_manager: tasks finish after a number of status polls.
+
+    Descriptions listed in `failures` end in FAILED; download() writes the
+    exported collection's GeoJSON to the requested path. statuses() counts
+    one status call per batch.
+    """
+
+    def __init__(self, polls_to_finish=2, failures=(), latency_s=0.0):
+        self.polls_to_finish = polls_to_finish
+        self.failures = set(failures)
+        self.latency_s = latency_s
+        self.tasks = {}
+        self.starts = 0
+        self.status_calls = 0
+        self._lock = threading.Lock()
+
+    def fingerprint(self, collection, params):
+        return json.dumps([id(collection), params], sort_keys=True, default=str)
+
+    def start(self, collection, params):
+        with self._lock:
+            self.starts += 1
+            task_id = f"FAKE_TASK_{self.starts}"
+            self.tasks[task_id] = {"description": params["description"], "polls": 0, "collection": collection}
+        return task_id
+
+    def _status(self, task_id):
+        task = self.tasks[task_id]
+        task["polls"] += 1
+        if task["polls"] < self.polls_to_finish:
+            return {"state": "RUNNING" if task["polls"] > 1 else "READY"}
+        if task["description"] in self.failures:
+            return {"state": "FAILED", "error_message": "simulated failure"}
+        return {"state": "COMPLETED", "destination_uris": [f"https://drive.example/{task_id}"]}
+
+    def statuses(self, task_ids):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        with self._lock:
+            self.status_calls += 1
+            return [self._status(task_id) for task_id in task_ids]
+
+    def download(self, task_id, params, status, path):
+        with open(path, "w") as f:
+            json.dump(_evaluate(self.tasks[task_id]["collection"]), f, default=float)
+        return path
+
+
+def _compute_pixels(request):
+    """ee.data.computePixels for NUMPY_NDARRAY: samples the fake grid at each output pixel centre."""
+    _backend.record("computePixels")
+    grid = request["grid"]
+    width, height = grid["dimensions"]["width"], grid["dimensions"]["height"]
+    t = grid["affineTransform"]
+    rows, cols = np.mgrid[0:height, 0:width]
+    xs = t["translateX"] + (cols + 0.5) * t["scaleX"]
+    ys = t["translateY"] + (rows + 0.5) * t["scaleY"]
+    west, north = _backend.origin
+    src_rows = np.floor((north - ys) / PIXEL_DEGREES).astype(int)
+    src_cols = np.floor((xs - west) / PIXEL_DEGREES).astype(int)
+    inside = (src_rows >= 0) & (src_rows < _backend.shape[0]) & (src_cols >= 0) & (src_cols < _backend.shape[1])
+    src_rows, src_cols = np.clip(src_rows, 0, _backend.shape[0] - 1), np.clip(src_cols, 0, _backend.shape[1] - 1)
+    bands = request["expression"].bands
+    out = np.zeros((height, width), dtype=[(name, np.float64) for name in bands])
+    for name, band in bands.items():
+        out[name] = np.where(inside, band.filled(0)[src_rows, src_cols], 0)
+    _backend.round_trip(None)
+    return out
+
+
+def _get_task_status(task_id):
+    ids = task_id if isinstance(task_id, (list, tuple)) else [task_id]
+    return [_tasks[i].status() if i in _tasks else {"id": i, "state": "UNKNOWN"} for i in ids]
+
+
+def Initialize(*args, **kwargs):
+    _backend.record("Initialize")
+
+
+def install(backend):
+    """Registers a fake `ee` module backed by `backend` in sys.modules and returns it.
+
+    Installing again swaps the backend of the already registered module, so
+    stage modules imported earlier keep working against the new datasets.
+    """
+    global _backend
+    _backend = backend
+    fake = sys.modules.get("ee")
+    if getattr(fake, "__fake__", False):
+        fake.backend = backend
+        return fake
+
+    module = sys.modules[__name__]
+    fake = types.ModuleType("ee")
+    fake.__fake__ = True
+    for name in ("ComputedObject", "Number", "Dictionary", "List", "Date", "Geometry", "Image",
+                 "Terrain", "ImageCollection", "Feature", "FeatureCollection", "Filter",
+                 "Reducer", "Initialize", "EEException"):
+        setattr(fake, name, getattr(module, name))
+    fake.batch = types.SimpleNamespace(Export=types.SimpleNamespace(
+        table=types.SimpleNamespace(toDrive=_to_drive, toCloudStorage=_to_drive)))
+    fake.data = types.SimpleNamespace(getTaskStatus=_get_task_status, computePixels=_compute_pixels)
+    fake.serializer = fake.deserializer = _serializer
+    fake.backend = backend
+    sys.modules["ee"] = fake
+    return fake
@@ -0,0 +1,38 @@
+# cassie/tests/conftest.py
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from testing import fake_ee  # noqa: E402
+
+# The stage modules do `import ee` at import time, so the fake is registered
+# before any test module imports them; each test then gets a fresh backend.
+fake_ee.install(fake_ee.FakeBackend(size=16, months=4, buildings=10))
+
+
+@pytest.fixture
+def fake_backend():
+    """Returns a factory that installs a fresh FakeBackend (keyword arguments as FakeBackend)."""
+    def install(**kwargs):
+        kwargs = dict({"size": 64, "months": 12, "buildings": 300}, **kwargs)
+        backend = fake_ee.FakeBackend(**kwargs)
+        fake_ee.install(backend)
+        return backend
+    return install
+
+
+@pytest.fixture
+def l_shaped_roi():
+    """Returns a factory for a concave ROI: the backend's bbox without its north-east quarter."""
+    def build(backend):
+        import ee
+
+        w, s, e, n = backend.bbox()
+        mx, my = (w + e) / 2, (s + n) / 2
+        return ee.Geometry({"type": "Polygon", "coordinates": [
+            [[w, s], [e, s], [e, my], [mx, my], [mx, n], [w, n], [w, s]]]})
+    return build
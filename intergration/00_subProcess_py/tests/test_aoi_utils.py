@@ -0,0 +1,75 @@
+import json
+
+import numpy as np
+import pytest
+import shapely
+
+from aoi_utils import (load_aoi_features, load_aoi_geometry, simplify_coverage_to_vertex_budget,
+                       simplify_to_vertex_budget)
+
+
+def wiggly_box(west, east, south=0.0, north=1.0, points=401):
+    """A box with straight west/east edges and a zig-zag north edge (an odd point count ends it at north)."""
+    xs = np.linspace(west, east, points)
+    north_edge = [(x, north + 0.01 * (i % 2)) for i, x in enumerate(xs)]
+    return shapely.Polygon([(west, south), (east, south)] + north_edge[::-1])
+
+
+def test_vertex_budget_is_met_with_a_valid_polygon():
+    polygon = shapely.Point(0, 0).buffer(1, 500).difference(shapely.Point(0.2, 0).buffer(0.3, 200))
+
+    simplified, tolerance = simplify_to_vertex_budget(polygon, 100)
+
+    assert shapely.get_num_coordinates(simplified) <= 100 < shapely.get_num_coordinates(polygon)
+    assert simplified.is_valid and len(simplified.interiors) == 1
+    assert tolerance > 0
+    assert simplify_to_vertex_budget(polygon, None) == (polygon, 0.0)
+
+
+def test_coverage_keeps_shared_borders():
+    left, right = wiggly_box(0, 1), wiggly_box(1, 2)
+
+    (new_left, new_right), tolerance = simplify_coverage_to_vertex_budget([left, right], 50)
+
+    assert tolerance > 0
+    assert max(shapely.get_num_coordinates([new_left, new_right])) <= 50
+    assert new_left.intersection(new_right).area == pytest.approx(0, abs=1e-12)
+    assert new_left.union(new_right).area == pytest.approx(new_left.area + new_right.area)
+    assert simplify_coverage_to_vertex_budget([left, left.buffer(0.1)], 50) is None
+
+
+def write_geojson(path, geometries):
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"name": f"district_{i}"}, "geometry": shapely.geometry.mapping(g)}
+        for i, g in enumerate(geometries)]}))
+    return str(path)
+
+
+def test_each_mode_simplifies_districts_as_one_coverage(tmp_path):
+    path = write_geojson(tmp_path / "districts.geojson", [wiggly_box(0, 1), wiggly_box(1, 2)])
+
+    districts = load_aoi_features(path, mode="each", max_vertices=60)
+
+    assert [d["name"] for d in districts] == ["district_0", "district_1"]
+    assert all(d["stats"]["vertices_after"] <= 60 < d["stats"]["vertices_before"] for d in districts)
+    assert len({d["stats"]["tolerance"] for d in districts}) == 1
+    left, right = (shapely.geometry.shape(d["geometry"]) for d in districts)
+    assert left.intersection(right).area == pytest.approx(0, abs=1e-12)
+
+
+def test_union_mode_from_kml_without_gdal(tmp_path):
+    path = tmp_path / "aoi.kml"
+    placemark = ("<Placemark><name>{}</name><Polygon><outerBoundaryIs><LinearRing><coordinates>"
+                 "{} </coordinates></LinearRing></outerBoundaryIs></Polygon></Placemark>")
+    boxes = [shapely.box(0, 0, 1, 1), shapely.box(1, 0, 2, 1)]
+    path.write_text('<kml xmlns="http://www.opengis.net/kml/2.2"><Document>' + "".join(
+        placemark.format(f"p{i}", " ".join(f"{x},{y},0" for x, y in box.exterior.coords))
+        for i, box in enumerate(boxes)) + "</Document></kml>")
+
+    union, = load_aoi_features(str(path), mode="union")
+    roi, stats = load_aoi_geometry(str(path))
+
+    assert union["properties"] == {"features": 2}
+    assert shapely.geometry.shape(union["geometry"]).equals(shapely.box(0, 0, 2, 1))
+    assert stats["features"] == 2
+    assert roi.toGeoJSON()["type"] == "Polygon"
@@ -0,0 +1,93 @@
+import threading
+import time
+
+import pytest
+
+import batch_runner
+from batch_runner import TokenBucket, analyze_aoi, load_aois, run_batch
+
+
+def aois(count):
+    return [{"name": f"aoi_{i}", "geometry": None, "start_date": "2000-01-01", "end_date": "2001-01-01",
+             "low_lying_threshold": 10.0} for i in range(count)]
+
+
+def test_token_bucket_limits_the_rate():
+    bucket = TokenBucket(rate=50, capacity=1)
+    started = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.monotonic() - started >= 5 / 50 * 0.9
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+
+
+def test_only_transient_errors_are_retried(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(batch_runner.time, "sleep", sleeps.append)
+    calls = {}
+
+    def process(aoi):
+        calls[aoi["name"]] = calls.get(aoi["name"], 0) + 1
+        if aoi["name"] == "aoi_0" and calls["aoi_0"] < 3:
+            raise RuntimeError("Too many concurrent aggregations.")
+        if aoi["name"] == "aoi_1":
+            raise RuntimeError("Image.load: Image asset not found.")
+        return {"flooded_building_count": 1}
+
+    rows = {row["name"]: row for row in run_batch(aois(3), process, rate=1000, retries=3, backoff=2.0)}
+
+    assert (rows["aoi_0"]["status"], rows["aoi_0"]["attempts"]) == ("ok", 3)
+    assert (rows["aoi_1"]["status"], rows["aoi_1"]["attempts"]) == ("error", 1)
+    assert "asset not found" in rows["aoi_1"]["error"]
+    assert rows["aoi_2"]["result"] == {"flooded_building_count": 1}
+    assert sorted(s for s in sleeps if s >= 1) == [1.0, 2.0]
+
+
+def test_concurrency_is_bounded():
+    lock = threading.Lock()
+    running = peak = 0
+
+    def process(aoi):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+        return {}
+
+    rows = list(run_batch(aois(12), process, max_concurrency=3, rate=1000))
+
+    assert len(rows) == 12 and all(row["status"] == "ok" for row in rows)
+    assert peak <= 3
+
+
+def test_csv_aois_keep_explicit_zero_thresholds(tmp_path):
+    path = tmp_path / "aois.csv"
+    path.write_text('name,bbox,low_lying_threshold,start_date\n'
+                    'coast,"0,0,1,1",0,\n'
+                    ',"1,1,2,2",,2010-01-01\n')
+
+    coast, unnamed = load_aois(str(path), {"low_lying_threshold": 12})
+
+    assert coast["low_lying_threshold"] == 0 and coast["start_date"] == batch_runner.DEFAULT_START_DATE
+    assert (unnamed["name"], unnamed["low_lying_threshold"], unnamed["start_date"]) == ("aoi_1", 12, "2010-01-01")
+    assert coast["geometry"]["coordinates"][0][2] == [1.0, 1.0]
+
+
+def test_each_aoi_is_one_round_trip(fake_backend):
+    backend = fake_backend()
+    w, s, e, n = backend.bbox()
+    aoi = aois(1)[0]
+    aoi["geometry"] = {"type": "Polygon", "coordinates": [[[w, s], [e, s], [e, n], [w, n], [w, s]]]}
+    aoi["start_date"], aoi["end_date"] = "1984-01-01", "1986-01-01"
+    before = backend.round_trips
+
+    result = analyze_aoi(aoi)
+
+    assert backend.round_trips - before == 1
+    assert result["total_buildings"] == 300
+    assert 0 <= result["flooded_building_count"] <= 300
+    assert len(result["lulc_areas"]) == 10
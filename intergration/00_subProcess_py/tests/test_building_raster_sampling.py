@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from building_raster_sampling import count_flooded_buildings_raster, sample_buildings, xy_to_rowcol
+
+TRANSFORM = (0.5, 0.0, 100.0, 0.0, -0.5, 50.0)
+
+
+def test_xy_to_rowcol_inverts_the_transform():
+    rows, cols = xy_to_rowcol([100.25, 101.9, 99.9], [49.9, 48.6, 50.1], TRANSFORM)
+
+    assert rows.tolist() == [0, 2, -1]
+    assert cols.tolist() == [0, 3, -1]
+
+
+def test_every_building_is_sampled_once():
+    mask = np.zeros((4, 4), bool)
+    mask[1, 2] = True
+    frequency = np.full((4, 4), np.nan, dtype=np.float32)
+    frequency[1, 2] = 40
+    # Three buildings in the flooded pixel (painting would merge them), one dry, one outside.
+    xs = np.array([101.1, 101.2, 101.3, 100.1, 120.0])
+    ys = np.array([49.4, 49.3, 49.2, 49.9, 49.0])
+
+    sampled = sample_buildings(xs, ys, TRANSFORM, mask, frequency)
+
+    assert sampled["total_buildings"] == 4
+    assert sampled["flooded_building_count"] == 3
+    assert sampled["flooded"].tolist() == [True, True, True, False, False]
+    assert np.isnan(sampled["flood_frequency"][3:]).all()
+
+
+def test_mask_defaults_to_valid_frequency():
+    frequency = np.full((4, 4), np.nan, dtype=np.float32)
+    frequency[0, 0] = 10
+
+    sampled = sample_buildings([100.1, 101.1], [49.9, 49.9], TRANSFORM, flood_frequency=frequency)
+
+    assert sampled["flooded"].tolist() == [True, False]
+
+
+def test_sampling_needs_a_raster():
+    with pytest.raises(ValueError):
+        sample_buildings([100.1], [49.9], TRANSFORM)
+
+
+def test_counts_from_a_footprint_file(tmp_path):
+    frequency = np.array([[10, 60], [np.nan, 90]], dtype=np.float32)
+    path = tmp_path / "buildings.csv"
+    path.write_text("latitude,longitude\n49.9,100.1\n49.9,100.6\n49.4,100.6\n49.4,100.1\n10,10\n")
+
+    total, flooded, above = count_flooded_buildings_raster(str(path), TRANSFORM, flood_frequency=frequency,
+                                                           frequency_thresholds=(50, 80), chunk_size=2)
+
+    assert (total, flooded) == (4, 3)
+    assert above == {50: 2, 80: 1}
@@ -0,0 +1,76 @@
+import pytest
+
+import ee
+from deferred_results import DeferredResults
+from flood_frequency_analysis import calculate_flood_frequency
+from flood_prone_area_detection import flood_prone_mask_area
+from flooded_building_analysis import analyze_flooded_buildings
+from lulc_flooded_area_analysis import analyze_lulc_flooded_area
+
+
+def _stages(backend):
+    roi = ee.Geometry.BBox(*backend.bbox())
+    flood_frequency = calculate_flood_frequency(ee.ImageCollection("JRC/GSW1_4/MonthlyHistory"))
+    flood_prone_area = flood_prone_mask_area(flood_frequency, ee.Image("USGS/SRTMGL1_003"), 10)
+    worldcover = ee.ImageCollection("ESA/WorldCover/v200").first().select("Map")
+    buildings = ee.FeatureCollection("GOOGLE/Research/open-buildings/v3/polygons")
+    return roi, flood_prone_area, worldcover, buildings
+
+
+def test_resolve_fetches_every_value_in_one_round_trip(fake_backend):
+    backend = fake_backend()
+    roi, flood_prone_area, worldcover, buildings = _stages(backend)
+    backend.reset_counters()
+
+    deferred = DeferredResults()
+    total, flooded, _, _ = analyze_flooded_buildings(flood_prone_area, buildings, roi, deferred=deferred)
+    lulc = analyze_lulc_flooded_area(flood_prone_area, worldcover, roi, deferred=deferred)
+    assert backend.round_trips == 0
+    assert not total.resolved
+
+    deferred.resolve()
+    assert backend.round_trips == 1
+    assert deferred.round_trips == 1
+    assert deferred.round_trips_saved == 2
+    assert total.value == 300
+    assert 0 < flooded.value <= total.value
+    assert [row["LULC_Class"] for row in lulc.value][:2] == [10, 20]
+
+
+def test_deferred_values_match_direct_fetches(fake_backend):
+    backend = fake_backend()
+    roi, flood_prone_area, worldcover, buildings = _stages(backend)
+
+    deferred = DeferredResults()
+    total, flooded, _, _ = analyze_flooded_buildings(flood_prone_area, buildings, roi, deferred=deferred)
+    lulc = analyze_lulc_flooded_area(flood_prone_area, worldcover, roi, deferred=deferred)
+    deferred.resolve()
+
+    backend.reset_counters()
+    direct_total, direct_flooded, _, _ = analyze_flooded_buildings(flood_prone_area, buildings, roi)
+    direct_lulc = analyze_lulc_flooded_area(flood_prone_area, worldcover, roi)
+    assert backend.round_trips == 3
+    assert (total.value, flooded.value) == (direct_total, direct_flooded)
+    assert lulc.value == direct_lulc
+
+
+def test_resolve_without_pending_values_makes_no_round_trip(fake_backend):
+    backend = fake_backend()
+    deferred = DeferredResults()
+    assert deferred.resolve() == {}
+    handle = deferred.register("answer", ee.Number(42))
+    deferred.resolve()
+    backend.reset_counters()
+    assert deferred.resolve() == {"answer": 42}
+    assert backend.round_trips == 0
+    assert handle.value == 42
+
+
+def test_unresolved_value_and_duplicate_names_raise(fake_backend):
+    fake_backend()
+    deferred = DeferredResults()
+    handle = deferred.register("count", ee.Number(1))
+    with pytest.raises(RuntimeError):
+        handle.value
+    with pytest.raises(ValueError):
+        deferred.register("count", ee.Number(2))
@@ -0,0 +1,168 @@
+import json
+import time
+import asyncio
+
+import pytest
+
+from testing.fake_ee import FakeTaskService
+from export_task_manager import ExportTaskError, ExportTaskManager, run_exports
+
+FAST = {"poll_interval": 0.01, "max_interval": 0.05}
+
+
+class TimedService(FakeTaskService):
+    """Fake service that records when each batched status call happened."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.call_times = []
+        self.batches = []
+
+    def statuses(self, task_ids):
+        self.call_times.append(time.monotonic())
+        self.batches.append(list(task_ids))
+        return super().statuses(task_ids)
+
+
+class FlakyService(FakeTaskService):
+    """Fake service whose status calls fail the first `errors` times."""
+
+    def __init__(self, errors, **kwargs):
+        super().__init__(**kwargs)
+        self.errors = errors
+
+    def statuses(self, task_ids):
+        if self.errors:
+            self.errors -= 1
+            raise RuntimeError("status unavailable")
+        return super().statuses(task_ids)
+
+
+def test_completed_export_resolves_with_destination():
+    service = FakeTaskService(polls_to_finish=3)
+
+    outcomes = run_exports([("a", object(), {})], service, **FAST)
+
+    assert outcomes["a"]["state"] == "COMPLETED"
+    assert outcomes["a"]["polls"] == 3
+    assert outcomes["a"]["destination_uris"] == ["https://drive.example/FAKE_TASK_1"]
+
+
+def test_poll_interval_backs_off():
+    service = TimedService(polls_to_finish=4)
+
+    run_exports([("a", object(), {})], service, poll_interval=0.02, max_interval=1.0, backoff=2.0)
+
+    gaps = [b - a for a, b in zip(service.call_times, service.call_times[1:])]
+    assert len(gaps) == 3
+    for gap, interval in zip(gaps, (0.02, 0.04, 0.08)):
+        assert interval * 0.9 <= gap < interval + 0.2
+
+
+def test_due_tasks_share_one_status_call():
+    service = TimedService(polls_to_finish=2)
+    exports = [(f"task_{i}", object(), {}) for i in range(5)]
+
+    outcomes = run_exports(exports, service, **FAST)
+
+    assert all(outcome["state"] == "COMPLETED" for outcome in outcomes.values())
+    assert service.status_calls == 2
+    assert [len(batch) for batch in service.batches] == [5, 5]
+
+
+def test_status_batches_are_limited_in_size():
+    service = TimedService(polls_to_finish=1)
+    exports = [(f"task_{i}", object(), {}) for i in range(5)]
+
+    run_exports(exports, service, status_batch_size=2, **FAST)
+
+    assert sorted(len(batch) for batch in service.batches) == [1, 2, 2]
+
+
+def test_identical_exports_share_one_task():
+    service = FakeTaskService(polls_to_finish=2)
+    collection = object()
+
+    async def main():
+        manager = ExportTaskManager(service, **FAST)
+        first = await manager.submit("a", collection)
+        second = await manager.submit("a", collection)
+        assert first is second
+        await manager.wait_all()
+        return manager
+
+    manager = asyncio.run(main())
+    assert service.starts == 1
+    assert manager.deduplicated == 1
+
+
+def test_failed_export_raises_and_is_resubmitted():
+    service = FakeTaskService(polls_to_finish=1, failures={"a"})
+    collection = object()
+
+    async def main():
+        manager = ExportTaskManager(service, **FAST)
+        future = await manager.submit("a", collection)
+        with pytest.raises(ExportTaskError) as error:
+            await future
+        assert error.value.state == "FAILED"
+        service.failures.clear()
+        retried = await manager.submit("a", collection)
+        return await retried
+
+    assert asyncio.run(main())["state"] == "COMPLETED"
+    assert service.starts == 2
+
+
+def test_cancelled_export_is_resubmitted():
+    service = FakeTaskService(polls_to_finish=50)
+    collection = object()
+
+    async def main():
+        manager = ExportTaskManager(service, **FAST)
+        future = await manager.submit("a", collection)
+        future.cancel()
+        retried = await manager.submit("a", collection)
+        assert retried is not future
+        await manager.close()
+
+    asyncio.run(main())
+    assert service.starts == 2
+
+
+def test_status_errors_are_tolerated_then_fail():
+    recovered = run_exports([("a", object(), {})], FlakyService(errors=2, polls_to_finish=1),
+                            max_status_errors=3, **FAST)
+    assert recovered["a"]["state"] == "COMPLETED"
+
+    failed = run_exports([("a", object(), {})], FlakyService(errors=3, polls_to_finish=1),
+                         max_status_errors=3, **FAST)
+    assert isinstance(failed["a"], ExportTaskError)
+    assert failed["a"].state == "UNKNOWN"
+
+
+def test_timeout_fails_the_export():
+    outcomes = run_exports([("a", object(), {})], FakeTaskService(polls_to_finish=1000), timeout_s=0.05, **FAST)
+
+    assert isinstance(outcomes["a"], ExportTaskError)
+    assert "timed out" in str(outcomes["a"])
+
+
+def test_not_waiting_returns_task_ids():
+    outcomes = run_exports([("a", object(), {})], FakeTaskService(polls_to_finish=5), wait=False, **FAST)
+
+    assert outcomes == {"a": "FAKE_TASK_1"}
+
+
+def test_finished_export_is_downloaded(tmp_path, fake_backend):
+    import ee
+
+    fake_backend(size=16, months=2, buildings=3)
+    collection = ee.FeatureCollection("GOOGLE/Research/open-buildings/v3/polygons")
+    path = str(tmp_path / "a.geojson")
+
+    outcomes = run_exports([("a", collection, {"download_path": path})], FakeTaskService(), **FAST)
+
+    assert outcomes["a"]["local_path"] == path
+    with open(path) as f:
+        assert len(json.load(f)["features"]) == 3
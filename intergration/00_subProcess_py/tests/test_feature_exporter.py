@@ -0,0 +1,111 @@
+import os
+import json
+import threading
+
+import pytest
+
+from feature_exporter import EEFeatureSource, export_features
+
+
+def point(i, **properties):
+    return {"type": "Feature", "geometry": {"type": "Point", "coordinates": [i, -i]}, "properties": properties}
+
+
+class ListSource:
+    """A paged source over an in-memory list that records the pages asked for."""
+
+    def __init__(self, features):
+        self.features = features
+        self.pages = []
+        self._lock = threading.Lock()
+
+    def size(self):
+        return len(self.features)
+
+    def page(self, offset, count):
+        with self._lock:
+            self.pages.append((offset, count))
+        return self.features[offset:offset + count]
+
+
+def test_pages_are_written_in_order(tmp_path):
+    source = ListSource([point(i, index=i) for i in range(23)])
+    path = str(tmp_path / "out.geojsonl")
+
+    written = export_features(source, path, page_size=5, max_in_flight=3)
+
+    assert written == 23
+    assert sorted(source.pages) == [(0, 5), (5, 5), (10, 5), (15, 5), (20, 3)]
+    with open(path) as f:
+        assert [json.loads(line)["properties"]["index"] for line in f] == list(range(23))
+
+
+def test_empty_source_fetches_no_pages(tmp_path):
+    source = ListSource([])
+
+    assert export_features(source, str(tmp_path / "out.geojsonl"), page_size=5) == 0
+    assert source.pages == []
+    assert os.path.getsize(tmp_path / "out.geojsonl") == 0
+
+
+def test_empty_source_writes_a_valid_empty_geoparquet(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    pytest.importorskip("shapely")
+    path = str(tmp_path / "out.parquet")
+
+    assert export_features(ListSource([]), path) == 0
+
+    table = pq.read_table(path)
+    assert table.num_rows == 0
+    assert table.column_names == ["geometry"]
+    assert json.loads(table.schema.metadata[b"geo"])["primary_column"] == "geometry"
+    assert not os.path.exists(path + ".spool")
+
+
+def test_empty_source_writes_a_valid_empty_flatgeobuf(tmp_path):
+    fiona = pytest.importorskip("fiona")
+    path = str(tmp_path / "out.fgb")
+
+    assert export_features(ListSource([]), path) == 0
+
+    with fiona.open(path) as collection:
+        assert len(collection) == 0
+
+
+def test_unknown_extension_raises(tmp_path):
+    with pytest.raises(ValueError):
+        export_features(ListSource([point(0)]), str(tmp_path / "out.xyz"))
+
+
+def test_geoparquet_schema_covers_every_page(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    pytest.importorskip("shapely")
+    features = (
+        [point(i, count=i, empty=None) for i in range(4)]
+        + [point(4, count=4.5, empty=None, late="x")]
+        + [point(5, count=5, empty=None, mixed=1), point(6, count=6, empty=None, mixed="a")]
+    )
+    path = str(tmp_path / "out.parquet")
+
+    export_features(ListSource(features), path, page_size=2, max_in_flight=2)
+
+    table = pq.read_table(path)
+    types = {field.name: str(field.type) for field in table.schema}
+    assert types == {
+        "count": "double", "empty": "string", "late": "string", "mixed": "string", "geometry": "binary",
+    }
+    assert table["count"].to_pylist() == [0.0, 1.0, 2.0, 3.0, 4.5, 5.0, 6.0]
+    assert table["late"].to_pylist() == [None] * 4 + ["x", None, None]
+    assert table["mixed"].to_pylist() == [None] * 5 + ["1", "a"]
+    assert b"geo" in table.schema.metadata
+    assert not os.path.exists(path + ".spool")
+
+
+def test_ee_feature_source_pages_with_to_list(fake_backend):
+    import ee
+
+    fake_backend(size=16, months=2, buildings=12)
+    source = EEFeatureSource(ee.FeatureCollection("GOOGLE/Research/open-buildings/v3/polygons"))
+
+    assert source.size() == 12
+    assert len(source.page(10, 5)) == 2
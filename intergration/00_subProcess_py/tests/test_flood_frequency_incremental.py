@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+import pytest
+
+from flood_frequency_incremental import month_range, update_flood_counts
+from flood_frequency_local import accumulate_flood_counts
+
+
+@pytest.fixture
+def month_paths(tmp_path):
+    rng = np.random.default_rng(4)
+    paths = {}
+    for month in month_range("2019-11", "2020-06"):
+        path = tmp_path / f"{month.replace('-', '_')}.npy"
+        np.save(path, rng.choice(np.array([0, 1, 2], dtype=np.uint8), (6, 5)))
+        paths[month] = str(path)
+    return paths
+
+
+def test_moving_the_window_matches_a_full_recount(tmp_path, month_paths):
+    state = str(tmp_path / "counts.npz")
+    update_flood_counts(state, month_paths.values(), "2019-11", "2020-03", window_rows=4)
+
+    total_obs, total_water, stats = update_flood_counts(state, month_paths.values(), "2020-01", "2020-06",
+                                                        window_rows=4)
+
+    window = [month_paths[m] for m in month_range("2020-01", "2020-06")]
+    expected_obs, expected_water, _ = accumulate_flood_counts(window)
+    np.testing.assert_array_equal(total_obs, expected_obs)
+    np.testing.assert_array_equal(total_water, expected_water)
+    assert (stats["months_added"], stats["months_removed"]) == (3, 2)
+    assert (stats["first_month"], stats["last_month"]) == ("2020-01", "2020-06")
+
+    _, _, unchanged = update_flood_counts(state, month_paths.values(), "2020-01", "2020-06")
+    assert unchanged["months_added"] == unchanged["months_removed"] == 0
+
+
+def test_months_that_left_the_window_need_their_rasters(tmp_path, month_paths):
+    state = str(tmp_path / "counts.npz")
+    update_flood_counts(state, month_paths.values(), "2019-11", "2020-02")
+    os.remove(month_paths.pop("2019-11"))
+
+    with pytest.raises(ValueError):
+        update_flood_counts(state, month_paths.values(), "2020-01", "2020-03")
+    with pytest.raises(ValueError):
+        update_flood_counts(state, month_paths.values(), "2021-01", "2021-12")
+
+
+def test_month_range_crosses_years():
+    assert month_range("2019-11", "2020-02") == ["2019-11", "2019-12", "2020-01", "2020-02"]
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from flood_frequency_local import calculate_flood_frequency_local, month_key
+
+
+def write_months(tmp_path, months, seed=1, shape=(9, 7)):
+    rng = np.random.default_rng(seed)
+    paths, stack = [], []
+    for year, month in months:
+        # JRC MonthlyHistory: 0 no data, 1 not water, 2 water.
+        water = rng.choice(np.array([0, 1, 2], dtype=np.uint8), shape, p=[0.2, 0.5, 0.3])
+        path = tmp_path / f"{year}_{month:02d}.npy"
+        np.save(path, water)
+        paths.append(str(path))
+        stack.append(water)
+    return paths, np.stack(stack)
+
+
+def test_streamed_frequency_matches_the_whole_stack(tmp_path):
+    paths, stack = write_months(tmp_path, [(1984, m) for m in range(1, 13)])
+    occurrence = np.zeros(stack.shape[1:], dtype=np.uint8)
+    occurrence[0, :3] = 95
+    occurrence[1, 0] = 255
+    np.save(tmp_path / "occurrence.npy", occurrence)
+
+    frequency, stats = calculate_flood_frequency_local(paths, str(tmp_path / "occurrence.npy"), window_rows=4)
+
+    keep = ~((occurrence >= 90) & (occurrence <= 100))
+    obs = ((stack > 0) & keep).sum(axis=0)
+    water = ((stack == 2) & keep).sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        expected = water / obs * 100
+    expected[expected == 0] = np.nan
+
+    np.testing.assert_allclose(frequency, expected, rtol=1e-6)
+    assert np.isnan(frequency[0, :3]).all()
+    assert stats["months"] == 12 and stats["shape"] == stack.shape[1:]
+
+
+def test_month_key_and_input_errors(tmp_path):
+    assert month_key("/data/jrc/2010-07.tif") == "2010-07"
+    with pytest.raises(ValueError):
+        month_key("water.tif")
+    with pytest.raises(ValueError):
+        calculate_flood_frequency_local([])
+
+    paths, _ = write_months(tmp_path, [(1984, 1)])
+    np.save(tmp_path / "1984_02.npy", np.zeros((3, 3), dtype=np.uint8))
+    with pytest.raises(ValueError):
+        calculate_flood_frequency_local(paths + [str(tmp_path / "1984_02.npy")])
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from flood_frequency_local import calculate_flood_frequency_cube_local, calculate_flood_frequency_local
+from frequency_cube import cube_groups
+
+
+def test_groups_list_months_then_years():
+    groups = cube_groups(("year", "month"), years=[1985, 1984])
+
+    assert [suffix for _, _, suffix in groups] == [f"m{m:02d}" for m in range(1, 13)] + ["y1984", "y1985"]
+    assert cube_groups("month")[0] == ("month", 1, "m01")
+    for group_by, years in ((("week",), None), ((), None), (("year",), None)):
+        with pytest.raises(ValueError):
+            cube_groups(group_by, years)
+
+
+def test_one_pass_cube_matches_one_run_per_group(tmp_path):
+    rng = np.random.default_rng(6)
+    paths = {}
+    for year in (1990, 1991):
+        for month in (1, 2, 7):
+            path = tmp_path / f"{year}_{month:02d}.npy"
+            np.save(path, rng.choice(np.array([0, 1, 2], dtype=np.uint8), (5, 6)))
+            paths[(year, month)] = str(path)
+
+    cube, names, stats = calculate_flood_frequency_cube_local(paths.values(), ("month", "year"), window_rows=2)
+
+    assert cube.shape == (14, 5, 6) and stats["months"] == 6
+    for band, name in zip(cube, names):
+        suffix = name.rsplit("_", 1)[-1]
+        value = int(suffix[1:])
+        members = [path for (year, month), path in paths.items() if (month if suffix[0] == "m" else year) == value]
+        if members:
+            expected, _ = calculate_flood_frequency_local(members)
+            np.testing.assert_array_equal(band, expected)
+        else:
+            assert np.isnan(band).all()
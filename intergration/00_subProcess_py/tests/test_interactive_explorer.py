@@ -0,0 +1,69 @@
+import time
+
+import numpy as np
+
+from interactive_explorer import FloodExplorer, OverviewPyramid, ee_layer_loader
+
+
+def layers(size=96, seed=0):
+    rng = np.random.default_rng(seed)
+    frequency = rng.uniform(0, 100, (size, size)).astype(np.float32)
+    frequency[rng.random((size, size)) < 0.3] = np.nan
+    elevation = rng.uniform(0, 30, (size, size)).astype(np.float32)
+    slope = rng.uniform(0, 10, (size, size)).astype(np.float32)
+    return frequency, elevation, slope
+
+
+def test_threshold_lookups_match_a_recompute_with_per_pixel_areas():
+    frequency, elevation, slope = layers()
+    latitudes = np.linspace(60, 50, frequency.shape[0])
+    pixel_area = np.repeat((900 * np.cos(np.radians(latitudes)))[:, None], frequency.shape[1], axis=1)
+    rows, cols = np.nonzero(np.random.default_rng(1).random(frequency.shape) < 0.05)
+
+    pyramid = OverviewPyramid.build(frequency, elevation, slope, [0, 0, 1, 1], pixel_area, rows, cols)
+
+    for threshold in (0, 5, 12.5, 30):
+        prone = ~np.isnan(frequency) & (slope < 5) & (elevation < threshold)
+        assert np.isclose(pyramid.flood_prone_area_km2(threshold), pixel_area[prone].sum() / 1e6)
+        assert pyramid.flooded_building_count(threshold) == int(prone[rows, cols].sum())
+    assert pyramid.total_buildings == len(rows)
+    assert len(pyramid.levels) > 1
+
+
+def test_bursts_are_debounced_and_regions_loaded_once():
+    frequency, elevation, slope = layers(32)
+    loads, renders = [], []
+
+    def load_layers(region, start_date, end_date):
+        loads.append(region)
+        return {"flood_frequency": frequency, "elevation": elevation, "slope": slope, "bounds": [0, 0, 1, 1]}
+
+    explorer = FloodExplorer(load_layers, render=renders.append, delay_s=0.05, region="a")
+    try:
+        for threshold in range(5, 15):
+            explorer.update(low_lying_threshold=threshold)
+        deadline = time.monotonic() + 2
+        while not renders and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert [r["low_lying_threshold"] for r in renders] == [14]
+        assert explorer.refresh()["recompute"] == "threshold"
+        assert loads == ["a"]
+    finally:
+        explorer.close()
+
+
+def test_ee_layer_loader_fetches_per_pixel_area_and_buildings(fake_backend):
+    import ee
+
+    backend = fake_backend(size=48, months=6, buildings=40)
+    zones = ee.FeatureCollection([ee.Feature(ee.Geometry.BBox(*backend.bbox()), {"name": "zone"})])
+    buildings = ee.FeatureCollection("GOOGLE/Research/open-buildings/v3/polygons")
+
+    loaded = ee_layer_loader(zones, "name", buildings=buildings, building_page_size=16)("zone", "1984-01-01",
+                                                                                        "1984-07-01")
+
+    shape = loaded["elevation"].shape
+    assert loaded["pixel_area_m2"].shape == shape
+    assert np.nanmax(loaded["pixel_area_m2"]) > 0
+    assert np.isnan(loaded["flood_frequency"]).any()
+    assert len(loaded["building_rows"]) == 40
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+import shapely
+
+from local_building_join import count_flooded_buildings_local
+
+
+def footprints(count=200, seed=2):
+    rng = np.random.default_rng(seed)
+    xs, ys = rng.uniform(0, 100, count), rng.uniform(0, 100, count)
+    return shapely.box(xs, ys, xs + 1.5, ys + 1.5)
+
+
+FLOOD_PRONE = {"type": "FeatureCollection", "features": [
+    {"type": "Feature", "properties": {}, "geometry": shapely.geometry.mapping(
+        shapely.MultiPolygon([shapely.box(10, 10, 40, 30), shapely.box(60, 50, 90, 95)]))},
+    {"type": "Feature", "properties": {}, "geometry": shapely.geometry.mapping(shapely.Point(50, 50).buffer(8))},
+]}
+
+
+def write_csv(path, buildings):
+    import pandas as pd
+
+    pd.DataFrame({
+        "full_plus_code": [f"B{i}" for i in range(len(buildings))],
+        "geometry": shapely.to_wkt(buildings),
+    }).to_csv(path, index=False)
+
+
+def test_bulk_join_matches_a_loop_over_buildings(tmp_path):
+    buildings = footprints()
+    path = str(tmp_path / "buildings.csv")
+    write_csv(path, buildings)
+    flood_prone = shapely.union_all([shapely.geometry.shape(f["geometry"]) for f in FLOOD_PRONE["features"]])
+    aoi = shapely.box(0, 0, 70, 100)
+
+    total, flooded, ids = count_flooded_buildings_local(path, FLOOD_PRONE, aoi=aoi, chunk_size=37)
+
+    in_aoi = [i for i, b in enumerate(buildings) if b.intersects(aoi)]
+    expected = [f"B{i}" for i in in_aoi if buildings[i].intersects(flood_prone)]
+    assert total == len(in_aoi)
+    assert flooded == len(expected) > 0
+    assert sorted(ids) == sorted(expected)
+
+
+def test_geoparquet_footprints_without_ids(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    buildings = footprints(50)
+    path = str(tmp_path / "buildings.parquet")
+    pq.write_table(pa.table({"geometry": shapely.to_wkb(buildings)}), path)
+    flood_prone = [shapely.box(0, 0, 50, 100)]
+
+    total, flooded, ids = count_flooded_buildings_local(path, flood_prone, chunk_size=16)
+
+    expected = [i for i, b in enumerate(buildings) if b.intersects(flood_prone[0])]
+    assert (total, flooded) == (50, len(expected))
+    assert sorted(ids) == expected
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+import shapely
+
+from local_vectorize import polygonize_tile, vectorize_flood_prone_local
+
+TRANSFORM = (30.0, 0.0, 1000.0, 0.0, -30.0, 2000.0)
+
+
+def random_mask(seed=8, shape=(40, 37)):
+    rng = np.random.default_rng(seed)
+    return rng.random(shape) < 0.35
+
+
+def pixel_union(mask):
+    rows, cols = np.nonzero(mask)
+    x0, y1 = 1000 + 30 * cols, 2000 - 30 * rows
+    return shapely.union_all(shapely.box(x0, y1 - 30, x0 + 30, y1))
+
+
+def dissolved(result):
+    return shapely.union_all([shapely.geometry.shape(f["geometry"]) for f in result["features"]])
+
+
+@pytest.mark.parametrize("tile_size", [8, 512])
+def test_tiles_keep_every_pixel(tile_size):
+    mask = random_mask()
+
+    result = vectorize_flood_prone_local(mask, TRANSFORM, simplify_tolerance=0, buffer_distance=0,
+                                         tile_size=tile_size, max_workers=2)
+
+    assert len(result["features"]) == 1
+    geometry = dissolved(result)
+    assert geometry.area == pytest.approx(mask.sum() * 900)
+    assert geometry.symmetric_difference(pixel_union(mask)).area == pytest.approx(0, abs=1e-6)
+
+
+def test_tiled_simplify_and_buffer_stay_within_tolerance_of_the_pixels():
+    rows, cols = np.mgrid[0:40, 0:37]
+    mask = (((rows - 15) ** 2 + (cols - 12) ** 2 < 80) | ((rows - 28) ** 2 + (cols - 25) ** 2 < 60)
+            | ((abs(rows - 8) < 3) & (cols > 20)))
+    pixels = pixel_union(mask)
+
+    tiled = dissolved(vectorize_flood_prone_local(mask, TRANSFORM, tile_size=8, max_workers=2))
+    untiled = dissolved(vectorize_flood_prone_local(mask, TRANSFORM, tile_size=512, max_workers=1))
+
+    for geometry in (tiled, untiled):
+        assert geometry.covers(pixels)
+        assert pixels.buffer(60 + 1e-6).covers(geometry)
+    assert tiled.area == pytest.approx(untiled.area, rel=0.03)
+
+
+def test_empty_mask_and_rotated_transform():
+    assert vectorize_flood_prone_local(np.zeros((4, 4), bool), TRANSFORM)["features"] == []
+    with pytest.raises(ValueError):
+        polygonize_tile(np.ones((2, 2), bool), 0, 0, (30, 1, 0, 1, -30, 0))
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+import ee
+from flood_frequency_analysis import calculate_flood_frequency
+from flood_prone_area_detection import flood_prone_mask_area
+from lulc_flooded_area_analysis import LULC_MAPPING, analyze_lulc_flooded_area, lulc_area_histogram_local
+
+
+def by_class(rows):
+    return {row["LULC_Class"]: row["Flooded_Area_km²"] for row in rows}
+
+
+def test_grouped_reduction_matches_one_reduction_per_class(fake_backend):
+    backend = fake_backend()
+    w, s, e, n = backend.bbox()
+    roi = ee.Geometry.BBox(w, s, e, n)
+    jrc = ee.ImageCollection("JRC/GSW1_4/MonthlyHistory").filterBounds(roi).filterDate("1984-01-01", "1986-01-01")
+    flood_prone_area = flood_prone_mask_area(calculate_flood_frequency(jrc), ee.Image("USGS/SRTMGL1_003"), 20)
+    worldcover = ee.ImageCollection("ESA/WorldCover/v200").first().select("Map")
+
+    grouped = by_class(analyze_lulc_flooded_area(flood_prone_area, worldcover, roi))
+
+    landcover_masked = worldcover.clip(roi).updateMask(flood_prone_area)
+    for lulc_class in LULC_MAPPING:
+        area_m2 = landcover_masked.eq(lulc_class).multiply(ee.Image.pixelArea()).reduceRegion(
+            reducer=ee.Reducer.sum(), geometry=roi, scale=30, maxPixels=1e13).getInfo()
+        assert grouped[lulc_class] == pytest.approx(area_m2.get("Map", 0) / 1e6)
+    assert sum(grouped.values()) > 0
+
+
+def test_local_histogram_matches_a_loop_over_classes():
+    rng = np.random.default_rng(5)
+    classes = rng.choice(list(LULC_MAPPING) + [-1], (30, 30))
+    areas = rng.uniform(700, 900, (30, 30))
+    mask = rng.random((30, 30)) < 0.6
+
+    rows = by_class(lulc_area_histogram_local(classes, areas, mask))
+
+    for lulc_class in LULC_MAPPING:
+        assert rows[lulc_class] == pytest.approx(areas[mask & (classes == lulc_class)].sum() / 1e6)
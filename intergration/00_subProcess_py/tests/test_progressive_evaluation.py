@@ -0,0 +1,80 @@
+import numpy as np
+
+import ee
+from flood_frequency_analysis import calculate_flood_frequency
+from flood_prone_area_detection import flood_prone_mask_area
+from flooded_building_analysis import analyze_flooded_buildings
+from progressive_evaluation import progressive_flood_statistics, progressive_flood_statistics_local
+
+
+def flood_prone(backend, threshold=20):
+    w, s, e, n = backend.bbox()
+    roi = ee.Geometry.BBox(w, s, e, n)
+    jrc = ee.ImageCollection("JRC/GSW1_4/MonthlyHistory").filterBounds(roi).filterDate("1984-01-01", "1986-01-01")
+    return flood_prone_mask_area(calculate_flood_frequency(jrc), ee.Image("USGS/SRTMGL1_003"), threshold), roi
+
+
+def test_coarse_estimates_bound_the_native_result(fake_backend):
+    backend = fake_backend(size=128, months=12, buildings=500)
+    flood_prone_area, roi = flood_prone(backend)
+    worldcover = ee.ImageCollection("ESA/WorldCover/v200").first()
+    buildings = ee.FeatureCollection("GOOGLE/Research/open-buildings/v3/polygons")
+
+    results = list(progressive_flood_statistics(flood_prone_area, roi, worldcover, buildings, z=3.0))
+
+    native = results[-1]
+    assert native["final"] and native["flood_prone_area_error_km2"] == 0
+    assert native["flood_prone_area_km2"] > 0
+    native_classes = {row["LULC_Class"]: row["Flooded_Area_km²"] for row in native["lulc_areas"]}
+    for result in results[:-1]:
+        error = abs(result["flood_prone_area_km2"] - native["flood_prone_area_km2"])
+        assert error <= result["flood_prone_area_error_km2"]
+        assert "flooded_building_error_estimate" in result
+        for row in result["lulc_areas"]:
+            error = abs(row["Flooded_Area_km²"] - native_classes.get(row["LULC_Class"], 0))
+            assert error <= row["Flooded_Area_Error_km²"]
+
+
+def test_native_pass_counts_buildings_like_the_full_run(fake_backend):
+    backend = fake_backend(size=128, months=12, buildings=500)
+    flood_prone_area, roi = flood_prone(backend)
+    buildings = ee.FeatureCollection("GOOGLE/Research/open-buildings/v3/polygons")
+
+    native = list(progressive_flood_statistics(flood_prone_area, roi, buildings=buildings))[-1]
+
+    total, flooded, _, _ = analyze_flooded_buildings(flood_prone_area, buildings, roi)
+    assert (native["total_buildings"], native["flooded_building_count"]) == (total, flooded)
+
+
+def test_each_pass_is_one_round_trip(fake_backend):
+    backend = fake_backend(size=128, months=12, buildings=500)
+    flood_prone_area, roi = flood_prone(backend)
+    before = backend.round_trips
+
+    results = list(progressive_flood_statistics(flood_prone_area, roi, scales=(300, 30)))
+
+    assert backend.round_trips - before == len(results) == 2
+
+
+def test_local_bound_covers_the_native_result():
+    rng = np.random.default_rng(3)
+    rows, cols = np.mgrid[0:400, 0:400]
+    mask = (np.sin(rows / 23) + np.cos(cols / 31) + rng.normal(0, 0.6, rows.shape)) > 0.5
+
+    results = list(progressive_flood_statistics_local(mask, factors=(16, 8, 4, 2, 1), z=3.0))
+
+    native = results[-1]["flood_prone_area_km2"]
+    assert native == mask.sum() * 900 / 1e6
+    for result in results[:-1]:
+        assert abs(result["flood_prone_area_km2"] - native) <= result["flood_prone_area_error_km2"]
+
+
+def test_local_passes_skip_negative_lulc_nodata():
+    mask = np.ones((4, 4), bool)
+    lulc = np.full((4, 4), 10)
+    lulc[1, 1] = -1
+
+    native, = progressive_flood_statistics_local(mask, lulc=lulc, pixel_area_m2=1e6, factors=(1,),
+                                                 lulc_mapping={10: "Tree cover"})
+
+    assert native["lulc_areas"][0]["Flooded_Area_km²"] == 15
@@ -0,0 +1,112 @@
+import pytest
+
+import ee
+from flood_frequency_analysis import calculate_flood_frequency
+from flood_prone_area_detection import flood_prone_mask_area
+from flooded_building_analysis import analyze_flooded_buildings
+from resilient_execution import (FATAL, MEMORY, TIMEOUT, TRANSIENT, ResilientExecutor, TimeBudgetExceeded,
+                                 classify_error, resilient_building_counts, resilient_lulc_areas)
+
+
+def datasets(backend, roi=None):
+    roi = ee.Geometry.BBox(*backend.bbox()) if roi is None else roi
+    jrc = ee.ImageCollection("JRC/GSW1_4/MonthlyHistory").filterBounds(roi).filterDate("1984-01-01", "1986-01-01")
+    flood_prone_area = flood_prone_mask_area(calculate_flood_frequency(jrc), ee.Image("USGS/SRTMGL1_003"), 20)
+    worldcover = ee.ImageCollection("ESA/WorldCover/v200").first()
+    buildings = ee.FeatureCollection("GOOGLE/Research/open-buildings/v3/polygons")
+    return flood_prone_area, worldcover, buildings, roi
+
+
+def results(backend, executor):
+    flood_prone_area, worldcover, buildings, roi = datasets(backend)
+    return (resilient_lulc_areas(flood_prone_area, worldcover, roi, executor),
+            resilient_building_counts(flood_prone_area, buildings, roi, executor))
+
+
+@pytest.fixture
+def unconstrained(fake_backend):
+    return results(fake_backend(), ResilientExecutor())
+
+
+@pytest.mark.parametrize("message, kind", [
+    ("User memory limit exceeded.", MEMORY),
+    ("Computation timed out.", TIMEOUT),
+    ("Too many concurrent aggregations.", TRANSIENT),
+    ("Image.load: Image asset not found.", FATAL),
+])
+def test_classify_error(message, kind):
+    assert classify_error(RuntimeError(message)) == kind
+
+
+def test_memory_errors_escalate_tile_scale(fake_backend, unconstrained):
+    backend = fake_backend(memory_limit_pixels=1500)
+    executor = ResilientExecutor()
+
+    assert results(backend, executor) == unconstrained
+    assert backend.failures["memory"] > 0
+    assert {e["event"] for e in executor.escalations} == {"escalate_tile_scale"}
+
+
+def test_timeouts_split_the_region(fake_backend, unconstrained):
+    backend = fake_backend(timeout_pixels=1500)
+    executor = ResilientExecutor()
+
+    lulc, buildings = results(backend, executor)
+
+    assert buildings == unconstrained[1]
+    areas = {row["LULC_Class"]: row["Flooded_Area_km²"] for row in lulc}
+    assert areas == pytest.approx({row["LULC_Class"]: row["Flooded_Area_km²"] for row in unconstrained[0]})
+    assert any(e["event"] == "split" for e in executor.escalations)
+
+
+def test_transient_errors_are_retried_with_backoff(fake_backend):
+    backend = fake_backend(transient_failures=2)
+    buildings = ee.FeatureCollection("GOOGLE/Research/open-buildings/v3/polygons")
+    delays = []
+    executor = ResilientExecutor(backoff_s=0.5, sleep=delays.append)
+
+    def compute(geometry, tile_scale, bbox):
+        return buildings.size().getInfo()
+
+    assert executor.run(compute, None, sum, backend.bbox()) == 300
+    assert delays == [0.5, 1.0]
+    assert [e["tile_scale"] for e in executor.escalations] == [1, 1]
+
+
+def test_concave_roi_split_by_the_resilient_executor(fake_backend, l_shaped_roi):
+    backend = fake_backend(size=64, buildings=400, building_radius=3, timeout_pixels=2500)
+    roi = l_shaped_roi(backend)
+    flood_prone_area, _, buildings, _ = datasets(backend, roi)
+    executor = ResilientExecutor()
+
+    counts = resilient_building_counts(flood_prone_area, buildings, roi, executor)
+
+    backend.timeout_pixels = None
+    total, flooded, _, _ = analyze_flooded_buildings(flood_prone_area, buildings, roi)
+    assert counts == (total, flooded)
+    assert any(event["event"] == "split" for event in executor.escalations)
+
+
+def test_fatal_errors_are_raised():
+    def compute(geometry, tile_scale, bbox):
+        raise RuntimeError("Image.load: Image asset not found.")
+
+    executor = ResilientExecutor()
+    with pytest.raises(RuntimeError):
+        executor.run(compute, None, sum, [0, 0, 1, 1])
+    assert [e["event"] for e in executor.escalations] == ["failed"]
+
+
+def test_time_budget_is_shared_across_runs(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("resilient_execution.time.monotonic", lambda: now[0])
+
+    def compute(geometry, tile_scale, bbox):
+        now[0] += 6
+        return 1
+
+    executor = ResilientExecutor(time_budget_s=10)
+    assert executor.run(compute, None, sum, [0, 0, 1, 1]) == 1
+    assert executor.run(compute, None, sum, [0, 0, 1, 1]) == 1
+    with pytest.raises(TimeBudgetExceeded):
+        executor.run(compute, None, sum, [0, 0, 1, 1])
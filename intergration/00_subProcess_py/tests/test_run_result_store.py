@@ -0,0 +1,44 @@
+import os
+import datetime
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from run_result_store import AOI_DIR, RunResultStore, aoi_hash, run_record  # noqa: E402
+
+BBOX = [-58.05, 6.76, -58.03, 6.78]
+STARTED = datetime.datetime(2025, 3, 1, 12, tzinfo=datetime.timezone.utc)
+
+
+def record(aoi=BBOX, **fields):
+    return run_record(aoi, datetime.date(2020, 1, 1), datetime.date(2021, 1, 1), 20, STARTED, **fields)
+
+
+def test_aoi_is_stored_once_per_hash(tmp_path):
+    store = RunResultStore(str(tmp_path))
+
+    first = store.put_aoi(BBOX)
+    second = store.put_aoi(BBOX)
+    store.append([record(), record()])
+
+    assert first == second == aoi_hash(BBOX)
+    assert os.listdir(tmp_path / AOI_DIR) == [f"{first}.parquet"]
+    assert store.aoi(first)["coordinates"][0][0] == [-58.05, 6.76]
+    assert store.aoi("unknown") is None
+    assert store.aois()["aoi_hash"].to_pylist() == [first]
+
+
+def test_runs_refer_to_the_aoi_by_hash(tmp_path):
+    store = RunResultStore(str(tmp_path))
+    store.put_aoi(BBOX)
+    store.append(record(total_buildings=3, lulc_areas=[
+        {"LULC_Class": 10, "LULC_Name": "Tree cover", "Flooded_Area_km²": 0.5},
+    ]))
+
+    runs = store.read()
+
+    assert "aoi_geojson" not in runs.column_names
+    assert runs["aoi_hash"].to_pylist() == [aoi_hash(BBOX)]
+    assert runs["run_month"].to_pylist() == ["2025-03"]
+    assert store.lulc_areas()["flooded_area_km2"].to_pylist() == [0.5]
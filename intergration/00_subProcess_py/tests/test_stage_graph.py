@@ -0,0 +1,53 @@
+import pytest
+
+import ee
+from flood_frequency_analysis import calculate_flood_frequency
+from flood_prone_area_detection import flood_prone_mask_area, vectorize_flood_prone_area
+from flooded_building_analysis import analyze_flooded_buildings
+from stage_graph import Ref, StageGraph
+
+
+def test_shared_stages_run_once():
+    calls = []
+
+    def stage(name):
+        def run(*inputs):
+            calls.append(name)
+            return (name,) + inputs
+        return run
+
+    graph = StageGraph()
+    graph.source("x", 1)
+    graph.add("shared", stage("shared"), Ref("x"))
+    graph.add("left", stage("left"), Ref("shared"))
+    graph.add("right", stage("right"), Ref("shared"), Ref("x"))
+
+    assert graph.get("left") == ("left", ("shared", 1))
+    assert graph.get("right") == ("right", ("shared", 1), 1)
+    assert calls == ["shared", "left", "right"]
+    assert graph.report() == {"evaluations": 3, "deduplicated": 1, "order": ["shared", "left", "right"]}
+
+
+def test_unknown_and_duplicate_stages_raise():
+    graph = StageGraph()
+    graph.source("x", 1)
+    with pytest.raises(ValueError):
+        graph.add("x", lambda: None)
+    with pytest.raises(KeyError):
+        graph.get("missing")
+
+
+def test_shared_vectors_give_the_standalone_building_count(fake_backend):
+    backend = fake_backend()
+    w, s, e, n = backend.bbox()
+    roi = ee.Geometry.BBox(w, s, e, n)
+    jrc = ee.ImageCollection("JRC/GSW1_4/MonthlyHistory").filterBounds(roi).filterDate("1984-01-01", "1986-01-01")
+    flood_prone_area = flood_prone_mask_area(calculate_flood_frequency(jrc), ee.Image("USGS/SRTMGL1_003"), 20)
+    buildings = ee.FeatureCollection("GOOGLE/Research/open-buildings/v3/polygons")
+
+    shared = vectorize_flood_prone_area(flood_prone_area, roi, best_effort=False)
+    total, flooded, _, _ = analyze_flooded_buildings(flood_prone_area, buildings, roi, flood_prone_vector=shared)
+    standalone = analyze_flooded_buildings(flood_prone_area, buildings, roi)
+
+    assert (total, flooded) == standalone[:2]
+    assert 0 < flooded < total
@@ -0,0 +1,78 @@
+import json
+import math
+
+import numpy as np
+import pytest
+
+from flood_prone_area_detection import detect_flood_prone_areas_local
+from terrain_tile_cache import METRES_PER_DEGREE, TerrainTileCache
+
+# 1 arc-second pixels from 10°E, 50°N, where a degree of longitude is ~64 % of one of latitude.
+TRANSFORM = (1 / 3600, 0.0, 10.0, 0.0, -1 / 3600, 50.0)
+
+
+def east_ramp(grade):
+    """fetch_elevation for a surface rising `grade` metres per metre eastwards."""
+    def fetch(row_start, row_stop, col_start, col_stop):
+        rows, cols = np.mgrid[row_start:row_stop, col_start:col_stop]
+        latitudes = TRANSFORM[5] + (rows + 0.5) * TRANSFORM[4]
+        east_m = (cols + 0.5) * TRANSFORM[0] * METRES_PER_DEGREE * np.cos(np.radians(latitudes))
+        return grade * east_m
+    return fetch
+
+
+def test_slope_uses_the_spacing_at_each_latitude(tmp_path):
+    cache = TerrainTileCache(str(tmp_path), east_ramp(0.05), tile_size=32, transform=TRANSFORM)
+
+    slope = cache.slope(0, 0)
+
+    assert np.allclose(slope, math.degrees(math.atan(0.05)), atol=0.01)
+
+
+def test_tiles_are_built_once_and_georeferenced(tmp_path):
+    calls = []
+    fetch = east_ramp(0.01)
+
+    def counting_fetch(*window):
+        calls.append(window)
+        return fetch(*window)
+
+    cache = TerrainTileCache(str(tmp_path), counting_fetch, tile_size=16, transform=TRANSFORM)
+    window = cache.window(0, 8, 24, 8, 24)
+    cache.window(0, 0, 16, 0, 16)
+
+    assert len(calls) == 4
+    assert np.allclose(window, fetch(8, 24, 8, 24))
+    assert cache.tile_transform(1, 2) == pytest.approx((1 / 3600, 0, 10 + 32 / 3600, 0, -1 / 3600, 50 - 16 / 3600))
+    with open(tmp_path / "terrain.json") as f:
+        assert json.load(f) == {"tile_size": 16, "transform": list(TRANSFORM), "crs": "EPSG:4326"}
+    with pytest.raises(ValueError):
+        TerrainTileCache(str(tmp_path), tile_size=16, transform=(1 / 1200, 0, 10, 0, -1 / 1200, 50))
+
+
+def test_window_offset_requires_the_cache_grid(tmp_path):
+    cache = TerrainTileCache(str(tmp_path), tile_size=16, transform=TRANSFORM)
+
+    assert cache.window_offset(cache.window_transform(5, 7)) == (5, 7)
+    with pytest.raises(ValueError):
+        cache.window_offset((1 / 3600, 0, 10 + 0.5 / 3600, 0, -1 / 3600, 50))
+
+
+def test_local_detection_reads_terrain_from_the_cache(tmp_path):
+    rng = np.random.default_rng(0)
+    elevation = rng.uniform(0, 20, (66, 66))
+
+    def fetch(row_start, row_stop, col_start, col_stop):
+        return np.pad(elevation, 1, mode="edge")[row_start + 1:row_stop + 1, col_start + 1:col_stop + 1]
+
+    cache = TerrainTileCache(str(tmp_path), fetch, tile_size=32, transform=TRANSFORM)
+    frequency = rng.uniform(1, 100, (40, 40)).astype(np.float32)
+    frequency[rng.random(frequency.shape) < 0.2] = np.nan
+
+    flood_prone, polygons = detect_flood_prone_areas_local(frequency, cache.window_transform(10, 20), 10, cache,
+                                                           max_slope=60, max_workers=1)
+
+    window = (slice(10, 50), slice(20, 60))
+    expected = ~np.isnan(frequency) & (elevation[window] < 10) & (cache.window(1, 10, 50, 20, 60) < 60)
+    assert np.array_equal(~np.isnan(flood_prone), expected)
+    assert polygons["type"] == "FeatureCollection" and len(polygons["features"]) == 1
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from index import parse_args
+from threshold_sweep import sweep_flood_prone_thresholds_local
+
+MAPPING = {1: "One", 2: "Two"}
+
+
+def rasters(seed=3, size=24):
+    rng = np.random.default_rng(seed)
+    frequency = rng.uniform(1, 100, (size, size)).astype(np.float32)
+    frequency[rng.random((size, size)) < 0.2] = np.nan
+    elevation = rng.uniform(0, 30, (size, size))
+    slope = rng.uniform(0, 8, (size, size))
+    area = rng.uniform(800, 900, (size, size))
+    lulc = rng.choice([1, 2], (size, size))
+    return frequency, elevation, slope, area, lulc
+
+
+def test_sweep_matches_one_run_per_threshold():
+    frequency, elevation, slope, area, lulc = rasters()
+    rows, cols = np.nonzero(np.ones(frequency.shape, bool)[::3, ::2])
+    rows, cols = rows * 3, cols * 2
+    thresholds = [5, 10.5, 20]
+
+    results = sweep_flood_prone_thresholds_local(frequency, elevation, slope, thresholds, area=area, lulc=lulc,
+                                                 building_rows=rows, building_cols=cols, lulc_mapping=MAPPING)
+
+    for threshold, row in zip(thresholds, results):
+        mask = ~np.isnan(frequency) & (slope < 5) & (elevation < threshold)
+        assert row["low_lying_threshold"] == threshold
+        assert row["flood_prone_area_km2"] == pytest.approx(area[mask].sum() / 1e6)
+        by_class = {entry["LULC_Class"]: entry["Flooded_Area_km²"] for entry in row["lulc_areas"]}
+        for lulc_class in MAPPING:
+            assert by_class.get(lulc_class, 0) == pytest.approx(area[mask & (lulc == lulc_class)].sum() / 1e6,
+                                                                abs=1e-4)
+        assert row["total_buildings"] == len(rows)
+        assert row["flooded_building_count"] == int(mask[rows, cols].sum())
+
+
+def test_pixel_at_a_threshold_is_not_low_lying():
+    frequency = np.full((1, 2), 50, dtype=np.float32)
+    results = sweep_flood_prone_thresholds_local(frequency, np.array([[5.0, 4.9]]), np.zeros((1, 2)), [5, 6])
+
+    assert [row["flood_prone_area_km2"] * 1e6 for row in results] == pytest.approx([1, 2])
+
+
+@pytest.mark.parametrize("thresholds", [[], [10, 5], [5, 5]])
+def test_thresholds_must_be_non_empty_and_ascending(thresholds):
+    frequency, elevation, slope, _, _ = rasters()
+    with pytest.raises(ValueError):
+        sweep_flood_prone_thresholds_local(frequency, elevation, slope, thresholds)
+
+
+def test_cli_rejects_unsorted_sweep_thresholds():
+    assert parse_args(["--sweep-thresholds", "5", "10"]).sweep_thresholds == [5, 10]
+    with pytest.raises(SystemExit):
+        parse_args(["--sweep-thresholds", "10", "5"])
+
+
+def test_negative_lulc_nodata_is_left_out():
+    frequency = np.full((1, 3), 50, dtype=np.float32)
+    results = sweep_flood_prone_thresholds_local(frequency, np.zeros((1, 3)), np.zeros((1, 3)), [5],
+                                                 lulc=np.array([[1, -1, 1]]), lulc_mapping={1: "One"})
+
+    assert results[0]["flood_prone_area_km2"] * 1e6 == pytest.approx(3)
+    assert results[0]["lulc_areas"][0]["Flooded_Area_km²"] * 1e6 == pytest.approx(2)
@@ -0,0 +1,49 @@
+import pytest
+
+import ee
+from flood_frequency_analysis import calculate_flood_frequency
+from flood_prone_area_detection import flood_prone_mask_area, vectorize_flood_prone_area
+from flooded_building_analysis import analyze_flooded_buildings
+from lulc_flooded_area_analysis import analyze_lulc_flooded_area
+from tiled_executor import analyze_tiled, grid_shape, split_bbox, vectorize_tiled
+
+
+def datasets(roi):
+    jrc = ee.ImageCollection("JRC/GSW1_4/MonthlyHistory").filterBounds(roi).filterDate("1984-01-01", "1985-01-01")
+    flood_prone_area = flood_prone_mask_area(calculate_flood_frequency(jrc), ee.Image("USGS/SRTMGL1_003"), 20)
+    worldcover = ee.ImageCollection("ESA/WorldCover/v200").first()
+    buildings = ee.FeatureCollection("GOOGLE/Research/open-buildings/v3/polygons")
+    return flood_prone_area, worldcover, buildings
+
+
+def test_split_bbox_covers_the_box():
+    tiles = split_bbox([0, 0, 3, 2], 2, 3)
+
+    assert len(tiles) == 6
+    assert tiles[0] == [0, 0, 1, 1] and tiles[-1] == [2, 1, 3, 2]
+    assert grid_shape([0, 0, 1, 0.3], 0.25) == (2, 4)
+
+
+def test_concave_roi_tiles_match_the_whole_roi(fake_backend, l_shaped_roi):
+    backend = fake_backend(size=64, buildings=400, building_radius=3)
+    roi = l_shaped_roi(backend)
+    flood_prone_area, worldcover, buildings = datasets(roi)
+
+    total, flooded, _, _ = analyze_flooded_buildings(flood_prone_area, buildings, roi)
+    lulc = analyze_lulc_flooded_area(flood_prone_area, worldcover, roi)
+    tiled = analyze_tiled(flood_prone_area, buildings, worldcover, roi, bbox=backend.bbox(), rows=2, cols=2)
+
+    assert (tiled["total_buildings"], tiled["flooded_building_count"]) == (total, flooded)
+    areas = {row["LULC_Class"]: row["Flooded_Area_km²"] for row in tiled["lulc_areas"]}
+    assert areas == pytest.approx({row["LULC_Class"]: row["Flooded_Area_km²"] for row in lulc})
+
+
+def test_tiled_vectors_cover_the_same_area(fake_backend, l_shaped_roi):
+    backend = fake_backend(size=64)
+    roi = l_shaped_roi(backend)
+    flood_prone_area, _, _ = datasets(roi)
+
+    whole = vectorize_flood_prone_area(flood_prone_area, roi, best_effort=False).geometry().area().getInfo()
+    tiled = vectorize_tiled(flood_prone_area, roi, bbox=backend.bbox(), rows=3, cols=3).geometry().area().getInfo()
+
+    assert tiled == whole > 0
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+import shapely
+
+from zonal_statistics import rasterize_zones, zonal_statistics_local
+
+TRANSFORM = (1.0, 0.0, 0.0, 0.0, -1.0, 6.0)
+MAPPING = {1: "One", 2: "Two"}
+
+
+def test_zones_are_burned_by_pixel_centre_and_first_zone_wins():
+    zones = [("west", shapely.box(0, 0, 3, 6)), ("overlap", shapely.box(2, 0, 6, 6))]
+
+    labels, zone_ids = rasterize_zones(zones, (6, 6), TRANSFORM)
+
+    assert zone_ids == ["west", "overlap"]
+    assert labels[0].tolist() == [1, 1, 1, 2, 2, 2]
+
+
+def test_all_touched_keeps_zones_smaller_than_a_pixel():
+    tiny = [("tiny", {"type": "Polygon", "coordinates": [[[2.4, 3.4], [2.6, 3.4], [2.6, 3.6], [2.4, 3.4]]]})]
+
+    centre_labels, _ = rasterize_zones(tiny, (6, 6), TRANSFORM)
+    touched_labels, _ = rasterize_zones(tiny, (6, 6), TRANSFORM, all_touched=True)
+
+    assert not centre_labels.any()
+    assert np.argwhere(touched_labels).tolist() == [[2, 2]]
+
+
+def test_statistics_match_a_loop_over_zones():
+    rng = np.random.default_rng(7)
+    labels = rng.integers(0, 4, (20, 20))
+    frequency = rng.uniform(1, 100, (20, 20))
+    frequency[rng.random((20, 20)) < 0.3] = np.nan
+    prone = ~np.isnan(frequency) & (rng.random((20, 20)) < 0.7)
+    lulc = rng.choice([1, 2], (20, 20))
+
+    rows = zonal_statistics_local(labels, ["a", "b", "c"], frequency, prone, lulc=lulc, lulc_mapping=MAPPING,
+                                  transform=(30, 0, 0, 0, -30, 0))
+
+    for label, row in enumerate(rows, start=1):
+        zone = labels == label
+        valid = zone & ~np.isnan(frequency)
+        assert row["flood_prone_area_km2"] == pytest.approx((zone & prone).sum() * 900 / 1e6)
+        assert row["mean_flood_frequency"] == pytest.approx(frequency[valid].mean())
+        assert row["max_flood_frequency"] == pytest.approx(frequency[valid].max())
+        by_class = {entry["LULC_Class"]: entry["Flooded_Area_km²"] for entry in row["lulc_areas"]}
+        for lulc_class in MAPPING:
+            expected = (zone & prone & (lulc == lulc_class)).sum() * 900 / 1e6
+            assert by_class[lulc_class] == pytest.approx(expected, abs=1e-4)
+
+
+def test_lulc_nodata_is_left_out():
+    labels = np.ones((2, 3), dtype=np.int32)
+    frequency = np.full((2, 3), 50.0)
+    lulc = np.array([[1, -9999, 2], [0, 2, 255]])
+
+    row, = zonal_statistics_local(labels, ["zone"], frequency, lulc=lulc, lulc_mapping={1: "One", 2: "Two"},
+                                  lulc_nodata=255)
+
+    assert row["flood_prone_area_km2"] == pytest.approx(6 / 1e6)
+    assert {entry["LULC_Class"]: entry["Flooded_Area_km²"] * 1e6 for entry in row["lulc_areas"]} == \
+        pytest.approx({1: 1, 2: 2})
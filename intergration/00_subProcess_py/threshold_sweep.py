@@ -0,0 +1,180 @@
+# cassie/src/algorithms/flood_analysis/threshold_sweep.py
+
+import ee
+
+from lulc_flooded_area_analysis import LULC_MAPPING, format_lulc_areas
+
+# Pixels in a sweep are binned by how many thresholds their elevation reaches:
+# bin i holds thresholds[i-1] <= elevation < thresholds[i], so the result for
+# thresholds[k] is the cumulative sum of bins 0..k. Exact for any elevation.
+
+
+def _threshold_bins(srtm, thresholds):
+    """Server-side bin index image: the number of thresholds that the elevation is >= to."""
+    bins = ee.Image.constant(0)
+    for threshold in thresholds:
+        bins = bins.add(srtm.gte(threshold))
+    return bins.rename("bin").toInt()
+
+
+def _cumulative(values_by_bin, count):
+    totals, running = [], 0
+    for i in range(count):
+        running += values_by_bin.get(i, 0)
+        totals.append(running)
+    return totals
+
+
+def _validate_thresholds(thresholds):
+    """Returns the thresholds as a list; they must be non-empty and strictly ascending."""
+    thresholds = list(thresholds)
+    if not thresholds:
+        raise ValueError("❌ A threshold sweep needs at least one low-lying threshold.")
+    if any(low >= high for low, high in zip(thresholds, thresholds[1:])):
+        raise ValueError(f"❌ Sweep thresholds must be strictly ascending, got {thresholds}.")
+    return thresholds
+
+
+def sweep_results(thresholds, area_by_bin, lulc_by_bin=None, buildings_by_bin=None,
+                  total_buildings=None, lulc_mapping=None):
+    """Turns per-bin sums into one result row per threshold (ascending order)."""
+    count = len(thresholds)
+    area = _cumulative(area_by_bin, count)
+    lulc = {
+        lulc_class: _cumulative(by_bin, count) for lulc_class, by_bin in (lulc_by_bin or {}).items()
+    }
+    flooded = _cumulative(buildings_by_bin or {}, count)
+
+    results = []
+    for k, threshold in enumerate(thresholds):
+        row = {
+            "low_lying_threshold": threshold,
+            "flood_prone_area_km2": area[k] / 1e6,
+        }
+        if lulc_by_bin is not None:
+            groups = [{"class": lulc_class, "sum": sums[k]} for lulc_class, sums in lulc.items()]
+            row["lulc_areas"] = format_lulc_areas({"groups": groups}, lulc_mapping)
+        if buildings_by_bin is not None:
+            row["total_buildings"] = total_buildings
+            row["flooded_building_count"] = flooded[k]
+        results.append(row)
+    return results
+
+
+def _parse_sweep(fetched, thresholds, lulc_mapping):
+    area_by_bin = {int(g["bin"]): g["sum"] for g in fetched["area"]["groups"]}
+
+    lulc_by_bin = None
+    if "lulc" in fetched:
+        lulc_by_bin = {}
+        for class_group in fetched["lulc"]["groups"]:
+            lulc_by_bin[int(class_group["class"])] = {int(g["bin"]): g["sum"] for g in class_group["groups"]}
+
+    buildings_by_bin = None
+    if "building_bins" in fetched:
+        buildings_by_bin = {int(float(b)): n for b, n in (fetched["building_bins"] or {}).items()}
+
+    return sweep_results(thresholds, area_by_bin, lulc_by_bin, buildings_by_bin,
+                         fetched.get("total_buildings"), lulc_mapping)
+
+
+def sweep_flood_prone_thresholds(flood_frequency, srtm, thresholds, roi, worldcover=None,
+                                 buildings=None, lulc_mapping=None, deferred=None):
+    """Computes flood-prone area, LULC areas and building counts for many low-lying thresholds at once.
+
+    One grouped reduction per quantity (all fetched in a single round trip)
+    replaces one full pipeline run per threshold. Buildings are counted by
+    sampling their centroid, as in building_raster_sampling. thresholds must be
+    non-empty and strictly ascending (ValueError otherwise). Returns one row per
+    threshold, or a Deferred handle to them when a DeferredResults batch is given.
+    """
+    thresholds = _validate_thresholds(thresholds)
+    lulc_mapping = LULC_MAPPING if lulc_mapping is None else lulc_mapping
+
+    slope = ee.Terrain.slope(srtm).rename("slope")
+    flat_area = slope.lt(5).rename("flat_area")
+    low_lying = srtm.lt(thresholds[-1]).rename("low_lying")
+    bins = _threshold_bins(srtm, thresholds)
+    flood_prone_any = flood_frequency.updateMask(low_lying.And(flat_area))
+    area = ee.Image.pixelArea().updateMask(flood_prone_any.mask())
+
+    values = {
+        "area": area.addBands(bins).reduceRegion(
+            reducer=ee.Reducer.sum().group(groupField=1, groupName="bin"),
+            geometry=roi,
+            scale=30,
+            maxPixels=1e13
+        )
+    }
+
+    if worldcover is not None:
+        landcover = worldcover.clip(roi).rename("class")
+        values["lulc"] = area.addBands(bins).addBands(landcover).reduceRegion(
+            reducer=ee.Reducer.sum().group(groupField=1, groupName="bin").group(groupField=2, groupName="class"),
+            geometry=roi,
+            scale=30,
+            maxPixels=1e13
+        )
+
+    if buildings is not None:
+        building_points = buildings.filterBounds(roi).map(lambda f: f.centroid(1))
+        sampled = bins.updateMask(flood_prone_any.mask()).reduceRegions(
+            collection=building_points,
+            reducer=ee.Reducer.first().setOutputs(["bin"]),
+            scale=30
+        ).filter(ee.Filter.notNull(["bin"]))
+        values["total_buildings"] = building_points.size()
+        values["building_bins"] = sampled.aggregate_histogram("bin")
+
+    def parse(fetched):
+        return _parse_sweep(fetched, thresholds, lulc_mapping)
+
+    if deferred is not None:
+        return deferred.register("threshold_sweep", ee.Dictionary(values), parse)
+    return parse(ee.Dictionary(values).getInfo())
+
+
+def sweep_flood_prone_thresholds_local(flood_frequency, elevation, slope, thresholds, area=None,
+                                       lulc=None, building_rows=None, building_cols=None,
+                                       lulc_mapping=None):
+    """Local equivalent of sweep_flood_prone_thresholds over aligned NumPy rasters.
+
+    area defaults to 1 per pixel; building_rows/cols are the centroid pixel
+    indices from building_raster_sampling.xy_to_rowcol (inside the raster).
+    Negative or NaN lulc pixels (nodata) are left out of the LULC areas.
+    thresholds are validated as in sweep_flood_prone_thresholds.
+    """
+    import numpy as np
+
+    thresholds = _validate_thresholds(thresholds)
+    count = len(thresholds)
+    bins = np.searchsorted(np.asarray(thresholds, dtype=np.float64), elevation, side="right")
+    flood_prone_any = ~np.isnan(flood_frequency) & (slope < 5) & (bins < count)
+
+    pixel_bins = bins[flood_prone_any]
+    weights = None if area is None else np.asarray(area, dtype=np.float64)[flood_prone_any]
+    area_sums = np.bincount(pixel_bins, weights=weights, minlength=count)
+    area_by_bin = {i: float(v) for i, v in enumerate(area_sums)}
+
+    lulc_by_bin = None
+    if lulc is not None:
+        classes = np.asarray(lulc)[flood_prone_any]
+        has_class = classes >= 0
+        classes = classes[has_class].astype(np.int64)
+        class_weights = None if weights is None else weights[has_class]
+        combined = np.bincount(classes * count + pixel_bins[has_class], weights=class_weights)
+        lulc_by_bin = {}
+        for code in np.nonzero(combined)[0]:
+            lulc_class, bin_index = divmod(int(code), count)
+            lulc_by_bin.setdefault(lulc_class, {})[bin_index] = float(combined[code])
+
+    buildings_by_bin = None
+    total_buildings = None
+    if building_rows is not None:
+        at_building = flood_prone_any[building_rows, building_cols]
+        building_sums = np.bincount(bins[building_rows, building_cols][at_building], minlength=count)
+        buildings_by_bin = {i: int(v) for i, v in enumerate(building_sums)}
+        total_buildings = int(len(building_rows))
+
+    return sweep_results(thresholds, area_by_bin, lulc_by_bin, buildings_by_bin,
+                         total_buildings, lulc_mapping)
@@ -0,0 +1,185 @@
+# cassie/src/algorithms/utils/tiled_executor.py
+
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import ee
+
+from deferred_results import DeferredResults
+from flood_frequency_analysis import calculate_flood_counts
+from flood_prone_area_detection import vectorize_flood_prone_area
+from flooded_building_analysis import analyze_flooded_buildings
+from lulc_flooded_area_analysis import analyze_lulc_flooded_area
+
+
+def geometry_bbox(roi):
+    """Returns [west, south, east, north] of an ee.Geometry with one bounds() round trip.
+
+    Works for computed geometries too (e.g. FeatureCollection.geometry() of GAUL
+    regions), which have no client-side GeoJSON.
+    """
+    ring = roi.bounds(1).getInfo()["coordinates"][0]
+    xs = [p[0] for p in ring]
+    ys = [p[1] for p in ring]
+    return [min(xs), min(ys), max(xs), max(ys)]
+
+
+def grid_shape(bbox, max_tile_degrees):
+    """Returns (rows, cols) so that no tile is larger than max_tile_degrees on a side."""
+    west, south, east, north = bbox
+    rows = max(1, math.ceil((north - south) / max_tile_degrees))
+    cols = max(1, math.ceil((east - west) / max_tile_degrees))
+    return rows, cols
+
+
+def split_bbox(bbox, rows, cols):
+    """Splits a [west, south, east, north] box into a row-major grid of tile boxes."""
+    west, south, east, north = bbox
+    dx = (east - west) / cols
+    dy = (north - south) / rows
+    tiles = []
+    for r in range(rows):
+        for c in range(cols):
+            tiles.append([
+                west + c * dx,
+                south + r * dy,
+                east if c == cols - 1 else west + (c + 1) * dx,
+                north if r == rows - 1 else south + (r + 1) * dy,
+            ])
+    return tiles
+
+
+def tile_geometry(roi, tile_bbox):
+    """Clips the ROI to one tile box."""
+    return ee.Geometry.BBox(*tile_bbox).intersection(roi, 1)
+
+
+def run_tiled(tiles, tile_fn, merge_fn, max_workers=8):
+    """Runs tile_fn on every tile on a bounded thread pool and merges the results."""
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(tile_fn, tiles))
+    return merge_fn(results)
+
+
+def merge_sums(results):
+    """Adds numbers, NumPy arrays or dicts of them (e.g. obs/water counters) across tiles."""
+    results = [r for r in results if r is not None]
+    if not results:
+        return None
+    if isinstance(results[0], dict):
+        keys = {key for r in results for key in r}
+        return {key: merge_sums([r.get(key) for r in results]) for key in keys}
+    total = results[0]
+    for r in results[1:]:
+        total = total + r
+    return total
+
+
+def merge_lulc_areas(results):
+    """Adds per-class rows of analyze_lulc_flooded_area across tiles."""
+    merged = {}
+    for rows in results:
+        for row in rows:
+            entry = merged.setdefault(row["LULC_Class"], dict(row, **{"Flooded_Area_km²": 0}))
+            entry["Flooded_Area_km²"] += row["Flooded_Area_km²"]
+    return list(merged.values())
+
+
+def owned_by_tile(buildings, tile_bbox, grid_bbox):
+    """Keeps buildings whose centroid falls in the tile, half-open so each is counted once.
+
+    Ownership is decided on the bbox grid alone. Pass buildings already filtered
+    by the ROI: with a non-rectangular ROI a building may be owned by a tile
+    whose part of the ROI its footprint never touches.
+    """
+    def add_centroid(f):
+        xy = f.geometry().centroid(1).coordinates()
+        return f.set({"_cx": xy.get(0), "_cy": xy.get(1)})
+
+    west, south, east, north = tile_bbox
+    filters = []
+    # Outer edges are left open so buildings straddling the grid boundary are not lost.
+    if west > grid_bbox[0]:
+        filters.append(ee.Filter.gte("_cx", west))
+    if east < grid_bbox[2]:
+        filters.append(ee.Filter.lt("_cx", east))
+    if south > grid_bbox[1]:
+        filters.append(ee.Filter.gte("_cy", south))
+    if north < grid_bbox[3]:
+        filters.append(ee.Filter.lt("_cy", north))
+
+    buildings = buildings.map(add_centroid)
+    return buildings.filter(ee.Filter.And(*filters)) if filters else buildings
+
+
+def vectorize_tiled(flood_prone_area, roi, bbox=None, rows=None, cols=None, max_tile_degrees=0.25,
+                    tile_scale=2, best_effort=False):
+    """Polygonizes the flood-prone raster tile by tile and merges the pieces into one FeatureCollection.
+
+    Every tile is its own reduceToVectors over a bounded region, so no single
+    computation has to hold the whole AOI. Polygons crossing a tile edge come out
+    cut in two; flood_prone_polygons dissolves them again.
+    """
+    bbox = bbox or geometry_bbox(roi)
+    if rows is None or cols is None:
+        rows, cols = grid_shape(bbox, max_tile_degrees)
+    pieces = [
+        vectorize_flood_prone_area(flood_prone_area, tile_geometry(roi, tile_bbox), tile_scale, best_effort)
+        for tile_bbox in split_bbox(bbox, rows, cols)
+    ]
+    return ee.FeatureCollection(pieces).flatten()
+
+
+def analyze_tiled(flood_prone_area, buildings, worldcover, roi, collection=None,
+                  bbox=None, rows=None, cols=None, max_tile_degrees=0.25, max_workers=8, margin_m=250):
+    """Runs the building, LULC and (optionally) obs/water reductions tile by tile and merges them.
+
+    Each tile resolves its values with one round trip; tiles run concurrently on
+    a thread pool of max_workers. A building in the ROI belongs to the grid tile
+    holding its centroid, even where that centroid lies outside the ROI, and is
+    tested against the flood polygons of that tile grown by margin_m, so an
+    overlap just across the tile edge still counts. LULC areas and obs/water
+    sums are additive, and the building counts match a whole-ROI run as long as
+    no footprint reaches more than margin_m past its tile.
+    """
+    bbox = bbox or geometry_bbox(roi)
+    if rows is None or cols is None:
+        rows, cols = grid_shape(bbox, max_tile_degrees)
+    counts = calculate_flood_counts(collection) if collection is not None else None
+    buildings_in_roi = buildings.filterBounds(roi)
+
+    def run_tile(tile_bbox):
+        tile = tile_geometry(roi, tile_bbox)
+        deferred = DeferredResults()
+        grown_tile = ee.Geometry.BBox(*tile_bbox).buffer(margin_m, 10)
+        tile_buildings = owned_by_tile(buildings_in_roi.filterBounds(grown_tile), tile_bbox, bbox)
+        flood_region = grown_tile.intersection(roi, 1)
+        total, flooded, _, _ = analyze_flooded_buildings(flood_prone_area, tile_buildings, roi, deferred=deferred,
+                                                         flood_region=flood_region)
+        lulc = analyze_lulc_flooded_area(flood_prone_area, worldcover, tile, deferred=deferred)
+        water = None
+        if counts is not None:
+            water = deferred.register("water_counts", counts[0].addBands(counts[1]).reduceRegion(
+                reducer=ee.Reducer.sum(),
+                geometry=tile,
+                scale=30,
+                maxPixels=1e13
+            ))
+        deferred.resolve()
+        return {
+            "total_buildings": total.value or 0,
+            "flooded_building_count": flooded.value or 0,
+            "lulc_areas": lulc.value,
+            "water_counts": water.value if water is not None else None,
+        }
+
+    def merge(results):
+        return {
+            "total_buildings": merge_sums([r["total_buildings"] for r in results]),
+            "flooded_building_count": merge_sums([r["flooded_building_count"] for r in results]),
+            "lulc_areas": merge_lulc_areas([r["lulc_areas"] for r in results]),
+            "water_counts": merge_sums([r["water_counts"] for r in results]),
+            "tiles": len(results),
+        }
+
+    return run_tiled(split_bbox(bbox, rows, cols), run_tile, merge, max_workers)
@@ -0,0 +1,220 @@
+# cassie/src/algorithms/flood_analysis/zonal_statistics.py
+
+import ee
+
+from lulc_flooded_area_analysis import format_lulc_areas
+
+# Zones are burned into one label raster (label i + 1 for zone i, 0 outside every
+# zone; where zones overlap the first one wins, as with reduceToImage(first)).
+# Every statistic is then a single grouped pass over that raster, so N zones
+# cost one reduction instead of N.
+
+
+def gaul_zones(country, level=1):
+    """GAUL admin regions of a country and the property that names them (e.g. ADM1_NAME)."""
+    zones = ee.FeatureCollection(f"FAO/GAUL/2015/level{level}").filter(ee.Filter.eq("ADM0_NAME", country))
+    return zones, f"ADM{level}_NAME"
+
+
+def zonal_rows(zone_ids, area_by_zone, frequency_by_zone, lulc_by_zone=None, lulc_mapping=None):
+    """Builds one result row per zone from per-label sums (labels start at 1)."""
+    rows = []
+    for label, zone in enumerate(zone_ids, start=1):
+        frequency = frequency_by_zone.get(label, {})
+        row = {
+            "zone": zone,
+            "flood_prone_area_km2": area_by_zone.get(label, 0) / 1e6,
+            "mean_flood_frequency": frequency.get("mean"),
+            "max_flood_frequency": frequency.get("max"),
+        }
+        if lulc_by_zone is not None:
+            groups = [{"class": lulc_class, "sum": total} for lulc_class, total in lulc_by_zone.get(label, {}).items()]
+            row["lulc_areas"] = format_lulc_areas({"groups": groups}, lulc_mapping)
+        rows.append(row)
+    return rows
+
+
+def _parse_zonal(fetched, lulc_mapping):
+    area_by_zone = {int(g["zone"]): g["sum"] for g in fetched["area"]["groups"]}
+    frequency_by_zone = {
+        int(g["zone"]): {"mean": g.get("mean"), "max": g.get("max")} for g in fetched["frequency"]["groups"]
+    }
+    lulc_by_zone = None
+    if "lulc" in fetched:
+        lulc_by_zone = {}
+        for class_group in fetched["lulc"]["groups"]:
+            for g in class_group["groups"]:
+                lulc_by_zone.setdefault(int(g["zone"]), {})[int(class_group["class"])] = g["sum"]
+    return zonal_rows(fetched["zones"], area_by_zone, frequency_by_zone, lulc_by_zone, lulc_mapping)
+
+
+def zone_label_image(zones, zone_property):
+    """Rasterizes a zone FeatureCollection into a 'zone' label image; returns (labels, zone names)."""
+    names = zones.aggregate_array(zone_property).distinct()
+    labelled = zones.map(lambda f: f.set("zone_label", names.indexOf(f.get(zone_property)).add(1)))
+    labels = labelled.reduceToImage(properties=["zone_label"], reducer=ee.Reducer.first())
+    return labels.rename("zone").toInt(), names
+
+
+def zonal_statistics(flood_frequency, flood_prone_area, zones, zone_property, worldcover=None,
+                     scale=30, lulc_mapping=None, deferred=None):
+    """Per-zone flood-prone area, mean/max flood frequency and LULC areas for many zones at once.
+
+    zones is a FeatureCollection (admin regions, districts or even building
+    footprints) named by zone_property. All quantities come from grouped
+    reductions over one label image and are fetched in a single round trip; with
+    a DeferredResults batch a Deferred handle to the rows is returned instead.
+    """
+    labels, names = zone_label_image(zones, zone_property)
+    region = zones.geometry()
+    area = ee.Image.pixelArea().updateMask(flood_prone_area.mask())
+
+    values = {
+        "zones": names,
+        "area": area.addBands(labels).reduceRegion(
+            reducer=ee.Reducer.sum().group(groupField=1, groupName="zone"),
+            geometry=region,
+            scale=scale,
+            maxPixels=1e13
+        ),
+        "frequency": flood_frequency.addBands(labels).reduceRegion(
+            reducer=ee.Reducer.mean().combine(ee.Reducer.max(), sharedInputs=True).group(groupField=1, groupName="zone"),
+            geometry=region,
+            scale=scale,
+            maxPixels=1e13
+        ),
+    }
+    if worldcover is not None:
+        values["lulc"] = area.addBands(labels).addBands(worldcover.rename("class")).reduceRegion(
+            reducer=ee.Reducer.sum().group(groupField=1, groupName="zone").group(groupField=2, groupName="class"),
+            geometry=region,
+            scale=scale,
+            maxPixels=1e13
+        )
+
+    def parse(fetched):
+        return _parse_zonal(fetched, lulc_mapping)
+
+    if deferred is not None:
+        return deferred.register("zonal_statistics", ee.Dictionary(values), parse)
+    return parse(ee.Dictionary(values).getInfo())
+
+
+def rasterize_zones(zones, shape, transform, all_touched=False):
+    """Burns (zone_id, geometry) pairs into an int32 label raster; returns (labels, zone_ids).
+
+    Geometries are shapely objects or GeoJSON dicts in the raster's CRS. A pixel
+    gets the first zone containing its centre, or with all_touched=True the
+    first zone touching it at all, so zones smaller than a pixel still get one.
+    All zones are burned in one rasterio.features.rasterize call when rasterio
+    is installed; without it each zone is tested with vectorized shapely
+    predicates over the pixels of its own bounding box.
+    """
+    import numpy as np
+    import shapely
+    from building_raster_sampling import affine_coefficients
+
+    a, b, c, d, e, f = affine_coefficients(transform)
+    if b or d:
+        raise ValueError("❌ Only north-up (non-rotated) transforms are supported.")
+    height, width = shape
+    zone_ids = [zone_id for zone_id, _ in zones]
+    geometries = np.array([shapely.geometry.shape(g) if isinstance(g, dict) else g for _, g in zones],
+                          dtype=object)
+    if not len(geometries):
+        return np.zeros(shape, dtype=np.int32), zone_ids
+
+    try:
+        from rasterio import features
+        from rasterio.transform import Affine
+    except ImportError:
+        features = None
+    if features is not None:
+        # Later shapes overwrite earlier ones, so burn in reverse to let the first zone win.
+        shapes = [(geometries[i], i + 1) for i in range(len(geometries) - 1, -1, -1)]
+        labels = features.rasterize(shapes, out_shape=shape, transform=Affine(a, b, c, d, e, f), fill=0,
+                                    all_touched=all_touched, dtype="int32")
+        return labels, zone_ids
+
+    labels = np.zeros(shape, dtype=np.int32)
+    for label, geometry in enumerate(geometries, start=1):
+        west, south, east, north = geometry.bounds
+        cols = sorted(((west - c) / a, (east - c) / a))
+        rows = sorted(((north - f) / e, (south - f) / e))
+        c0, c1 = max(int(np.floor(cols[0])), 0), min(int(np.ceil(cols[1])), width)
+        r0, r1 = max(int(np.floor(rows[0])), 0), min(int(np.ceil(rows[1])), height)
+        if c0 >= c1 or r0 >= r1:
+            continue
+        rr, cc = np.mgrid[r0:r1, c0:c1]
+        if all_touched:
+            shapely.prepare(geometry)
+            x0, y0 = c + a * cc, f + e * rr
+            boxes = shapely.box(np.minimum(x0, x0 + a), np.minimum(y0, y0 + e),
+                                np.maximum(x0, x0 + a), np.maximum(y0, y0 + e))
+            inside = shapely.intersects(geometry, boxes)
+        else:
+            inside = shapely.contains_xy(geometry, c + a * (cc + 0.5), f + e * (rr + 0.5))
+        window = labels[r0:r1, c0:c1]
+        window[inside & (window == 0)] = label
+    return labels, zone_ids
+
+
+def zonal_statistics_local(labels, zone_ids, flood_frequency, flood_prone_mask=None, area=None,
+                           lulc=None, lulc_mapping=None, transform=None, lulc_nodata=None):
+    """Local equivalent of zonal_statistics over aligned NumPy rasters, in one bincount pass per quantity.
+
+    flood_frequency is NaN where masked; flood_prone_mask defaults to its valid
+    pixels. area is per-pixel m²; without it every pixel counts |a * e| of the
+    transform (or 1 when no transform is given). LULC pixels that are negative,
+    NaN or equal to lulc_nodata have no class and are left out of the LULC areas.
+    """
+    import numpy as np
+
+    labels = np.asarray(labels).ravel()
+    frequency = np.asarray(flood_frequency, dtype=np.float64).ravel()
+    count = len(zone_ids) + 1
+    if area is None:
+        pixel_area = 1.0
+        if transform is not None:
+            from building_raster_sampling import affine_coefficients
+            coefficients = affine_coefficients(transform)
+            pixel_area = abs(coefficients[0] * coefficients[4])
+        area = np.full(labels.shape, pixel_area)
+    else:
+        area = np.asarray(area, dtype=np.float64).ravel()
+
+    in_zone = labels > 0
+    valid = in_zone & ~np.isnan(frequency)
+    prone = in_zone & (~np.isnan(frequency) if flood_prone_mask is None
+                       else np.asarray(flood_prone_mask, dtype=bool).ravel())
+
+    area_sums = np.bincount(labels[prone], weights=area[prone], minlength=count)
+    pixel_counts = np.bincount(labels[valid], minlength=count)
+    frequency_sums = np.bincount(labels[valid], weights=frequency[valid], minlength=count)
+    frequency_max = np.full(count, -np.inf)
+    np.maximum.at(frequency_max, labels[valid], frequency[valid])
+
+    area_by_zone = {label: float(area_sums[label]) for label in range(1, count) if area_sums[label]}
+    frequency_by_zone = {
+        label: {
+            "mean": float(frequency_sums[label] / pixel_counts[label]),
+            "max": float(frequency_max[label]),
+        }
+        for label in range(1, count) if pixel_counts[label]
+    }
+
+    lulc_by_zone = None
+    if lulc is not None:
+        classes = np.asarray(lulc).ravel()
+        has_class = prone & (classes >= 0)
+        if lulc_nodata is not None:
+            has_class &= classes != lulc_nodata
+        classes = classes[has_class].astype(np.int64)
+        classes_count = int(classes.max()) + 1 if classes.size else 1
+        combined = np.bincount(labels[has_class] * classes_count + classes, weights=area[has_class],
+                               minlength=count * classes_count).reshape(count, classes_count)
+        lulc_by_zone = {}
+        for label, lulc_class in zip(*np.nonzero(combined)):
+            lulc_by_zone.setdefault(int(label), {})[int(lulc_class)] = float(combined[label, lulc_class])
+
+    return zonal_rows(zone_ids, area_by_zone, frequency_by_zone, lulc_by_zone, lulc_mapping)